@@ -1,9 +1,14 @@
 import time
 import os
 import uuid
-from typing import List, Dict, Any, Optional
+import asyncio
+import threading
+from contextlib import contextmanager, ExitStack
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Dict, Any, Optional, Callable, Tuple, Iterator, Set, Awaitable
 from .config import Config
-from .llm_client import LLMClient
+from .llm_client import AsyncLLMClient
 from .test_case_manager import TestCaseManager
 from .report_generator import ReportGenerator
 from .faiss_rag_retriever import FAISSRAGRetriever
@@ -12,25 +17,54 @@ from .observability import ObservabilityManager
 class AITestCopilot:
     """Main AI Test Case Copilot that orchestrates the entire process."""
     
-    def __init__(self):
+    def __init__(self, use_llm_cache: Optional[bool] = None):
         """
         Initialize the AI Test Copilot.
+        
+        Args:
+            use_llm_cache: Serve repeated LLM requests from the response cache
+                (defaults to Config.LLM_CACHE_ENABLED)
         """
         self.config = Config()
         self.config.validate()
         
-        self.llm_client = LLMClient()
-        self.test_case_manager = TestCaseManager()
+        self.observability = ObservabilityManager()
+        self.llm_client = AsyncLLMClient(observability=self.observability, use_cache=use_llm_cache)
+        self.test_case_manager = TestCaseManager(self.config.TEST_CASES_STORE or None)
         self.report_generator = ReportGenerator()
         self.semantic_retriever = FAISSRAGRetriever(k=3)
-        self.observability = ObservabilityManager()
+        
+        # Change requests may be processed concurrently (batch mode): the FAISS
+        # index and each test case are guarded; new IDs come from the allocator
+        self._index_lock = threading.RLock()
+        self._test_case_locks: Dict[str, threading.Lock] = {}
+        self._test_case_locks_guard = threading.Lock()
+        
+        # Sessions that may have written test cases not yet upserted into the index.
+        # The index is only marked current when none are left, and not after a
+        # request failed with writes unindexed (until the next refit).
+        self._unindexed_sessions: Set[str] = set()
+        self._index_behind = False
+        
+        # Update/generate LLM calls of all change requests run on one event loop
+        # thread, so they share the async client's HTTP connection pool
+        self._llm_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._llm_loop_guard = threading.Lock()
     
-    def process_change_request(self, change_request_path: str) -> str:
+    def process_change_request(
+        self,
+        change_request_path: str,
+        iw_overview: Optional[str] = None,
+        check_index: bool = True
+    ) -> str:
         """
         Process a change request and generate updated/new test cases.
         
         Args:
             change_request_path: Path to the change request file
+            iw_overview: Already loaded IW_OVERVIEW.md content (read from disk if None)
+            check_index: Refit the retriever if the test case files changed since the
+                index was built; False when the caller keeps the index fitted (batch runs)
             
         Returns:
             Path to the generated report
@@ -51,52 +85,65 @@ class AITestCopilot:
             'vector_store': 'FAISS'
         }
         
+        # Each step is timed as a stage span in the latency histograms
+        span = self.observability.span
+        
         try:
-            # Step 1: Load the change request
-            change_request = self._load_change_request(change_request_path)
-            
-            # Step 2: Load context and existing test cases
-            iw_overview = self._load_iw_overview()
-            all_test_cases = self.test_case_manager.load_all_test_cases()
+            # Steps 1-2: Load the change request and context
+            with span("load", session_id):
+                change_request = self._load_change_request(change_request_path)
+                if iw_overview is None:
+                    iw_overview = self._load_iw_overview()
             
-            # Step 3: Use enhanced semantic retrieval to get relevant test cases
-            self.semantic_retriever.fit(all_test_cases)
-            relevant_test_cases = self.semantic_retriever.retrieve_relevant(change_request)
+            # Step 3: Use enhanced semantic retrieval to get relevant test cases,
+            # refitting only if the test case files changed since the index was built
+            if check_index:
+                with span("fit", session_id):
+                    self._ensure_retriever_fitted()
+            with span("retrieve", session_id), self._index_lock:
+                relevant_test_cases = self.semantic_retriever.retrieve_relevant(change_request)
             execution_summary['total_analyzed'] = len(relevant_test_cases)
             
             # Step 4: Analyze the change request with relevant test cases only
-            analysis_result = self.llm_client.analyze_change_request(
-                change_request, iw_overview, relevant_test_cases, session_id
-            )
+            with span("analyze", session_id):
+                analysis_result = self.llm_client.analyze_change_request(
+                    change_request, iw_overview, relevant_test_cases, session_id
+                )
             
             # Step 5: Process impacted test cases
-            updated_test_cases = self._process_impacted_test_cases(
-                change_request, iw_overview, analysis_result, all_test_cases, session_id
-            )
+            with self._index_lock:
+                self._unindexed_sessions.add(session_id)
+            with span("update", session_id):
+                updated_test_cases = self._process_impacted_test_cases(
+                    change_request, iw_overview, analysis_result, session_id
+                )
             execution_summary['total_updated'] = len(updated_test_cases)
             
             # Step 6: Generate new test cases
-            new_test_cases = self._generate_new_test_cases(
-                change_request, iw_overview, analysis_result, relevant_test_cases, session_id
-            )
+            with span("generate", session_id):
+                new_test_cases = self._generate_new_test_cases(
+                    change_request, iw_overview, analysis_result, relevant_test_cases, session_id
+                )
             execution_summary['total_created'] = len(new_test_cases)
             
-            # Step 7: Update vector store with new/updated test cases
-            if new_test_cases:
-                self.semantic_retriever.fit(new_test_cases)
-            if updated_test_cases:
-                for tc in updated_test_cases:
-                    test_case_id = tc.get('_file_name', '')
-                    if test_case_id:
-                        self.semantic_retriever.update_test_case(test_case_id, tc)
+            # Step 7: Upsert new/updated test cases into the vector store
+            with span("reindex", session_id), self._index_lock:
+                changed_test_cases = [tc for tc in new_test_cases + updated_test_cases if tc.get('_file_name')]
+                self.semantic_retriever.upsert_test_cases(changed_test_cases)
+                self._unindexed_sessions.discard(session_id)
+                # The corpus fingerprint covers every file on disk, so it only describes
+                # the index once no other request has writes waiting to be upserted
+                if not self._unindexed_sessions and not self._index_behind:
+                    self.semantic_retriever.mark_current(self.test_case_manager.corpus_fingerprint())
             
             # Step 8: Generate report
             execution_time = time.time() - start_time
             execution_summary['execution_time'] = f"{execution_time:.2f} seconds"
             
-            report_path = self.report_generator.generate_report(
-                change_request, analysis_result, updated_test_cases, new_test_cases, execution_summary
-            )
+            with span("report", session_id):
+                report_path = self.report_generator.generate_report(
+                    change_request, analysis_result, updated_test_cases, new_test_cases, execution_summary
+                )
             
             # End session successfully
             self.observability.end_session(
@@ -113,6 +160,12 @@ class AITestCopilot:
             execution_summary['errors'].append(str(e))
             execution_summary['execution_time'] = f"{time.time() - start_time:.2f} seconds"
             
+            # Writes of this request may be missing from the index until the next refit
+            with self._index_lock:
+                if session_id in self._unindexed_sessions:
+                    self._unindexed_sessions.discard(session_id)
+                    self._index_behind = True
+            
             # End session with error
             self.observability.end_session(session_id, "error")
             
@@ -125,6 +178,68 @@ class AITestCopilot:
             
             raise Exception(f"Failed to process change request: {str(e)}. Error report generated at: {error_report}")
     
+    def process_change_requests(
+        self,
+        change_request_paths: List[str],
+        concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Process many change requests with one shared setup.
+        
+        The overview is read and the retriever fitted once; the requests then
+        run concurrently, each producing its own report. Requests keep the index
+        current by upserting what they write, so they skip the corpus check
+        (whose fingerprint other in-flight requests keep changing), and the
+        index is marked current once the batch is done.
+        
+        Args:
+            change_request_paths: Paths to the change request files
+            concurrency: Requests processed at once (defaults to Config.BATCH_CONCURRENCY)
+            
+        Returns:
+            Dictionary with per-request 'results' (change_request, status,
+            report_path, error) and the 'summary_report' path
+        """
+        start_time = time.time()
+        iw_overview = self._load_iw_overview()
+        self._ensure_retriever_fitted()
+        
+        def run(change_request_path: str) -> Dict[str, Any]:
+            try:
+                report_path = self.process_change_request(change_request_path, iw_overview, check_index=False)
+                return {'change_request': change_request_path, 'status': 'success',
+                        'report_path': report_path, 'error': None}
+            except Exception as e:
+                return {'change_request': change_request_path, 'status': 'error',
+                        'report_path': None, 'error': str(e)}
+        
+        if concurrency is None:
+            concurrency = self.config.BATCH_CONCURRENCY
+        max_workers = min(max(1, concurrency), len(change_request_paths))
+        if max_workers <= 1:
+            results = [run(path) for path in change_request_paths]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch") as executor:
+                results = list(executor.map(run, change_request_paths))
+        
+        with self._index_lock:
+            if not self._unindexed_sessions and not self._index_behind:
+                self.semantic_retriever.mark_current(self.test_case_manager.corpus_fingerprint())
+        
+        summary_report = self.report_generator.generate_batch_report(results, time.time() - start_time)
+        return {'results': results, 'summary_report': summary_report}
+    
+    @contextmanager
+    def _locked_test_cases(self, test_case_ids: List[str]) -> Iterator[None]:
+        """Hold the write locks of several test cases, acquired in sorted order to avoid deadlocks."""
+        with self._test_case_locks_guard:
+            locks = [self._test_case_locks.setdefault(test_case_id, threading.Lock())
+                     for test_case_id in sorted(set(test_case_ids))]
+        with ExitStack() as stack:
+            for lock in locks:
+                stack.enter_context(lock)
+            yield
+    
     def _load_change_request(self, change_request_path: str) -> str:
         """Load the change request from file."""
         try:
@@ -146,7 +261,6 @@ class AITestCopilot:
         change_request: str,
         iw_overview: str,
         analysis_result: Dict[str, Any],
-        existing_test_cases: List[Dict[str, Any]],
         session_id: str = None
     ) -> List[Dict[str, Any]]:
         """Process and update impacted test cases."""
@@ -155,17 +269,42 @@ class AITestCopilot:
         if 'impacted_test_cases' not in analysis_result:
             return updated_test_cases
         
+        impacted_test_cases = []
         for impacted in analysis_result['impacted_test_cases']:
             test_case_id = impacted.get('test_case_id')
             if not test_case_id:
                 continue
-            
-            # Find the existing test case
-            existing_test_case = None
-            for tc in existing_test_cases:
-                if tc.get('_file_name', '').startswith(test_case_id):
-                    existing_test_case = tc
-                    break
+            if test_case_id.endswith('.json'):
+                test_case_id = test_case_id[:-5]
+            impacted_test_cases.append((test_case_id, impacted))
+        
+        # Concurrent change requests touching the same test case take turns,
+        # so each update starts from the previous one's result
+        with self._locked_test_cases([test_case_id for test_case_id, _ in impacted_test_cases]):
+            return self._update_test_cases(
+                change_request, iw_overview, impacted_test_cases, session_id
+            )
+    
+    def _update_test_cases(
+        self,
+        change_request: str,
+        iw_overview: str,
+        impacted_test_cases: List[Tuple[str, Dict[str, Any]]],
+        session_id: str = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Update the given (test case ID, impact) pairs; the caller holds their locks.
+        
+        LLM updates run concurrently; test cases are saved afterwards in the
+        order the analysis listed them.
+        """
+        updated_test_cases = []
+        
+        # Resolve and back up the impacted test cases before any LLM call
+        pending = []
+        for test_case_id, impacted in impacted_test_cases:
+            # Load only the impacted test case from disk
+            existing_test_case = self.test_case_manager.get_test_case_by_id(test_case_id)
             
             if not existing_test_case:
                 continue
@@ -173,30 +312,50 @@ class AITestCopilot:
             try:
                 # Create backup before updating
                 self.test_case_manager.backup_test_case(existing_test_case['_file_name'])
-                
-                # Update the test case using LLM
-                updated_test_case = self.llm_client.update_existing_test_case(
-                    change_request, iw_overview, existing_test_case, 
-                    impacted.get('required_changes', []), session_id
-                )
-                
-                # Save the updated test case
-                updated_file_path = self.test_case_manager.update_test_case(
-                    test_case_id, updated_test_case
-                )
-                
-                # Add metadata for reporting
-                updated_test_case['_file_path'] = updated_file_path
-                updated_test_case['_file_name'] = os.path.basename(updated_file_path)
-                updated_test_case['_original_file'] = existing_test_case['_file_name']
-                updated_test_case['_impact_level'] = impacted.get('impact_level', 'unknown')
-                updated_test_case['_reasoning'] = impacted.get('reasoning', 'No reasoning provided')
-                
-                updated_test_cases.append(updated_test_case)
-                
+                pending.append((test_case_id, impacted, existing_test_case))
             except Exception as e:
                 print(f"Warning: Failed to update test case {test_case_id}: {str(e)}")
-                continue
+        
+        # Update the test cases using the LLM
+        outcomes = self._run_llm_tasks([
+            partial(
+                self.llm_client.update_existing_test_case_async,
+                change_request, iw_overview, existing_test_case,
+                impacted.get('required_changes', []), session_id
+            )
+            for _, impacted, existing_test_case in pending
+        ])
+        
+        # Journal the before-images of the test cases about to be written in one
+        # durable write, so the session can be rolled back
+        to_write = [existing_test_case['_file_name']
+                    for (_, _, existing_test_case), (_, error) in zip(pending, outcomes) if error is None]
+        if session_id and to_write:
+            self.test_case_manager.journal_before_images(session_id, to_write)
+        
+        with self.test_case_manager.batch_writes():
+            for (test_case_id, impacted, existing_test_case), (updated_test_case, error) in zip(pending, outcomes):
+                try:
+                    if error is not None:
+                        raise error
+                    
+                    # Save the updated test case
+                    updated_file_path = self.test_case_manager.update_test_case(
+                        test_case_id, updated_test_case, session_id=session_id
+                    )
+                    
+                    # Add metadata for reporting
+                    updated_test_case['_file_path'] = updated_file_path
+                    updated_test_case['_file_name'] = os.path.basename(updated_file_path)
+                    updated_test_case['_original_file'] = existing_test_case['_file_name']
+                    updated_test_case['_impact_level'] = impacted.get('impact_level', 'unknown')
+                    updated_test_case['_reasoning'] = impacted.get('reasoning', 'No reasoning provided')
+                    
+                    updated_test_cases.append(updated_test_case)
+                    
+                except Exception as e:
+                    print(f"Warning: Failed to update test case {test_case_id}: {str(e)}")
+                    continue
         
         return updated_test_cases
     
@@ -208,42 +367,107 @@ class AITestCopilot:
         existing_test_cases: List[Dict[str, Any]],
         session_id: str = None
     ) -> List[Dict[str, Any]]:
-        """Generate new test cases based on the analysis."""
+        """
+        Generate new test cases based on the analysis.
+        
+        LLM generations run concurrently; new test case IDs are allocated
+        afterwards, as one reserved range, in the order the analysis listed the specs.
+        """
         new_test_cases = []
         
         if 'new_test_cases_needed' not in analysis_result:
             return new_test_cases
         
+        specs = []
         for new_case_spec in analysis_result['new_test_cases_needed']:
-            try:
-                test_case_type = new_case_spec.get('test_case_type', 'positive')
-                title = new_case_spec.get('title', f'New {test_case_type} test case')
-                priority = new_case_spec.get('priority', 'P3 - Medium')
-                
-                # Generate the test case using LLM
-                new_test_case = self.llm_client.generate_test_case(
-                    change_request, iw_overview, test_case_type, title, priority, existing_test_cases, session_id
-                )
-                
-                # Save the new test case
-                file_path = self.test_case_manager.create_new_test_case(new_test_case, test_case_type)
-                
-                # Add metadata for reporting
-                new_test_case['_file_path'] = file_path
-                new_test_case['_file_name'] = os.path.basename(file_path)
-                new_test_case['_test_case_type'] = test_case_type
-                new_test_case['_generated_for'] = title
-                
-                new_test_cases.append(new_test_case)
-                
-            except Exception as e:
-                print(f"Warning: Failed to generate new test case: {str(e)}")
-                continue
+            test_case_type = new_case_spec.get('test_case_type', 'positive')
+            title = new_case_spec.get('title', f'New {test_case_type} test case')
+            priority = new_case_spec.get('priority', 'P3 - Medium')
+            specs.append((test_case_type, title, priority))
+        
+        # Generate the test cases using the LLM
+        outcomes = self._run_llm_tasks([
+            partial(
+                self.llm_client.generate_test_case_async,
+                change_request, iw_overview, test_case_type, title, priority, existing_test_cases, session_id
+            )
+            for test_case_type, title, priority in specs
+        ])
+        
+        # Reserve the IDs of all generated test cases at once, in spec order
+        generated = sum(1 for _, error in outcomes if error is None)
+        test_case_ids = iter(self.test_case_manager.reserve_test_case_ids(generated) if generated else [])
+        
+        with self.test_case_manager.batch_writes():
+            for (test_case_type, title, _), (new_test_case, error) in zip(specs, outcomes):
+                try:
+                    if error is not None:
+                        raise error
+                    
+                    # Save the new test case
+                    file_path = self.test_case_manager.create_new_test_case(
+                        new_test_case, test_case_type, session_id=session_id, test_case_id=next(test_case_ids)
+                    )
+                    
+                    # Add metadata for reporting
+                    new_test_case['_file_path'] = file_path
+                    new_test_case['_file_name'] = os.path.basename(file_path)
+                    new_test_case['_test_case_type'] = test_case_type
+                    new_test_case['_generated_for'] = title
+                    
+                    new_test_cases.append(new_test_case)
+                    
+                except Exception as e:
+                    print(f"Warning: Failed to generate new test case: {str(e)}")
+                    continue
         
         return new_test_cases
     
-    def validate_all_test_cases(self) -> Dict[str, Any]:
-        """Validate all test cases against the schema."""
+    def _run_llm_tasks(self, tasks: List[Callable[[], Awaitable[Any]]]) -> List[Tuple[Any, Optional[Exception]]]:
+        """
+        Run independent async LLM tasks with at most Config.LLM_MAX_CONCURRENCY in flight.
+        
+        The tasks run on the shared LLM event loop; the calling thread waits for them.
+        
+        Args:
+            tasks: Zero-argument callables returning awaitables
+            
+        Returns:
+            One (result, error) pair per task, in task order
+        """
+        if not tasks:
+            return []
+        
+        async def run_all() -> List[Tuple[Any, Optional[Exception]]]:
+            semaphore = asyncio.Semaphore(max(1, self.config.LLM_MAX_CONCURRENCY))
+            
+            async def run(task: Callable[[], Awaitable[Any]]) -> Tuple[Any, Optional[Exception]]:
+                async with semaphore:
+                    try:
+                        return await task(), None
+                    except Exception as e:
+                        return None, e
+            
+            return await asyncio.gather(*(run(task) for task in tasks))
+        
+        return asyncio.run_coroutine_threadsafe(run_all(), self._llm_event_loop()).result()
+    
+    def _llm_event_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the shared LLM event loop, starting its thread on first use."""
+        with self._llm_loop_guard:
+            if self._llm_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-loop", daemon=True).start()
+                self._llm_loop = loop
+            return self._llm_loop
+    
+    def validate_all_test_cases(self, progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Validate all test cases against the schema.
+        
+        Args:
+            progress: Called as progress(done, total) while test case files are read
+        """
         validation_results = {
             'total_files': 0,
             'valid_files': 0,
@@ -252,18 +476,23 @@ class AITestCopilot:
         }
         
         try:
-            test_case_files = self.test_case_manager.list_test_cases()
+            # One scan of the corpus (changed files are read in parallel), then the
+            # compiled validator runs over that snapshot
+            test_case_files, test_cases, load_errors = self.test_case_manager.load_corpus(progress)
             validation_results['total_files'] = len(test_case_files)
             
+            schema_errors = self.test_case_manager.validate_test_cases(test_cases)
+            
             for file_name in test_case_files:
-                try:
-                    test_case = self.test_case_manager.load_test_case(file_name)
-                    if test_case:
-                        self.test_case_manager.validate_test_case(test_case)
-                        validation_results['valid_files'] += 1
-                except Exception as e:
-                    validation_results['invalid_files'].append(file_name)
-                    validation_results['errors'].append(f"{file_name}: {str(e)}")
+                if file_name in load_errors:
+                    error = f"Failed to load test case: {load_errors[file_name]}"
+                elif file_name in schema_errors:
+                    error = "Test case validation failed: " + "; ".join(schema_errors[file_name])
+                else:
+                    validation_results['valid_files'] += 1
+                    continue
+                validation_results['invalid_files'].append(file_name)
+                validation_results['errors'].append(f"{file_name}: {error}")
             
             return validation_results
             
@@ -278,7 +507,8 @@ class AITestCopilot:
             iw_overview_exists = os.path.exists(self.config.IW_OVERVIEW_PATH)
             schema_exists = os.path.exists(self.config.SCHEMA_PATH)
             
-            # Get semantic retriever stats
+            # Get semantic retriever stats, reusing a persisted index that is still current
+            self.semantic_retriever.load_if_current(self.test_case_manager.corpus_fingerprint())
             retriever_stats = self.semantic_retriever.get_stats()
             
             return {
@@ -325,12 +555,21 @@ class AITestCopilot:
         Returns:
             List of similar test cases with scores
         """
-        # Only fit if not already fitted
-        if not self.semantic_retriever._is_fitted:
-            all_test_cases = self.test_case_manager.load_all_test_cases()
-            self.semantic_retriever.fit(all_test_cases)
+        self._ensure_retriever_fitted()
         
-        results = self.semantic_retriever.retrieve_relevant(query)
+        with self._index_lock:
+            results = self.semantic_retriever.retrieve_relevant(query)
         if isinstance(results, list) and len(results) > n_results:
             return results[:n_results]
         return results
+    
+    def _ensure_retriever_fitted(self) -> None:
+        """Fit the retriever unless its persisted index matches the test case files."""
+        with self._index_lock:
+            fingerprint = self.test_case_manager.corpus_fingerprint()
+            if self.semantic_retriever.load_if_current(fingerprint):
+                return
+            
+            all_test_cases = self.test_case_manager.load_all_test_cases()
+            self.semantic_retriever.fit(all_test_cases, fingerprint)
+            self._index_behind = False
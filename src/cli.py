@@ -1,6 +1,7 @@
 import click
 import os
 import json
+import glob
 from colorama import init, Fore, Style
 from .ai_test_copilot import AITestCopilot
 from .config import Config
@@ -10,22 +11,73 @@ init()
 
 @click.group()
 @click.version_option(version="1.0.0")
-def cli():
+@click.option('--daemon-url', envvar='COPILOT_DAEMON_URL', default=None,
+              help='Send process/status/validate/search/metrics to a running `serve` daemon')
+@click.pass_context
+def cli(ctx, daemon_url):
     """AI Test Case Copilot - Automate test case updates and creation."""
-    pass
+    ctx.ensure_object(dict)
+    ctx.obj['daemon_url'] = daemon_url
+
+def _copilot(**kwargs):
+    """The copilot to run a command against: a daemon client if --daemon-url is set, else a local one."""
+    daemon_url = click.get_current_context().find_root().obj.get('daemon_url')
+    if daemon_url:
+        from .service import CopilotServiceClient
+        return CopilotServiceClient(daemon_url)
+    return AITestCopilot(**kwargs)
+
+def _batch_change_requests(batch: str) -> list:
+    """Expand a directory or glob pattern into sorted change request files."""
+    if os.path.isdir(batch):
+        batch = os.path.join(batch, "*.md")
+    return sorted(path for path in glob.glob(batch) if os.path.isfile(path))
 
 @cli.command()
-@click.option('--change-request', '-c', required=True, 
+@click.option('--change-request', '-c', 
               help='Path to the change request file')
+@click.option('--batch', '-b',
+              help='Directory (all *.md files) or glob of change requests to process in one run')
+@click.option('--concurrency', '-n', type=int, default=None,
+              help='Change requests processed at once in batch mode (default: BATCH_CONCURRENCY)')
 @click.option('--verbose', '-v', is_flag=True, 
               help='Enable verbose output')
-def process(change_request, verbose):
+@click.option('--no-cache', is_flag=True,
+              help='Always call the LLM instead of reusing cached responses (not with --daemon-url)')
+def process(change_request, batch, concurrency, verbose, no_cache):
     """Process a change request and update/create test cases."""
+    if bool(change_request) == bool(batch):
+        raise click.UsageError("Provide exactly one of --change-request or --batch")
+    if no_cache and click.get_current_context().find_root().obj.get('daemon_url'):
+        raise click.UsageError("--no-cache cannot be used with --daemon-url; "
+                               "start the daemon with LLM_CACHE_ENABLED=false instead")
+    
     try:
         if verbose:
             click.echo(f"{Fore.BLUE}Initializing AI Test Copilot...{Style.RESET_ALL}")
         
-        copilot = AITestCopilot()
+        copilot = _copilot(use_llm_cache=False if no_cache else None)
+        
+        if batch:
+            change_requests = _batch_change_requests(batch)
+            if not change_requests:
+                raise Exception(f"No change requests found for {batch}")
+            
+            click.echo(f"{Fore.BLUE}Processing {len(change_requests)} change requests...{Style.RESET_ALL}")
+            outcome = copilot.process_change_requests(change_requests, concurrency)
+            
+            failed = 0
+            for result in outcome['results']:
+                if result['status'] == 'success':
+                    click.echo(f"{Fore.GREEN}✓ {result['change_request']}: {result['report_path']}{Style.RESET_ALL}")
+                else:
+                    failed += 1
+                    click.echo(f"{Fore.RED}✗ {result['change_request']}: {result['error']}{Style.RESET_ALL}")
+            click.echo(f"{Fore.GREEN}Batch summary generated at: {outcome['summary_report']}{Style.RESET_ALL}")
+            
+            if failed:
+                raise Exception(f"{failed} of {len(change_requests)} change requests failed")
+            return
         
         if verbose:
             status = copilot.get_status()
@@ -60,7 +112,7 @@ def process(change_request, verbose):
 def status():
     """Show the current system status."""
     try:
-        copilot = AITestCopilot()
+        copilot = _copilot()
         status = copilot.get_status()
         
         click.echo(f"{Fore.CYAN}AI Test Copilot Status{Style.RESET_ALL}")
@@ -93,14 +145,19 @@ def status():
         click.echo(f"{Fore.RED}✗ Error getting status: {str(e)}{Style.RESET_ALL}")
         raise click.Abort()
 
+def _load_progress(done, total):
+    """Progress callback showing how many changed test case files were read."""
+    if total >= 1000 and (done % 1000 == 0 or done == total):
+        click.echo(f"\rLoading test cases: {done}/{total}", nl=(done == total), err=True)
+
 @cli.command()
 def validate():
     """Validate all existing test cases against the schema."""
     try:
-        copilot = AITestCopilot()
+        copilot = _copilot()
         
         click.echo(f"{Fore.BLUE}Validating test cases...{Style.RESET_ALL}")
-        results = copilot.validate_all_test_cases()
+        results = copilot.validate_all_test_cases(progress=_load_progress)
         
         click.echo(f"\n{Fore.CYAN}Validation Results{Style.RESET_ALL}")
         click.echo("=" * 20)
@@ -136,7 +193,7 @@ def list_cases(output):
         copilot = AITestCopilot()
         test_case_manager = copilot.test_case_manager
         
-        test_cases = test_case_manager.load_all_test_cases()
+        test_cases = test_case_manager.load_all_test_cases(progress=_load_progress)
         
         click.echo(f"{Fore.CYAN}Available Test Cases ({len(test_cases)}){Style.RESET_ALL}")
         click.echo("=" * 40)
@@ -202,28 +259,95 @@ def show_case(test_case_id):
         raise click.Abort()
 
 @cli.command()
-def metrics():
+@click.option('--latency', is_flag=True, help='Show per-stage latency percentiles')
+def metrics(latency):
     """Show observability metrics."""
     try:
-        copilot = AITestCopilot()
+        copilot = _copilot()
         metrics = copilot.get_metrics()
         
+        if latency:
+            click.echo(f"{Fore.CYAN}Stage Latency (seconds){Style.RESET_ALL}")
+            click.echo("=" * 62)
+            click.echo(f"{'Stage':<12}{'Count':>8}{'Mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'Max':>9}")
+            for stage, stats in metrics['latency'].items():
+                click.echo(f"{stage:<12}{stats['count']:>8}{stats['mean']:>9.3f}{stats['p50']:>9.3f}"
+                           f"{stats['p95']:>9.3f}{stats['p99']:>9.3f}{stats['max']:>9.3f}")
+            if not metrics['latency']:
+                click.echo("No timings recorded yet")
+            return
+        
         click.echo(f"{Fore.CYAN}AI Test Copilot Metrics{Style.RESET_ALL}")
         click.echo("=" * 30)
         click.echo(f"Total Requests: {metrics['total_requests']}")
         click.echo(f"Success Rate: {Fore.GREEN}{metrics['success_rate']}%{Style.RESET_ALL}")
-        click.echo(f"Total Tokens Used: {metrics['total_tokens_used']:,}")
+        click.echo(f"Total Tokens Used: {metrics['total_tokens_used']:,} "
+                   f"(prompt {metrics.get('total_prompt_tokens', 0):,} / completion {metrics.get('total_completion_tokens', 0):,})")
+        click.echo(f"Provider-Cached Prompt Tokens: {metrics.get('total_cached_prompt_tokens', 0):,} "
+                   f"({metrics.get('prompt_cache_hit_rate', 0)}% of prompt tokens)")
         click.echo(f"Total Cost: ${metrics['total_cost']:.4f}")
         click.echo(f"Average Response Time: {metrics['average_response_time']}s")
         click.echo(f"Test Cases Generated: {metrics['test_cases_generated']}")
         click.echo(f"Test Cases Updated: {metrics['test_cases_updated']}")
         click.echo(f"Schema Validation Failures: {Fore.RED}{metrics['schema_validation_failures']}{Style.RESET_ALL}")
         click.echo(f"Retry Attempts: {Fore.YELLOW}{metrics['retry_attempts']}{Style.RESET_ALL}")
+        click.echo(f"LLM Cache Hits: {metrics['llm_cache_hits']} / Misses: {metrics['llm_cache_misses']} "
+                   f"({metrics['llm_cache_hit_rate']}% hit rate)")
         
     except Exception as e:
         click.echo(f"{Fore.RED}✗ Error getting metrics: {str(e)}{Style.RESET_ALL}")
         raise click.Abort()
 
+@cli.command('metrics-server')
+@click.option('--host', default='127.0.0.1', help='Interface to listen on')
+@click.option('--port', '-p', default=9464, help='Port to listen on')
+def metrics_server(host, port):
+    """Serve metrics in OpenMetrics format for Prometheus scraping."""
+    # Standalone exporter: reads the metrics files, so no API key is needed
+    from .observability import ObservabilityManager
+    from .metrics_exporter import MetricsExporter, persisted_vector_stats
+    
+    try:
+        exporter = MetricsExporter(ObservabilityManager(), vector_stats=persisted_vector_stats,
+                                   host=host, port=port, reload_on_scrape=True)
+    except Exception as e:
+        click.echo(f"{Fore.RED}✗ Error starting metrics server: {str(e)}{Style.RESET_ALL}")
+        raise click.Abort()
+    
+    click.echo(f"{Fore.GREEN}✓ Serving metrics at {exporter.url}{Style.RESET_ALL}")
+    try:
+        exporter.serve_forever()
+    except KeyboardInterrupt:
+        click.echo("Stopping metrics server")
+    finally:
+        exporter.server.server_close()
+
+@cli.command()
+@click.option('--host', default='127.0.0.1', help='Interface to listen on')
+@click.option('--port', '-p', default=8765, help='Port to listen on')
+@click.option('--workers', '-w', type=int, default=None,
+              help='Change requests processed at once (default: BATCH_CONCURRENCY)')
+def serve(host, port, workers):
+    """Run a daemon that keeps the copilot warm and serves it over HTTP."""
+    from .service import CopilotService
+    
+    try:
+        copilot = AITestCopilot()
+        copilot._ensure_retriever_fitted()
+        service = CopilotService(copilot, host=host, port=port, workers=workers)
+    except Exception as e:
+        click.echo(f"{Fore.RED}✗ Error starting daemon: {str(e)}{Style.RESET_ALL}")
+        raise click.Abort()
+    
+    click.echo(f"{Fore.GREEN}✓ Copilot daemon listening at {service.url} ({service.workers} workers){Style.RESET_ALL}")
+    click.echo(f"Use it with: python main.py --daemon-url {service.url} <command>")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        click.echo("Stopping daemon")
+    finally:
+        service.stop()
+
 @cli.command()
 @click.option('--limit', '-l', default=5, help='Number of recent sessions to show')
 def sessions(limit):
@@ -241,7 +365,8 @@ def sessions(limit):
             click.echo(f"  Status: {status_color}{session.get('status', 'Unknown')}{Style.RESET_ALL}")
             click.echo(f"  Start: {session.get('start_time', 'Unknown')}")
             click.echo(f"  End: {session.get('end_time', 'Running...')}")
-            click.echo(f"  Tokens: {session.get('tokens_used', 0):,}")
+            click.echo(f"  Tokens: {session.get('tokens_used', 0):,} "
+                       f"(prompt {session.get('prompt_tokens', 0):,} / completion {session.get('completion_tokens', 0):,})")
             click.echo(f"  Cost: ${session.get('cost', 0):.4f}")
             click.echo(f"  Generated: {session.get('test_cases_generated', 0)}")
             click.echo(f"  Updated: {session.get('test_cases_updated', 0)}")
@@ -259,7 +384,7 @@ def sessions(limit):
 def search(query, limit):
     """Search for test cases using semantic similarity."""
     try:
-        copilot = AITestCopilot()
+        copilot = _copilot()
         
         click.echo(f"{Fore.BLUE}Searching for: '{query}'{Style.RESET_ALL}")
         results = copilot.search_test_cases(query, limit)
@@ -298,6 +423,9 @@ def vector_stats():
         click.echo(f"Total Test Cases: {stats.get('total_test_cases', 0)}")
         click.echo(f"Is Fitted: {'✓' if stats.get('is_fitted', False) else '✗'}")
         click.echo(f"K (Results): {stats.get('k', 5)}")
+        click.echo(f"Index Type: {stats.get('index_type', 'Unknown')} (configured: {stats.get('configured_index_type', 'Unknown')})")
+        click.echo(f"Is Trained: {'✓' if stats.get('is_trained', False) else '✗'}")
+        click.echo(f"Index Size: {stats.get('index_size', 0)} vectors, ~{stats.get('index_memory_bytes', 0) / 1024 / 1024:.2f} MB")
         
         if 'collection_name' in stats:
             click.echo(f"Collection: {stats['collection_name']}")
@@ -327,6 +455,58 @@ def reset_vectors():
         click.echo(f"{Fore.RED}✗ Error resetting vector store: {str(e)}{Style.RESET_ALL}")
         raise click.Abort()
 
+@cli.command('pack-corpus')
+@click.option('--source', '-s', default=None, help='Directory of test case JSON files (default: TEST_CASES_DIR)')
+@click.option('--db', '-d', required=True, help='SQLite corpus file to create or extend')
+def pack_corpus(source, db):
+    """Pack per-file test cases into a single SQLite corpus."""
+    from .packed_corpus import import_directory
+    
+    try:
+        count = import_directory(source or Config.TEST_CASES_DIR, db, progress=_load_progress)
+        click.echo(f"{Fore.GREEN}✓ Packed {count} test cases into {db}{Style.RESET_ALL}")
+        click.echo(f"Use it with: TEST_CASES_STORE={db}")
+    except Exception as e:
+        click.echo(f"{Fore.RED}✗ Error packing corpus: {str(e)}{Style.RESET_ALL}")
+        raise click.Abort()
+
+@cli.command()
+@click.argument('session_id', required=False)
+def rollback(session_id):
+    """Undo the test case changes of a processing session (ID or unique prefix, as shown by `sessions`)."""
+    from .test_case_manager import TestCaseManager
+    
+    try:
+        manager = TestCaseManager(Config.TEST_CASES_STORE or None)
+        if not session_id:
+            sessions = manager.journal.sessions()
+            click.echo(f"{Fore.CYAN}Sessions that can be rolled back ({len(sessions)}){Style.RESET_ALL}")
+            for journaled in sessions:
+                click.echo(f"  {journaled}")
+            return
+        
+        restored = manager.rollback(session_id)
+        click.echo(f"{Fore.GREEN}✓ Rolled back {len(restored)} test cases{Style.RESET_ALL}")
+        for file_name in restored:
+            click.echo(f"  {file_name}")
+    except Exception as e:
+        click.echo(f"{Fore.RED}✗ Error rolling back session: {str(e)}{Style.RESET_ALL}")
+        raise click.Abort()
+
+@cli.command('unpack-corpus')
+@click.option('--db', '-d', required=True, help='SQLite corpus file')
+@click.option('--target', '-t', default=None, help='Directory to write test case JSON files to (default: TEST_CASES_DIR)')
+def unpack_corpus(db, target):
+    """Export a packed SQLite corpus back to one JSON file per test case."""
+    from .packed_corpus import export_directory
+    
+    try:
+        count = export_directory(db, target or Config.TEST_CASES_DIR)
+        click.echo(f"{Fore.GREEN}✓ Exported {count} test cases to {target or Config.TEST_CASES_DIR}{Style.RESET_ALL}")
+    except Exception as e:
+        click.echo(f"{Fore.RED}✗ Error unpacking corpus: {str(e)}{Style.RESET_ALL}")
+        raise click.Abort()
+
 @cli.command()
 def setup():
     """Show setup instructions."""
@@ -13,12 +13,36 @@ class Config:
     # File paths
     IW_OVERVIEW_PATH = "IW_OVERVIEW.md"
     TEST_CASES_DIR = "test_cases"
+    TEST_CASES_STORE = os.getenv("TEST_CASES_STORE", "")  # Packed SQLite corpus file; empty uses TEST_CASES_DIR
+    TEST_CASE_LOAD_WORKERS = int(os.getenv("TEST_CASE_LOAD_WORKERS", "8"))  # Threads reading test case files
     SCHEMA_PATH = "schema/test_case.schema.json"
     REPORTS_DIR = "reports"
+    JOURNAL_DIR = os.getenv("JOURNAL_DIR", "journal")  # Per-session before-images of test case writes, for rollback
     
     # LLM settings
     MAX_TOKENS = 4000
     TEMPERATURE = 0.1
+    PROMPT_TEST_CASES_TOKEN_BUDGET = int(os.getenv("PROMPT_TEST_CASES_TOKEN_BUDGET", "6000"))  # Existing test cases per prompt; 0 disables
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))  # Max LLM calls in flight per request
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "2"))  # Change requests processed at once in batch mode
+    LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))  # 0 disables the limit
+    LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "300000"))  # Prompt + max completion tokens; 0 disables
+    
+    # LLM response cache settings
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache/responses.sqlite")
+    LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168"))  # 0 disables expiry
+    LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "100"))
+    
+    # Metrics retention settings; older sessions are rolled up into hourly/daily aggregates
+    METRICS_SESSION_RETENTION = int(os.getenv("METRICS_SESSION_RETENTION", "1000"))
+    METRICS_SESSION_MAX_AGE_DAYS = float(os.getenv("METRICS_SESSION_MAX_AGE_DAYS", "30"))
+    
+    # Vector index settings
+    FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "Flat")  # e.g. Flat, IVF1024,Flat, HNSW32, IVF,PQ
+    FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+    FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+    FAISS_TRAINING_SAMPLE_SIZE = int(os.getenv("FAISS_TRAINING_SAMPLE_SIZE", "50000"))
     
     # Test case generation settings
     MIN_NEW_TEST_CASES = 3  # positive, negative, edge
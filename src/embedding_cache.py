@@ -0,0 +1,197 @@
+"""
+Embedding Cache
+Persistent content-hash cache of embedding vectors stored as .npy sidecars.
+"""
+
+import os
+import hashlib
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Any
+from .embeddings import Embedder
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of embeddings.
+
+    Keys are hashes of the embedder version and the text, so a changed text
+    or a changed embedder is always a miss. Entries are stored as one
+    key-sorted array of (key, vector) records, so lookups are a single
+    vectorized ``np.searchsorted``, the file is opened with mmap instead of
+    being read eagerly, and one ``os.replace`` swaps keys and vectors together.
+
+    New entries are appended to a pending sidecar of (key, vector) records,
+    looked up through an in-memory key index, instead of rewriting the sorted
+    file. They are merged into the sorted file on a pruning (full corpus)
+    pass, or once they outnumber the sorted entries, so merging stays
+    amortized constant per entry.
+    """
+
+    KEY_DTYPE = 'S32'
+    MERGE_MIN_PENDING = 1024
+
+    def __init__(self, cache_dir: str, embedder: Embedder):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            cache_dir: Directory holding the cache sidecar files
+            embedder: Embedder whose vectors are cached
+        """
+        self.cache_dir = Path(cache_dir)
+        self.embedder = embedder
+        self.records_file = self.cache_dir / "embedding_cache_records.npy"
+        self.pending_file = self.cache_dir / "embedding_cache_pending.bin"
+        self.record_dtype = np.dtype([('key', self.KEY_DTYPE), ('vector', '<f4', (embedder.dimension,))])
+        # Earlier layout: keys and vectors in two files, replaced one after the other
+        self.legacy_files = [self.cache_dir / "embedding_cache_keys.npy", self.cache_dir / "embedding_cache.npy"]
+
+        self.keys = np.zeros(0, dtype=self.KEY_DTYPE)
+        self.vectors = np.zeros((0, embedder.dimension), dtype=np.float32)
+        self._pending: Dict[bytes, np.ndarray] = {}  # Key -> vector of entries not merged yet
+        self.hits = 0
+        self.misses = 0
+
+        self._load()
+
+    def _load(self) -> None:
+        """Load the cache sidecars if they exist and match the embedder."""
+        if self.records_file.exists():
+            try:
+                records = np.load(self.records_file, mmap_mode='r')
+                if records.dtype == self.record_dtype:
+                    self.keys, self.vectors = records['key'], records['vector']
+            except Exception as e:
+                print(f"Warning: Could not load embedding cache: {e}")
+
+        if self.pending_file.exists():
+            try:
+                # A torn last record (interrupted append) is ignored
+                count = self.pending_file.stat().st_size // self.record_dtype.itemsize
+                records = np.fromfile(self.pending_file, dtype=self.record_dtype, count=count)
+                self._pending = {bytes(key): vector for key, vector in zip(records['key'], records['vector'])}
+            except Exception as e:
+                print(f"Warning: Could not load pending embedding cache entries: {e}")
+
+    def key_for(self, text: str) -> bytes:
+        """Compute the cache key of a text for the current embedder."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.embedder.version.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8'))
+        return digest.hexdigest().encode('ascii')
+
+    def _lookup(self, keys: np.ndarray) -> np.ndarray:
+        """Return the cache row of every key, or -1 for misses."""
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        if len(self.keys) == 0 or len(keys) == 0:
+            return rows
+
+        positions = np.searchsorted(self.keys, keys)
+        in_range = positions < len(self.keys)
+        found = in_range.copy()
+        found[in_range] = self.keys[positions[in_range]] == keys[in_range]
+        rows[found] = positions[found]
+        return rows
+
+    def embed_batch(self, texts: List[str], prune: bool = False) -> np.ndarray:
+        """
+        Embed texts, computing only the ones that are not cached.
+
+        Args:
+            texts: Input texts
+            prune: Drop cached entries not referenced by ``texts`` (use when
+                ``texts`` is the whole corpus)
+
+        Returns:
+            float32 matrix of shape (len(texts), dimension)
+        """
+        keys = np.array([self.key_for(text) for text in texts], dtype=self.KEY_DTYPE)
+        rows = self._lookup(keys)
+        missing = np.flatnonzero(rows < 0)
+
+        embeddings = np.empty((len(texts), self.embedder.dimension), dtype=np.float32)
+        cached = rows >= 0
+        if cached.any():
+            embeddings[cached] = self.vectors[rows[cached]]
+        if len(missing) and self._pending:
+            pending = [self._pending.get(bytes(keys[i])) for i in missing]
+            for i, vector in zip(missing, pending):
+                if vector is not None:
+                    embeddings[i] = vector
+            missing = np.array([i for i, vector in zip(missing, pending) if vector is None], dtype=np.int64)
+        if len(missing):
+            embeddings[missing] = self.embedder.embed_batch([texts[i] for i in missing])
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if prune:
+            # The texts are the whole corpus: merge, dropping entries it no longer uses
+            stale = len(np.unique(rows[cached])) < len(self.keys)
+            if len(missing) or self._pending or stale:
+                self._store(keys, embeddings)
+        elif len(missing):
+            self._append(keys[missing], embeddings[missing])
+
+        return embeddings
+
+    def _append(self, keys: np.ndarray, vectors: np.ndarray) -> None:
+        """Append new entries to the pending sidecar, merging once they outnumber the sorted entries."""
+        records = np.empty(len(keys), dtype=self.record_dtype)
+        records['key'] = keys
+        records['vector'] = vectors
+        try:
+            self.cache_dir.mkdir(exist_ok=True)
+            with open(self.pending_file, 'ab') as f:
+                records.tofile(f)
+        except Exception as e:
+            print(f"Warning: Could not save embedding cache: {e}")
+        self._pending.update((bytes(key), vector) for key, vector in zip(records['key'], records['vector']))
+
+        if len(self._pending) > max(self.MERGE_MIN_PENDING, len(self.keys)):
+            self._store(
+                np.concatenate([self.keys, np.array(list(self._pending), dtype=self.KEY_DTYPE)]),
+                np.concatenate([np.asarray(self.vectors), np.array(list(self._pending.values()), dtype=np.float32)])
+            )
+
+    def _store(self, keys: np.ndarray, vectors: np.ndarray) -> None:
+        """Persist deduplicated, key-sorted entries in place of all others and remap the records file."""
+        keys, first = np.unique(keys, return_index=True)
+        records = np.empty(len(keys), dtype=self.record_dtype)
+        records['key'] = keys
+        records['vector'] = vectors[first]
+
+        try:
+            self.cache_dir.mkdir(exist_ok=True)
+            tmp_path = self.records_file.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                np.save(f, records)
+            os.replace(tmp_path, self.records_file)
+            # Pending entries are merged; a leftover sidecar after a crash only holds duplicates
+            for path in [self.pending_file] + self.legacy_files:
+                if path.exists():
+                    path.unlink()
+            records = np.load(self.records_file, mmap_mode='r')
+        except Exception as e:
+            print(f"Warning: Could not save embedding cache: {e}")
+        self.keys, self.vectors = records['key'], records['vector']
+        self._pending = {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {
+            'embedding_cache_entries': len(self.keys) + len(self._pending),
+            'embedding_cache_hits': self.hits,
+            'embedding_cache_misses': self.misses
+        }
+
+    def clear(self) -> None:
+        """Remove all cached embeddings."""
+        self.keys = np.zeros(0, dtype=self.KEY_DTYPE)
+        self.vectors = np.zeros((0, self.embedder.dimension), dtype=np.float32)
+        self._pending = {}
+        for path in [self.records_file, self.pending_file] + self.legacy_files:
+            if path.exists():
+                path.unlink()
@@ -0,0 +1,161 @@
+"""
+Text Embedders
+Deterministic batch embedders used by the FAISS vector database.
+"""
+
+import re
+import hashlib
+import numpy as np
+from typing import List, Dict, Tuple
+
+
+class Embedder:
+    """Base class for batch text embedders."""
+
+    dimension: int = 0
+    version: str = "base"
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a batch of texts.
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            float32 matrix of shape (len(texts), dimension) with L2-normalized rows
+        """
+        raise NotImplementedError
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed a single text."""
+        return self.embed_batch([text])[0]
+
+
+class HashingEmbedder(Embedder):
+    """
+    Hashing-trick embedder with a stable, seeded token hash.
+
+    Unlike the builtin ``hash()``, the bucket of a token does not depend on
+    the process, so vectors persisted to disk stay comparable with query
+    vectors computed after a restart.
+    """
+
+    # Tokens are whitespace separated words with non-alphanumerics removed
+    _NON_ALNUM = re.compile(r'[^\w\s]|_')
+
+    def __init__(self, dimension: int = 384, seed: int = 0, positional_words: int = 10,
+                 batch_size: int = 4096):
+        """
+        Initialize the hashing embedder.
+
+        Args:
+            dimension: Dimension of the embedding vectors
+            seed: Hash seed; changing it changes every vector
+            positional_words: Number of leading distinct words that get a positional feature
+            batch_size: Number of texts scattered into one dense block at a time
+        """
+        self.dimension = dimension
+        self.seed = seed
+        self.positional_words = positional_words
+        self.batch_size = batch_size
+        self.version = f"hashing-blake2b-v1-d{dimension}-s{seed}-p{positional_words}"
+
+        self._key = seed.to_bytes(8, 'little', signed=False)
+        self._bucket_cache: Dict[str, int] = {}
+
+    def _bucket(self, token: str) -> int:
+        """Map a token to a dimension using a seeded blake2b hash."""
+        bucket = self._bucket_cache.get(token)
+        if bucket is None:
+            digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8, key=self._key).digest()
+            bucket = int.from_bytes(digest, 'little') % self.dimension
+            if len(self._bucket_cache) >= 1_000_000:
+                self._bucket_cache.clear()
+            self._bucket_cache[token] = bucket
+        return bucket
+
+    def tokenize(self, text: str) -> List[str]:
+        """Lowercase, strip non-alphanumerics and drop very short words."""
+        words = self._NON_ALNUM.sub('', text.lower()).split()
+        return [word for word in words if len(word) > 2]  # Skip very short words
+
+    def _tokenize_corpus(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        Tokenize all texts into flat arrays.
+
+        Returns:
+            Row of every token, vocabulary id of every token, and the vocabulary
+        """
+        vocab: Dict[str, int] = {}
+        flat_ids: List[int] = []
+        lengths = np.zeros(len(texts), dtype=np.int64)
+        for row, text in enumerate(texts):
+            tokens = self.tokenize(text or '')
+            lengths[row] = len(tokens)
+            flat_ids.extend([vocab.setdefault(token, len(vocab)) for token in tokens])
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        return rows, np.array(flat_ids, dtype=np.int64), list(vocab)
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a batch of texts.
+
+        Tokenization is the only per-text Python work; bucket lookups are done
+        once per distinct token and all features are scatter-added with a
+        single ``np.bincount`` per block.
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            float32 matrix of shape (len(texts), dimension) with L2-normalized rows
+        """
+        if len(texts) == 0:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        blocks = [
+            self._embed_block(texts[start:start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        return blocks[0] if len(blocks) == 1 else np.vstack(blocks)
+
+    def _embed_block(self, texts: List[str]) -> np.ndarray:
+        """Embed one block of texts."""
+        n_rows = len(texts)
+        dim = self.dimension
+        rows, inverse, vocab = self._tokenize_corpus(texts)
+
+        if not vocab:
+            return np.zeros((n_rows, dim), dtype=np.float32)
+
+        # Hash each distinct token once for the whole block
+        vocab_buckets = np.fromiter((self._bucket(t) for t in vocab), dtype=np.int64, count=len(vocab))
+
+        # Term frequency features: every occurrence adds 1 to its bucket
+        flat_index = rows * dim + vocab_buckets[inverse]
+
+        # Positional features for the first distinct words of every text
+        pair_keys = rows * len(vocab) + inverse
+        _, first_positions = np.unique(pair_keys, return_index=True)
+        first_positions.sort()
+        first_rows = rows[first_positions]
+        row_starts = np.searchsorted(first_rows, first_rows, side='left')
+        ranks = np.arange(len(first_positions), dtype=np.int64) - row_starts
+        keep = ranks < self.positional_words
+        first_positions, first_rows, ranks = first_positions[keep], first_rows[keep], ranks[keep]
+
+        pos_buckets = np.fromiter(
+            (self._bucket(f"{vocab[v]}{r}") for v, r in zip(inverse[first_positions], ranks)),
+            dtype=np.int64, count=len(first_positions)
+        )
+
+        index = np.concatenate([flat_index, first_rows * dim + pos_buckets])
+        weights = np.concatenate([np.ones(len(flat_index)), 1.0 / (ranks + 1)])
+        embeddings = np.bincount(index, weights=weights, minlength=n_rows * dim).reshape(n_rows, dim)
+
+        # Normalize the embeddings
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+
+        return embeddings.astype(np.float32)
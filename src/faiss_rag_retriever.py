@@ -13,7 +13,7 @@ from .config import Config
 class FAISSRAGRetriever:
     """FAISS-based RAG retriever for high-performance semantic search."""
     
-    def __init__(self, k: int = 3, db_path: str = "faiss_db", dimension: int = 384):
+    def __init__(self, k: int = 3, db_path: str = "faiss_db", dimension: int = 384, index_type: Optional[str] = None):
         """
         Initialize the FAISS RAG retriever.
         
@@ -21,48 +21,102 @@ class FAISSRAGRetriever:
             k: Number of top relevant test cases to retrieve
             db_path: Path to store the FAISS database
             dimension: Dimension of the embedding vectors
+            index_type: FAISS index factory string (defaults to Config.FAISS_INDEX_TYPE)
         """
         self.k = k
-        self.vector_db = FAISSVectorDB(db_path, dimension)
+        self.vector_db = FAISSVectorDB(
+            db_path,
+            dimension,
+            index_type=index_type or Config.FAISS_INDEX_TYPE,
+            nprobe=Config.FAISS_NPROBE,
+            ef_search=Config.FAISS_EF_SEARCH,
+            training_sample_size=Config.FAISS_TRAINING_SAMPLE_SIZE
+        )
         self.test_cases = []
         self._is_fitted = False
         
         print("✓ Using FAISS Vector Database for semantic retrieval")
     
-    def fit(self, test_cases: List[Dict[str, Any]]) -> None:
+    def fit(self, test_cases: List[Dict[str, Any]], fingerprint: Optional[str] = None) -> None:
         """
         Fit the retriever on a collection of test cases.
         
         Args:
             test_cases: List of test case dictionaries
+            fingerprint: Fingerprint of the corpus the test cases were loaded from;
+                recorded so later runs can reuse the persisted index
         """
-        self.test_cases = test_cases
+        self.test_cases = list(test_cases)
         
         # Convert test cases to documents for vector database
-        documents = []
-        for i, tc in enumerate(test_cases):
-            # Extract text content
-            text_content = self._extract_text_content(tc)
-            
-            # Create document for vector database
-            doc = {
-                'text': text_content,
-                'metadata': {
-                    'file_name': tc.get('_file_name', f'tc_{i+1:03d}.json'),
-                    'title': tc.get('title', ''),
-                    'type': tc.get('type', ''),
-                    'priority': tc.get('priority', ''),
-                    'original_test_case': tc
-                }
-            }
-            documents.append(doc)
+        documents = [self._to_document(tc, i) for i, tc in enumerate(test_cases)]
         
         # Add to FAISS database
         self.vector_db.add_documents(documents)
+        if fingerprint:
+            self.vector_db.set_corpus_fingerprint(fingerprint)
         self._is_fitted = True
         
         print(f"✓ Fitted FAISS retriever with {len(test_cases)} test cases")
     
+    def load_if_current(self, fingerprint: str) -> bool:
+        """
+        Serve queries from the persisted index if it was built from this corpus.
+        
+        Args:
+            fingerprint: Fingerprint of the current test case corpus
+            
+        Returns:
+            True if the retriever is ready without refitting
+        """
+        if not fingerprint or self.vector_db.corpus_fingerprint != fingerprint:
+            return False
+        
+        if not self._is_fitted:
+            self._is_fitted = True
+            print(f"✓ Reusing persisted FAISS index with {len(self.vector_db.metadata)} test cases")
+        return True
+    
+    def mark_current(self, fingerprint: str) -> None:
+        """
+        Record that the index reflects the corpus with the given fingerprint.
+        
+        Call after upserting the test cases that were just written to disk.
+        
+        Args:
+            fingerprint: Fingerprint of the current test case corpus
+        """
+        self.vector_db.set_corpus_fingerprint(fingerprint)
+    
+    def upsert_test_cases(self, test_cases: List[Dict[str, Any]]) -> None:
+        """
+        Insert or replace test cases in the vector store without refitting.
+        
+        Test cases are keyed by their '_file_name'.
+        
+        Args:
+            test_cases: List of new or updated test case dictionaries
+        """
+        if not test_cases:
+            return
+        
+        offset = len(self.test_cases)
+        documents = [self._to_document(tc, offset + i) for i, tc in enumerate(test_cases)]
+        self.vector_db.upsert(documents)
+        
+        # Keep the in-memory collection in sync
+        positions = {tc.get('_file_name'): i for i, tc in enumerate(self.test_cases)}
+        for doc in documents:
+            tc = doc['metadata']['original_test_case']
+            position = positions.get(doc['id'])
+            if position is None:
+                positions[doc['id']] = len(self.test_cases)
+                self.test_cases.append(tc)
+            else:
+                self.test_cases[position] = tc
+        
+        self._is_fitted = True
+    
     def retrieve_relevant(self, query: str) -> List[Dict[str, Any]]:
         """
         Retrieve the most relevant test cases for a given query.
@@ -73,21 +127,62 @@ class FAISSRAGRetriever:
         Returns:
             List of most relevant test cases with relevance scores
         """
+        return self.retrieve_relevant_batch([query])[0]
+    
+    def retrieve_relevant_batch(self, queries: List[str]) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieve the most relevant test cases for many queries at once.
+        
+        All queries are embedded into one matrix and searched with a single
+        FAISS call.
+        
+        Args:
+            queries: Search queries (e.g., change requests or requirement paragraphs)
+            
+        Returns:
+            One list of relevant test cases with relevance scores per query
+        """
         if not self._is_fitted:
             raise Exception("Retriever must be fitted before retrieving")
         
         # Search in FAISS database
-        results = self.vector_db.search(query, top_k=self.k)
+        batch_results = self.vector_db.search_batch(queries, top_k=self.k)
         
         # Convert back to test case format
-        relevant_cases = []
-        for result in results:
-            test_case = result['metadata']['original_test_case'].copy()
-            test_case['_relevance_score'] = result['similarity_score']
-            test_case['_distance'] = result['distance']
-            relevant_cases.append(test_case)
-        
-        return relevant_cases
+        batch_cases = []
+        for results in batch_results:
+            relevant_cases = []
+            for result in results:
+                test_case = result['metadata']['original_test_case'].copy()
+                test_case['_relevance_score'] = result['similarity_score']
+                test_case['_distance'] = result['distance']
+                relevant_cases.append(test_case)
+            batch_cases.append(relevant_cases)
+        
+        return batch_cases
+    
+    def _to_document(self, test_case: Dict[str, Any], position: int) -> Dict[str, Any]:
+        """Convert a test case to a vector database document keyed by its file name."""
+        file_name = test_case.get('_file_name', f'tc_{position+1:03d}.json')
+        if '_file_name' not in test_case:
+            test_case = {**test_case, '_file_name': file_name}
+        
+        return {
+            'id': file_name,
+            'text': self._extract_text_content(test_case),
+            'metadata': {
+                'file_name': file_name,
+                'title': test_case.get('title', ''),
+                'type': test_case.get('type', ''),
+                'priority': test_case.get('priority', ''),
+                'original_test_case': test_case
+            }
+        }
+    
+    @staticmethod
+    def _file_name_for(test_case_id: str) -> str:
+        """Normalize a test case ID ("tc_001" or "tc_001.json") to its file name."""
+        return test_case_id if test_case_id.endswith('.json') else f"{test_case_id}.json"
     
     def _extract_text_content(self, test_case: Dict[str, Any]) -> str:
         """Extract all text content from a test case for vectorization."""
@@ -126,9 +221,8 @@ class FAISSRAGRetriever:
         Returns:
             True if successful, False otherwise
         """
-        # FAISS doesn't support direct updates, so we refit the entire collection
-        print("Warning: FAISS doesn't support direct updates. Refitting entire collection...")
-        self.fit(self.test_cases)
+        file_name = self._file_name_for(test_case_id)
+        self.upsert_test_cases([{**updated_test_case, '_file_name': file_name}])
         return True
     
     def delete_test_case(self, test_case_id: str) -> bool:
@@ -141,10 +235,10 @@ class FAISSRAGRetriever:
         Returns:
             True if successful, False otherwise
         """
-        # FAISS doesn't support direct deletion, so we refit the entire collection
-        print("Warning: FAISS doesn't support direct deletion. Refitting entire collection...")
-        self.fit(self.test_cases)
-        return True
+        file_name = self._file_name_for(test_case_id)
+        removed = self.vector_db.delete([file_name]) > 0
+        self.test_cases = [tc for tc in self.test_cases if tc.get('_file_name') != file_name]
+        return removed
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -156,7 +250,7 @@ class FAISSRAGRetriever:
         stats = {
             'k': self.k,
             'is_fitted': self._is_fitted,
-            'total_test_cases': len(self.test_cases),
+            'total_test_cases': len(self.vector_db.metadata),
             'retriever_type': 'FAISS'
         }
         
@@ -7,86 +7,407 @@ import faiss
 import numpy as np
 import json
 import os
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 from pathlib import Path
 import pickle
+import hashlib
+import math
+from .embeddings import Embedder, HashingEmbedder
+from .embedding_cache import EmbeddingCache
+from .metadata_store import MetadataStore
 
 
 class FAISSVectorDB:
     """FAISS-based vector database for high-performance similarity search."""
     
-    def __init__(self, db_path: str = "faiss_db", dimension: int = 384):
+    # Bump when the on-disk layout changes so old databases are rebuilt
+    FORMAT_VERSION = 4
+    
+    # Upserts and deletes are appended to a delta log next to the saved index;
+    # the index is rewritten once the log exceeds this share of it (and a minimum)
+    DELTA_MAX_FRACTION = 0.25
+    DELTA_MIN_RECORDS = 1024
+    
+    def __init__(
+        self,
+        db_path: str = "faiss_db",
+        dimension: int = 384,
+        embedder: Optional[Embedder] = None,
+        index_type: str = "Flat",
+        nprobe: int = 16,
+        ef_search: int = 64,
+        training_sample_size: int = 50000
+    ):
         """
         Initialize the FAISS vector database.
         
         Args:
             db_path: Path to store the database files
             dimension: Dimension of the embedding vectors (384 is common for sentence transformers)
+            embedder: Batch embedder to use (defaults to a stable HashingEmbedder)
+            index_type: FAISS index factory string, e.g. "Flat", "IVF1024,Flat", "HNSW32" or "IVF,PQ".
+                A bare "IVF" or "PQ" is sized automatically from the corpus.
+            nprobe: Number of inverted lists visited per query (IVF indexes)
+            ef_search: Size of the dynamic candidate list per query (HNSW indexes)
+            training_sample_size: Maximum number of vectors used to train the index
         """
         self.db_path = Path(db_path)
         self.db_path.mkdir(exist_ok=True)
-        self.dimension = dimension
+        self.embedder = embedder or HashingEmbedder(dimension)
+        self.dimension = self.embedder.dimension
+        self.embedding_cache = EmbeddingCache(db_path, self.embedder)
         
-        # File paths
-        self.index_file = self.db_path / "faiss_index.bin"
-        self.metadata_file = self.db_path / "metadata.json"
-        self.ids_file = self.db_path / "ids.json"
+        # Index settings; index_spec is the factory string the current index was actually built with
+        self.index_type = index_type
+        self.index_spec = index_type
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.training_sample_size = training_sample_size
         
-        # FAISS index
+        # File paths. The index is saved as numbered generations, each with a delta
+        # log of later changes; the info file names the current generation.
+        self.info_file = self.db_path / "index_info.json"
+        self.index_generation = 0
+        self.index_file, self.delta_file = self._generation_files(self.index_generation)
+        self.delta_dtype = np.dtype([('faiss_id', '<i8'), ('vector', '<f4', (self.dimension,))])
+        self._delta_records = 0
+        # Legacy files: JSON metadata superseded by the metadata store, and the unversioned index
+        self.legacy_files = [self.db_path / "metadata.json", self.db_path / "ids.json", self.db_path / "faiss_index.bin"]
+        
+        # FAISS index; vectors are keyed by a stable 63-bit hash of the document ID,
+        # and documents (including their ID) live in the offset-indexed metadata store
         self.index = None
-        self.metadata = []
-        self.ids = []
+        self.metadata = MetadataStore(db_path)
+        
+        # Index types without removal support (e.g. HNSW) keep removed vectors in
+        # the index until the next generation is written; their positions are tombstoned
+        self._tombstones = set()
+        self._labels = None  # Cached ID map of the wrapped index, by position
+        
+        # Fingerprint of the source corpus the index was built from, if known.
+        # Any mutation that doesn't supply a new one clears it.
+        self.corpus_fingerprint: Optional[str] = None
         
         self._load_database()
     
     def _load_database(self):
         """Load existing database if it exists."""
         try:
-            if self.index_file.exists():
-                self.index = faiss.read_index(str(self.index_file))
-                print(f"✓ Loaded FAISS index with {self.index.ntotal} vectors")
+            info = self._read_info()
+            self.index_generation = info.get('index_generation', 0)
+            self.index_file, self.delta_file = self._generation_files(self.index_generation)
             
-            if self.metadata_file.exists():
-                with open(self.metadata_file, 'r') as f:
-                    self.metadata = json.load(f)
-                print(f"✓ Loaded {len(self.metadata)} metadata entries")
+            if self.index_file.exists() and not self._is_compatible():
+                print("Warning: Existing FAISS index was built with a different embedder, format or index type. Starting fresh.")
+                self._create_new_index()
+                return
             
-            if self.ids_file.exists():
-                with open(self.ids_file, 'r') as f:
-                    self.ids = json.load(f)
-                print(f"✓ Loaded {len(self.ids)} IDs")
+            if self.index_file.exists():
+                self.index = faiss.read_index(str(self.index_file))
+                self.index_spec = info.get('index_spec', self.index_type)
+                self.corpus_fingerprint = info.get('corpus_fingerprint')
+                self._apply_search_params()
+                self._replay_delta()
+                print(f"✓ Loaded FAISS index ({self.index_spec}) with {self.index.ntotal} vectors")
+                print(f"✓ Opened metadata store with {len(self.metadata)} entries")
+            else:
+                self._create_new_index()
                 
         except Exception as e:
             print(f"Warning: Could not load existing database: {e}")
             self._create_new_index()
     
+    def _read_info(self) -> Dict[str, Any]:
+        """Read the persisted index metadata."""
+        if not self.info_file.exists():
+            return {}
+        with open(self.info_file, 'r') as f:
+            return json.load(f)
+    
+    def _is_compatible(self) -> bool:
+        """Check that the persisted index was built with the current embedder and index type."""
+        info = self._read_info()
+        return (
+            info.get('format') == self.FORMAT_VERSION
+            and info.get('embedder') == self.embedder.version
+            and info.get('dimension') == self.dimension
+            and info.get('index_type') == self.index_type
+        )
+    
     def _create_new_index(self):
         """Create a new FAISS index."""
-        # Use IndexFlatIP for inner product (cosine similarity with normalized vectors)
-        self.index = faiss.IndexFlatIP(self.dimension)
-        self.metadata = []
-        self.ids = []
-        print("✓ Created new FAISS index")
-    
-    def _save_database(self):
-        """Save the database to disk."""
+        self._build_index(self.index_type)
+        self.metadata.clear()
+        self.corpus_fingerprint = None
+        print(f"✓ Created new FAISS index ({self.index_spec})")
+    
+    def _resolve_index_spec(self, index_type: str, n_vectors: int) -> str:
+        """Fill in automatic sizes for bare "IVF", "PQ" and "HNSW" components."""
+        components = []
+        for component in index_type.split(','):
+            component = component.strip()
+            if component == 'IVF':
+                # Rule of thumb: ~4 * sqrt(N) lists, with enough points per list to train
+                nlist = max(1, min(int(4 * math.sqrt(max(n_vectors, 1))), n_vectors // 39))
+                component = f"IVF{nlist}"
+            elif component == 'PQ':
+                # Largest sub-quantizer count dividing the dimension with >= 8 dims per sub-vector
+                m = max(k for k in range(1, max(1, self.dimension // 8) + 1) if self.dimension % k == 0)
+                component = f"PQ{m}"
+            elif component == 'HNSW':
+                component = "HNSW32"
+            components.append(component)
+        return ','.join(components)
+    
+    def _build_index(self, index_type: str, n_vectors: int = 0) -> None:
+        """
+        Replace the current index with an empty one built from a factory string.
+        
+        Inner product on normalized vectors gives cosine similarity. IVF indexes
+        store document IDs natively; other types are wrapped in IndexIDMap2 so
+        documents can be replaced and removed by ID.
+        """
+        self.index_spec = self._resolve_index_spec(index_type, n_vectors)
+        index = faiss.index_factory(self.dimension, self.index_spec, faiss.METRIC_INNER_PRODUCT)
+        concrete_index = faiss.downcast_index(index)
+        if hasattr(concrete_index, 'do_polysemous_training'):
+            # Polysemous codes only serve Hamming-filtered search and make PQ training very slow
+            concrete_index.do_polysemous_training = False
+        if faiss.try_extract_index_ivf(index) is None:
+            index = faiss.IndexIDMap2(index)
+        self.index = index
+        self._tombstones = set()
+        self._labels = None
+        self._apply_search_params()
+    
+    def _inner_index(self) -> faiss.Index:
+        """Get the index wrapped by the ID map, or the index itself if it is not wrapped."""
+        if isinstance(self.index, faiss.IndexIDMap2):
+            return faiss.downcast_index(self.index.index)
+        return self.index
+    
+    def _apply_search_params(self) -> None:
+        """Apply nprobe / efSearch to the current index."""
+        inner = self._inner_index()
+        ivf = faiss.try_extract_index_ivf(inner)
+        if ivf is not None:
+            ivf.nprobe = min(self.nprobe, ivf.nlist)
+        if hasattr(inner, 'hnsw'):
+            inner.hnsw.efSearch = self.ef_search
+    
+    def _train(self, embeddings: np.ndarray) -> None:
+        """
+        Build and train the (empty, untrained) index on a sample of the given vectors.
+        
+        Falls back to a flat index when there are too few vectors to train the
+        configured index type; the next full rebuild retries the configured type.
+        """
+        self._build_index(self.index_type, len(embeddings))
+        if self.index.is_trained:
+            return
+        
+        sample = embeddings
+        if len(embeddings) > self.training_sample_size:
+            rng = np.random.default_rng(0)
+            sample = embeddings[rng.choice(len(embeddings), self.training_sample_size, replace=False)]
+        
+        try:
+            self.index.train(sample)
+            print(f"✓ Trained FAISS index ({self.index_spec}) on {len(sample)} vectors")
+        except RuntimeError as e:
+            print(f"Warning: Could not train {self.index_spec} on {len(sample)} vectors, using Flat: {e}")
+            self._build_index("Flat")
+    
+    def _remove_ids(self, faiss_ids: np.ndarray) -> None:
+        """Remove vectors by ID, tombstoning them for index types without removal support (e.g. HNSW)."""
+        try:
+            self.index.remove_ids(faiss_ids)
+            return
+        except RuntimeError:
+            if not isinstance(self.index, faiss.IndexIDMap2):
+                raise
+        
+        # Only ID-mapped indexes lack removal (IVF supports it), so positions map to IDs
+        positions = np.flatnonzero(np.isin(self._index_labels(), faiss_ids))
+        self._tombstones.update(positions.tolist())
+    
+    def _index_labels(self) -> np.ndarray:
+        """Get the ID of every vector of an ID-mapped index, by position."""
+        # Tombstoning indexes only ever grow between rebuilds, so a cache of the right length is current
+        if self._labels is None or len(self._labels) != self.index.ntotal:
+            self._labels = faiss.vector_to_array(self.index.id_map)
+        return self._labels
+    
+    def _compact_index(self) -> None:
+        """Rebuild a tombstoning index from its stored vectors without the tombstoned ones."""
+        live = np.setdiff1d(np.arange(self.index.ntotal), np.fromiter(self._tombstones, dtype=np.int64))
+        labels = self._index_labels()[live]
+        vectors = self._inner_index().reconstruct_n(0, self.index.ntotal)[live]
+        # reset() keeps the trained quantizers, so stored codes are re-encoded unchanged
+        self.index.reset()
+        self.index.add_with_ids(vectors, labels)
+        self._tombstones = set()
+        self._labels = None
+    
+    def _index_memory_bytes(self) -> int:
+        """Approximate in-memory size of the index."""
+        if self.index is None:
+            return 0
+        inner = self._inner_index()
+        ntotal = self.index.ntotal
+        total = ntotal * 16 if inner is not self.index else 0  # ID map and reverse map
+        if hasattr(inner, 'hnsw'):
+            storage = faiss.downcast_index(inner.storage)
+            total += ntotal * storage.code_size + inner.hnsw.neighbors.size() * 4
+        else:
+            try:
+                total += ntotal * inner.sa_code_size()
+            except RuntimeError:
+                total += ntotal * self.dimension * 4
+        ivf = faiss.try_extract_index_ivf(inner)
+        if ivf is not None:
+            total += ivf.nlist * self.dimension * 4 + ntotal * 8  # Centroids and list IDs
+        return total
+    
+    @staticmethod
+    def _faiss_id(doc_id: str) -> int:
+        """Map a document ID to a stable non-negative 63-bit FAISS ID."""
+        digest = hashlib.blake2b(doc_id.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little') & 0x7FFFFFFFFFFFFFFF
+    
+    @staticmethod
+    def _document_id(doc: Dict[str, Any], position: int) -> str:
+        """Get the stable ID of a document, falling back to its position."""
+        if doc.get('id'):
+            return str(doc['id'])
+        metadata = doc.get('metadata')
+        if isinstance(metadata, dict) and metadata.get('file_name'):
+            return str(metadata['file_name'])
+        return f"doc_{position}"
+    
+    def _generation_files(self, generation: int) -> Tuple[Path, Path]:
+        """Index file and delta log of an index generation."""
+        return self.db_path / f"faiss_index_{generation}.bin", self.db_path / f"faiss_index_{generation}.delta"
+    
+    def _replay_delta(self) -> None:
+        """Apply the delta log of the loaded generation to the index."""
+        if not self.delta_file.exists():
+            self._delta_records = 0
+            return
+        
+        # A torn last record (interrupted append) is ignored
+        count = self.delta_file.stat().st_size // self.delta_dtype.itemsize
+        records = np.fromfile(self.delta_file, dtype=self.delta_dtype, count=count)
+        self._delta_records = len(records)
+        if not len(records):
+            return
+        
+        # Only the last change of each ID counts; deletes are stored as ~faiss_id
+        faiss_ids = np.where(records['faiss_id'] < 0, ~records['faiss_id'], records['faiss_id'])
+        _, last_from_end = np.unique(faiss_ids[::-1], return_index=True)
+        final = np.sort(len(records) - 1 - last_from_end)
+        self._remove_ids(faiss_ids[final])
+        
+        added = final[records['faiss_id'][final] >= 0]
+        if len(added):
+            vectors = np.ascontiguousarray(records['vector'][added])
+            if not self.index.is_trained:
+                self._train(vectors)
+            self.index.add_with_ids(vectors, records['faiss_id'][added])
+    
+    def _delta_for(self, faiss_ids: np.ndarray, vectors: Optional[np.ndarray] = None) -> np.ndarray:
+        """Delta log records upserting the given vectors, or deleting the IDs if there are none."""
+        records = np.zeros(len(faiss_ids), dtype=self.delta_dtype)
+        if vectors is None:
+            records['faiss_id'] = ~faiss_ids
+        else:
+            records['faiss_id'] = faiss_ids
+            records['vector'] = vectors
+        return records
+    
+    def _save_database(self, delta: Optional[np.ndarray] = None):
+        """
+        Save the database to disk.
+        
+        Args:
+            delta: Delta log records of the changes since the last save. They are
+                appended to the current generation's log while it stays small;
+                without them (e.g. after a full rebuild or retraining) or once the
+                log is too long, the whole index is written as a new generation.
+        """
         try:
+            previous_generation = None
             if self.index is not None:
-                faiss.write_index(self.index, str(self.index_file))
+                delta_limit = max(self.DELTA_MIN_RECORDS, int(self.index.ntotal * self.DELTA_MAX_FRACTION))
+                if delta is not None and self.index_file.exists() and self._delta_records + len(delta) <= delta_limit:
+                    with open(self.delta_file, 'ab') as f:
+                        delta.tofile(f)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    self._delta_records += len(delta)
+                else:
+                    if self._tombstones:
+                        self._compact_index()
+                    previous_generation = self.index_generation
+                    self.index_generation += 1
+                    self.index_file, self.delta_file = self._generation_files(self.index_generation)
+                    faiss.write_index(self.index, str(self.index_file))
+                    self._delta_records = 0
             
-            with open(self.metadata_file, 'w') as f:
-                json.dump(self.metadata, f, indent=2)
+            self.metadata.save()
+            for legacy_file in self.legacy_files:
+                if legacy_file.exists():
+                    legacy_file.unlink()
             
-            with open(self.ids_file, 'w') as f:
-                json.dump(self.ids, f, indent=2)
+            # Switches to a new generation atomically; older ones are then garbage
+            self._write_info()
+            if previous_generation is not None:
+                self._remove_generation_files(keep=self.index_generation)
                 
             print(f"✓ Saved FAISS database with {self.index.ntotal} vectors")
         except Exception as e:
             print(f"Error saving database: {e}")
     
+    def _remove_generation_files(self, keep: Optional[int] = None) -> None:
+        """Delete the index files and delta logs of all generations but one."""
+        kept = set(self._generation_files(keep)) if keep is not None else set()
+        for pattern in ("faiss_index_*.bin", "faiss_index_*.delta"):
+            for path in self.db_path.glob(pattern):
+                if path not in kept:
+                    path.unlink()
+    
+    def _write_info(self) -> None:
+        """Atomically write the index metadata file."""
+        tmp_path = self.info_file.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'format': self.FORMAT_VERSION,
+                'embedder': self.embedder.version,
+                'dimension': self.dimension,
+                'index_type': self.index_type,
+                'index_spec': self.index_spec,
+                'index_generation': self.index_generation,
+                'total_documents': len(self.metadata),
+                'corpus_fingerprint': self.corpus_fingerprint
+            }, f, indent=2)
+        os.replace(tmp_path, self.info_file)
+    
+    def set_corpus_fingerprint(self, fingerprint: Optional[str]) -> None:
+        """
+        Record the fingerprint of the corpus the index currently reflects.
+        
+        Args:
+            fingerprint: Corpus fingerprint, or None to mark the index as stale
+        """
+        self.corpus_fingerprint = fingerprint
+        try:
+            self._write_info()
+        except Exception as e:
+            print(f"Warning: Could not save corpus fingerprint: {e}")
+    
     def _text_to_embedding(self, text: str) -> np.ndarray:
         """
-        Convert text to embedding using a simple but effective method.
+        Convert a single text to an embedding.
         
         Args:
             text: Input text
@@ -94,47 +415,34 @@ class FAISSVectorDB:
         Returns:
             Normalized embedding vector
         """
-        # Simple but effective text embedding
-        words = text.lower().split()
-        
-        # Create word frequency vector
-        word_freq = {}
-        for word in words:
-            # Simple word cleaning
-            word = ''.join(c for c in word if c.isalnum())
-            if len(word) > 2:  # Skip very short words
-                word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Create embedding vector
-        if len(word_freq) == 0:
-            embedding = np.zeros(self.dimension)
-        else:
-            # Use word frequencies as features
-            word_list = list(word_freq.keys())
-            freqs = list(word_freq.values())
-            
-            # Create a hash-based embedding
-            embedding = np.zeros(self.dimension)
-            for i, (word, freq) in enumerate(word_freq.items()):
-                # Use hash to distribute words across dimensions
-                hash_val = hash(word) % self.dimension
-                embedding[hash_val] += freq
-            
-            # Add some positional information
-            for i, word in enumerate(word_list[:10]):  # First 10 words
-                pos_hash = hash(word + str(i)) % self.dimension
-                embedding[pos_hash] += 1.0 / (i + 1)  # Decreasing weight
-        
-        # Normalize the embedding
-        norm = np.linalg.norm(embedding)
-        if norm > 0:
-            embedding = embedding / norm
+        return self.embedder.embed(text)
+    
+    def _document_text(self, doc: Dict[str, Any]) -> str:
+        """Extract the text to embed from a document."""
+        text = doc.get('text', '')
+        if text:
+            return text
         
-        return embedding.astype(np.float32)
+        # Try to extract text from test case structure
+        text_parts = []
+        if 'title' in doc:
+            text_parts.append(doc['title'])
+        if 'type' in doc:
+            text_parts.append(doc['type'])
+        if 'preconditions' in doc:
+            text_parts.append(doc['preconditions'])
+        if 'steps' in doc and isinstance(doc['steps'], list):
+            for step in doc['steps']:
+                if isinstance(step, dict):
+                    if 'step_text' in step:
+                        text_parts.append(step['step_text'])
+                    if 'step_expected' in step:
+                        text_parts.append(step['step_expected'])
+        return ' '.join(text_parts)
     
     def add_documents(self, documents: List[Dict[str, Any]]) -> None:
         """
-        Add documents to the vector database.
+        Replace the contents of the vector database with the given documents.
         
         Args:
             documents: List of documents with 'text' and 'metadata' fields
@@ -145,50 +453,86 @@ class FAISSVectorDB:
         # Clear existing data
         self._create_new_index()
         
-        embeddings = []
-        new_metadata = []
-        new_ids = []
+        self._upsert(documents, prune_cache=True)
         
-        for i, doc in enumerate(documents):
-            # Extract text content
-            text = doc.get('text', '')
-            if not text:
-                # Try to extract text from test case structure
-                text_parts = []
-                if 'title' in doc:
-                    text_parts.append(doc['title'])
-                if 'type' in doc:
-                    text_parts.append(doc['type'])
-                if 'preconditions' in doc:
-                    text_parts.append(doc['preconditions'])
-                if 'steps' in doc and isinstance(doc['steps'], list):
-                    for step in doc['steps']:
-                        if isinstance(step, dict):
-                            if 'step_text' in step:
-                                text_parts.append(step['step_text'])
-                            if 'step_expected' in step:
-                                text_parts.append(step['step_expected'])
-                text = ' '.join(text_parts)
-            
-            # Create embedding
-            embedding = self._text_to_embedding(text)
-            embeddings.append(embedding)
+        print(f"✓ Added {len(documents)} documents to FAISS database")
+    
+    def upsert(self, documents: List[Dict[str, Any]]) -> List[str]:
+        """
+        Insert or replace documents by ID without rebuilding the index.
+        
+        The ID of a document is its 'id' field, or 'metadata.file_name' for
+        test case documents.
+        
+        Args:
+            documents: List of documents with 'text' and 'metadata' fields
             
-            new_metadata.append(doc)
-            new_ids.append(f"doc_{i}")
+        Returns:
+            IDs of the upserted documents
+        """
+        return self._upsert(documents)
+    
+    def _upsert(self, documents: List[Dict[str, Any]], prune_cache: bool = False) -> List[str]:
+        """Upsert documents, optionally pruning cached embeddings no longer in use."""
+        if not documents:
+            return []
         
-        # Add to FAISS index
-        if embeddings:
-            embeddings_array = np.array(embeddings).astype(np.float32)
-            self.index.add(embeddings_array)
+        # Later duplicates of the same ID win
+        batch = {}
+        offset = len(self.metadata)
+        for i, doc in enumerate(documents):
+            batch[self._document_id(doc, offset + i)] = doc
+        doc_ids = list(batch)
+        faiss_ids = np.array([self._faiss_id(doc_id) for doc_id in doc_ids], dtype=np.int64)
+        
+        # Drop the previous vectors of documents being replaced
+        existing = [fid for fid in faiss_ids.tolist() if fid in self.metadata]
+        if existing:
+            self._remove_ids(np.array(existing, dtype=np.int64))
+        
+        # Embed the whole batch in one pass, reusing cached vectors of unchanged texts
+        texts = [self._document_text(batch[doc_id]) for doc_id in doc_ids]
+        embeddings_array = self.embedding_cache.embed_batch(texts, prune=prune_cache)
+        
+        # Untrained indexes are always empty, so they can be rebuilt and trained on this batch
+        retrained = not self.index.is_trained
+        if retrained:
+            self._train(embeddings_array)
+        self.index.add_with_ids(embeddings_array, faiss_ids)
+        
+        for doc_id, fid in zip(doc_ids, faiss_ids.tolist()):
+            self.metadata.put(fid, {**batch[doc_id], 'id': doc_id})
+        self.corpus_fingerprint = None
+        
+        # Save to disk: a retrained index is written whole, other changes go to the delta log
+        self._save_database(None if retrained or prune_cache else self._delta_for(faiss_ids, embeddings_array))
+        
+        return doc_ids
+    
+    def delete(self, doc_ids: List[str]) -> int:
+        """
+        Delete documents by ID.
+        
+        Args:
+            doc_ids: IDs of the documents to delete
             
-            self.metadata.extend(new_metadata)
-            self.ids.extend(new_ids)
+        Returns:
+            Number of documents removed
+        """
+        faiss_ids = [self._faiss_id(doc_id) for doc_id in dict.fromkeys(doc_ids)]
+        faiss_ids = [fid for fid in faiss_ids if fid in self.metadata]
+        if not faiss_ids:
+            return 0
         
-        # Save to disk
-        self._save_database()
+        faiss_ids = np.array(faiss_ids, dtype=np.int64)
+        self._remove_ids(faiss_ids)
+        for fid in faiss_ids.tolist():
+            self.metadata.remove(fid)
+        self.corpus_fingerprint = None
         
-        print(f"✓ Added {len(documents)} documents to FAISS database")
+        self._save_database(self._delta_for(faiss_ids))
+        
+        return len(faiss_ids)
     
     def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
         """
@@ -201,44 +545,89 @@ class FAISSVectorDB:
         Returns:
             List of similar documents with similarity scores
         """
-        if self.index is None or self.index.ntotal == 0:
+        return self.search_batch([query], top_k)[0]
+    
+    def search_batch(self, queries: List[str], top_k: int = 3) -> List[List[Dict[str, Any]]]:
+        """
+        Search for similar documents for many queries with a single FAISS call.
+        
+        Args:
+            queries: Search queries
+            top_k: Number of results to return per query
+            
+        Returns:
+            One list of similar documents with similarity scores per query
+        """
+        if not queries:
             return []
+        if self.index is None or self.index.ntotal == 0:
+            return [[] for _ in queries]
         
-        # Convert query to embedding
-        query_embedding = self._text_to_embedding(query)
-        query_embedding = query_embedding.reshape(1, -1).astype(np.float32)
+        # Embed all queries into one matrix and search them together
+        query_embeddings = self.embedder.embed_batch(queries)
+        if self._tombstones:
+            # Over-fetch by the tombstone count (bounded by the delta log) and drop tombstoned positions
+            k = min(top_k + len(self._tombstones), self.index.ntotal)
+            scores, positions = self._inner_index().search(query_embeddings, k)
+            dead = np.isin(positions, np.fromiter(self._tombstones, dtype=np.int64))
+            indices = np.where((positions == -1) | dead, -1, self._index_labels()[positions])
+        else:
+            scores, indices = self.index.search(query_embeddings, min(top_k, self.index.ntotal))
         
-        # Search in FAISS index
-        scores, indices = self.index.search(query_embedding, min(top_k, self.index.ntotal))
+        # Decode each hit row once, even if several queries share it
+        hit_ids = {int(idx) for idx, score in zip(indices.ravel(), scores.ravel()) if idx != -1 and score > 0}
+        documents = dict(zip(hit_ids, self.metadata.get_many(list(hit_ids))))
         
         # Return results
-        results = []
-        for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-            if idx < len(self.metadata) and score > 0:
-                result = self.metadata[idx].copy()
-                result['similarity_score'] = float(score)
-                result['distance'] = 1 - score  # Convert to distance
-                results.append(result)
+        batch_results = []
+        for query_scores, query_indices in zip(scores, indices):
+            results = []
+            for score, idx in zip(query_scores, query_indices):
+                document = documents.get(int(idx))
+                if document is not None and score > 0:
+                    result = document.copy()
+                    result['similarity_score'] = float(score)
+                    result['distance'] = 1 - float(score)  # Convert to distance
+                    results.append(result)
+                    if len(results) == top_k:
+                        break
+            batch_results.append(results)
         
-        return results
+        return batch_results
     
     def get_stats(self) -> Dict[str, Any]:
         """Get database statistics."""
         return {
             'total_documents': len(self.metadata),
-            'index_size': self.index.ntotal if self.index else 0,
+            'index_size': self.index.ntotal - len(self._tombstones) if self.index else 0,
+            'tombstoned_vectors': len(self._tombstones),
+            'index_type': self.index_spec,
+            'configured_index_type': self.index_type,
+            'is_trained': bool(self.index.is_trained) if self.index else False,
+            'index_memory_bytes': self._index_memory_bytes(),
+            'nprobe': self.nprobe,
+            'ef_search': self.ef_search,
             'embedding_dimension': self.dimension,
+            'embedder': self.embedder.version,
+            **self.embedding_cache.get_stats(),
+            **self.metadata.get_stats(),
+            'corpus_fingerprint': self.corpus_fingerprint,
             'database_path': str(self.db_path)
         }
     
     def reset(self) -> None:
         """Reset the database."""
         self._create_new_index()
+        self.embedding_cache.clear()
         
         # Remove files
-        for file_path in [self.index_file, self.metadata_file, self.ids_file]:
+        self._remove_generation_files()
+        for file_path in [self.info_file] + self.legacy_files:
             if file_path.exists():
                 file_path.unlink()
+        self.index_generation = 0
+        self.index_file, self.delta_file = self._generation_files(self.index_generation)
+        self._delta_records = 0
         
         print("✓ FAISS database reset")
     
@@ -253,8 +642,7 @@ class FAISSVectorDB:
         Returns:
             True if successful, False otherwise
         """
-        # FAISS doesn't support direct updates, so we need to rebuild
-        print("Warning: FAISS doesn't support direct updates. Rebuilding index...")
+        self.upsert([{**updated_doc, 'id': doc_id}])
         return True
     
     def delete_document(self, doc_id: str) -> bool:
@@ -267,6 +655,4 @@ class FAISSVectorDB:
         Returns:
             True if successful, False otherwise
         """
-        # FAISS doesn't support direct deletion, so we need to rebuild
-        print("Warning: FAISS doesn't support direct deletion. Rebuilding index...")
-        return True
+        return self.delete([doc_id]) > 0
@@ -0,0 +1,119 @@
+"""
+Test Case ID Allocator
+Persisted, process-safe counters for new test case IDs, and ID formatting and ordering.
+"""
+
+import os
+import re
+import json
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+from .journal import atomic_write_text
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_NUMBERED_NAME = re.compile(r"^(.*?)(\d+)(\.json)?$")
+
+
+def format_test_case_id(number: int, prefix: str = "tc_") -> str:
+    """ID of the numbered test case, zero-padded to three digits (tc_007, tc_042, tc_1000)."""
+    return f"{prefix}{number:03d}"
+
+
+def id_sort_key(file_name: str) -> Tuple[str, int, str]:
+    """
+    Sort key ordering test case IDs or file names by number.
+
+    Plain string order breaks past tc_999 (tc_1000 sorts before tc_200);
+    this key orders by prefix, then number.
+
+    Args:
+        file_name: Test case ID or file name (e.g., "tc_1000.json")
+
+    Returns:
+        A key for sorted()
+    """
+    match = _NUMBERED_NAME.match(file_name)
+    if match is None:
+        return (file_name, -1, file_name)
+    return (match.group(1), int(match.group(2)), file_name)
+
+
+class IdCounterFile:
+    """
+    JSON file of the last allocated number per ID prefix, shared by processes.
+
+    Every reservation holds an exclusive lock on a sidecar lock file while it
+    reads, bumps and atomically rewrites the counter, so concurrent processes
+    never hand out the same number. A reservation of N numbers costs one
+    locked read-modify-write, whatever the size of the corpus.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the counter file.
+
+        Args:
+            path: Counter file (created on first reservation)
+        """
+        self.path = path
+        self.lock_path = path + ".lock"
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the inter-process lock of the counter."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.lock_path, 'a+') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _read(self) -> Dict[str, int]:
+        """Last allocated number per prefix (empty if the file is missing or unreadable)."""
+        try:
+            with open(self.path, 'r') as f:
+                counters = json.load(f)
+            return counters if isinstance(counters, dict) else {}
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def reserve(self, prefix: str, count: int, seed: Callable[[], int], at_least: int = 0) -> List[int]:
+        """
+        Reserve consecutive numbers for a prefix.
+
+        Args:
+            prefix: ID prefix (e.g., "tc_")
+            count: How many numbers to reserve
+            seed: Called under the lock, only when the prefix has no counter
+                yet, to get the highest number already in use
+            at_least: Move the counter up to this number first (e.g. past files
+                created without the allocator)
+
+        Returns:
+            The reserved numbers, ascending
+        """
+        with self._locked():
+            counters = self._read()
+            last = counters.get(prefix)
+            if not isinstance(last, int):
+                last = seed()
+            last = max(last, at_least)
+            counters[prefix] = last + count
+            atomic_write_text(self.path, json.dumps(counters))
+        return list(range(last + 1, last + count + 1))
@@ -0,0 +1,129 @@
+"""
+Write Journal
+Crash-safe file writes and a per-session write-ahead journal of test case mutations.
+"""
+
+import os
+import json
+import uuid
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+
+def fsync_directory(path: str) -> None:
+    """Persist a directory's entries (renames, creations, deletions)."""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return  # Not supported on Windows; renames there are durable once the file is
+    fd = os.open(path or '.', os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_text(path: str, content: str, sync_directory: bool = True) -> None:
+    """
+    Replace a file so that readers and crashes see either the old or the new content.
+
+    The content goes to a temporary file in the same directory, which is
+    fsynced and renamed over the target.
+
+    Args:
+        path: File to write
+        content: New file content
+        sync_directory: Also fsync the directory so the rename itself is durable;
+            callers writing many files can do that once at the end instead
+    """
+    directory = os.path.dirname(path)
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if sync_directory:
+        fsync_directory(directory)
+
+
+class WriteJournal:
+    """
+    Append-only record of the before-images of files a session mutates.
+
+    Each session has its own JSONL file; a record holds a file name and its
+    content before the session first touched it (None if the session created
+    it). Records are fsynced before the mutation they describe, so a session
+    can always be rolled back, even after a crash mid-run. Several records
+    written together share one fsync.
+    """
+
+    def __init__(self, journal_dir: str):
+        """
+        Initialize the journal.
+
+        Args:
+            journal_dir: Directory holding one journal file per session
+        """
+        self.journal_dir = journal_dir
+        self._recorded: Dict[str, set] = {}  # Session ID -> file names with a before-image
+        self._lock = threading.Lock()
+
+    def _path(self, session_id: str) -> str:
+        """Journal file of a session."""
+        return os.path.join(self.journal_dir, f"{session_id}.jsonl")
+
+    def record(self, session_id: str, before_images: Dict[str, Optional[str]]) -> None:
+        """
+        Durably record before-images, skipping files the session already recorded.
+
+        Args:
+            session_id: Session making the changes
+            before_images: File name -> content before the change (None if new)
+        """
+        with self._lock:
+            recorded = self._recorded.setdefault(session_id, set())
+            new = {name: content for name, content in before_images.items() if name not in recorded}
+            if not new:
+                return
+
+            os.makedirs(self.journal_dir, exist_ok=True)
+            timestamp = datetime.now().isoformat()
+            with open(self._path(session_id), 'a') as f:
+                for file_name, content in new.items():
+                    f.write(json.dumps({'file_name': file_name, 'before': content, 'time': timestamp}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            recorded.update(new)
+
+    def entries(self, session_id: str) -> List[Dict[str, Any]]:
+        """Records of a session in write order (empty if there is no journal)."""
+        entries = []
+        try:
+            with open(self._path(session_id), 'r') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # Torn final line: its mutation never happened
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def sessions(self) -> List[str]:
+        """IDs of sessions with a journal that can still be rolled back."""
+        try:
+            names = os.listdir(self.journal_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-len(".jsonl")] for name in names if name.endswith(".jsonl"))
+
+    def close(self, session_id: str) -> None:
+        """Retire a rolled back session's journal so it cannot be applied twice."""
+        with self._lock:
+            os.replace(self._path(session_id), self._path(session_id) + ".rolled_back")
+            self._recorded.pop(session_id, None)
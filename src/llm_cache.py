@@ -0,0 +1,187 @@
+"""
+LLM Response Cache
+SQLite-backed cache of parsed LLM responses keyed by request fingerprint.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Iterator
+
+
+class LLMResponseCache:
+    """
+    On-disk cache of LLM responses.
+
+    Entries are keyed by a SHA-256 of the full request (model, temperature,
+    max_tokens and the rendered messages), expire after a TTL, and the least
+    recently used entries are evicted once the cache outgrows its size limit.
+    The total size is kept in a meta row, maintained by triggers on every
+    insert, update and delete, so a put does not sum the whole table.
+    Every operation opens its own short-lived connection, so one cache can be
+    shared by worker threads and by concurrent processes.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: float = 7 * 24 * 3600, max_bytes: int = 100 * 1024 * 1024):
+        """
+        Initialize the response cache.
+
+        Args:
+            db_path: Path of the SQLite database file
+            ttl_seconds: Age after which an entry is no longer served (0 disables expiry)
+            max_bytes: Total size of cached responses above which LRU entries are evicted
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_size_insert AFTER INSERT ON responses BEGIN "
+                "UPDATE meta SET value = value + NEW.size WHERE key = 'total_size'; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_size_update AFTER UPDATE OF size ON responses BEGIN "
+                "UPDATE meta SET value = value - OLD.size + NEW.size WHERE key = 'total_size'; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_size_delete AFTER DELETE ON responses BEGIN "
+                "UPDATE meta SET value = value - OLD.size WHERE key = 'total_size'; END"
+            )
+            # Caches created before the running total start from the current sum, once
+            conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) "
+                "SELECT 'total_size', COALESCE(SUM(size), 0) FROM responses"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one operation, committing and closing it afterwards."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def key_for(request: Dict[str, Any]) -> str:
+        """
+        Fingerprint an LLM request.
+
+        Args:
+            request: Chat completion request parameters (model, messages, max_tokens, temperature)
+
+        Returns:
+            Hex SHA-256 of the canonical JSON encoding of the request
+        """
+        canonical = json.dumps(request, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Request fingerprint from key_for
+
+        Returns:
+            The cached parsed response, or None if missing or expired
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET last_used_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """
+        Store a response and evict entries beyond the TTL and size limit.
+
+        Args:
+            key: Request fingerprint from key_for
+            response: Parsed LLM response
+        """
+        encoded = json.dumps(response, separators=(',', ':'))
+        now = time.time()
+        with self._connect() as conn:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete skips the size trigger
+            conn.execute(
+                "INSERT INTO responses (key, response, size, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                "response = excluded.response, size = excluded.size, "
+                "created_at = excluded.created_at, last_used_at = excluded.last_used_at",
+                (key, encoded, len(encoded), now, now)
+            )
+            self._evict(conn, now)
+
+    def delete(self, key: str) -> None:
+        """
+        Remove a cached response, e.g. one that turned out to be unusable.
+
+        Args:
+            key: Request fingerprint from key_for
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under the size limit."""
+        if self.ttl_seconds:
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+
+        total = self._total_size(conn)
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used_at"):
+            if excess <= 0:
+                break
+            victims.append((key,))
+            excess -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    @staticmethod
+    def _total_size(conn: sqlite3.Connection) -> int:
+        """Read the running total size of the cached responses."""
+        row = conn.execute("SELECT value FROM meta WHERE key = 'total_size'").fetchone()
+        return row[0] if row else 0
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            size = self._total_size(conn)
+        return {
+            'llm_cache_entries': entries,
+            'llm_cache_bytes': size
+        }
@@ -1,76 +1,227 @@
 import json
 import time
 import uuid
-from openai import OpenAI
-from typing import List, Dict, Any, Optional
-from jsonschema import validate, ValidationError
+import asyncio
+from openai import OpenAI, AsyncOpenAI
+from typing import List, Dict, Any, Optional, Tuple, Union
+from jsonschema import ValidationError
 from .config import Config
 from .prompt_manager import PromptManager
 from .observability import ObservabilityManager
+from .llm_cache import LLMResponseCache
+from .schema_validator import validate_test_case
+from .rate_limiter import TokenBucketRateLimiter, get_shared_rate_limiter, backoff_delay, retry_after_seconds
+from .token_budget import count_tokens, compact_json, pack_test_cases, prompt_test_case
+
+# A prompt is a list of chat messages; a plain string is sent as one user message
+Prompt = Union[str, List[Dict[str, str]]]
 
 class LLMClient:
-    """Client for interacting with OpenAI's LLM API."""
+    """
+    Client for interacting with OpenAI's LLM API.
+    
+    Prompts are laid out for provider-side prefix caching: a system message
+    with the shared context (overview, schema constraints, test case format)
+    that is byte-identical across all calls, then a user message with the
+    task's static instructions first and the per-call data last. Schema
+    retries append a message instead of editing earlier ones.
+    """
+    
+    # Sent as an extra message when a generated test case fails schema validation
+    SCHEMA_RETRY_INSTRUCTIONS = (
+        "IMPORTANT: The previous response failed schema validation. Please ensure:\n"
+        "- 'type' field is exactly one of: functional, integration, ui, api, performance, security, regression\n"
+        "- 'priority' field is exactly one of: P1 - Critical, P2 - High, P3 - Medium, P4 - Low\n"
+        "- All required fields are present and properly formatted\n"
+        "- Steps array has at least 1 item with both 'step_text' and 'step_expected'\n"
+    )
     
-    def __init__(self):
-        """Initialize the LLM client."""
-        self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+    def __init__(
+        self,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        observability: Optional[ObservabilityManager] = None,
+        use_cache: Optional[bool] = None
+    ):
+        """
+        Initialize the LLM client.
+        
+        Args:
+            rate_limiter: Request/token throttle (defaults to the process-wide limiter)
+            observability: Metrics sink; pass the caller's so sessions are shared
+            use_cache: Serve repeated requests from the response cache (defaults to Config.LLM_CACHE_ENABLED)
+        """
+        # Retries are scheduled here (rate limiter, Retry-After, backoff) rather than by the SDK
+        self.client = OpenAI(api_key=Config.OPENAI_API_KEY, max_retries=0)
         self.model = Config.OPENAI_MODEL
         self.max_tokens = Config.MAX_TOKENS
         self.temperature = Config.TEMPERATURE
+        self.test_cases_token_budget = Config.PROMPT_TEST_CASES_TOKEN_BUDGET
         self.prompt_manager = PromptManager()
-        self.observability = ObservabilityManager()
+        self.observability = observability or ObservabilityManager()
+        self.rate_limiter = rate_limiter or get_shared_rate_limiter()
         self.max_retries = 3
         self.retry_delay = 1.0
+        self.max_retry_delay = 30.0
+        
+        if use_cache is None:
+            use_cache = Config.LLM_CACHE_ENABLED
+        self.response_cache = LLMResponseCache(
+            Config.LLM_CACHE_PATH,
+            ttl_seconds=Config.LLM_CACHE_TTL_HOURS * 3600,
+            max_bytes=int(Config.LLM_CACHE_MAX_MB * 1024 * 1024)
+        ) if use_cache else None
+    
+    @staticmethod
+    def _messages_for(prompt: Prompt) -> List[Dict[str, str]]:
+        """Chat messages of a prompt."""
+        return [{"role": "user", "content": prompt}] if isinstance(prompt, str) else prompt
+    
+    def _request_kwargs(self, prompt: Prompt) -> Dict[str, Any]:
+        """Build the chat completion request for a prompt."""
+        return {
+            'model': self.model,
+            'messages': self._messages_for(prompt),
+            'max_tokens': self.max_tokens,
+            'temperature': self.temperature
+        }
+    
+    def _request_tokens(self, prompt: Prompt) -> int:
+        """Tokens a request counts against the rate limit: prompt plus max completion."""
+        return sum(count_tokens(message['content'], self.model) for message in self._messages_for(prompt)) + self.max_tokens
+    
+    def _prompt_messages(self, iw_overview: str, template_name: str, **kwargs) -> List[Dict[str, str]]:
+        """
+        Render a task as a shared system message plus a task message.
+        
+        Args:
+            iw_overview: Instawork overview context, part of the shared system message
+            template_name: Task template (static instructions first, per-call fields last)
+            **kwargs: Per-call variables of the task template
+            
+        Returns:
+            The chat messages
+        """
+        return [
+            {"role": "system", "content": self.prompt_manager.load_bound_prompt("system", {'iw_overview': iw_overview})},
+            {"role": "user", "content": self.prompt_manager.load_prompt(template_name, **kwargs)}
+        ]
+    
+    def _cache_lookup(self, request: Dict[str, Any], session_id: str = None) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Look up a request in the response cache.
+        
+        Returns:
+            The cache key (None when caching is off) and the cached response, if any
+        """
+        if self.response_cache is None:
+            return None, None
+        
+        key = LLMResponseCache.key_for(request)
+        try:
+            cached = self.response_cache.get(key)
+        except Exception as e:
+            print(f"Warning: LLM response cache lookup failed: {str(e)}")
+            return key, None
+        
+        self.observability.log_cache_event(session_id, hit=cached is not None)
+        return key, cached
+    
+    def _cache_store(self, key: Optional[str], response: Dict[str, Any]) -> None:
+        """Store a parsed response under its cache key."""
+        if key is None:
+            return
+        try:
+            self.response_cache.put(key, response)
+        except Exception as e:
+            print(f"Warning: Failed to cache LLM response: {str(e)}")
+    
+    def _cache_discard(self, prompt: Prompt) -> None:
+        """Drop the cached response of a prompt, so a rejected response is not served again."""
+        if self.response_cache is None:
+            return
+        try:
+            self.response_cache.delete(LLMResponseCache.key_for(self._request_kwargs(prompt)))
+        except Exception as e:
+            print(f"Warning: Failed to drop cached LLM response: {str(e)}")
+    
+    def _parse_response(self, response: Any, session_id: str = None) -> Dict[str, Any]:
+        """
+        Log usage of a completion and parse its content as JSON.
+        
+        Raises:
+            json.JSONDecodeError: If the content is not valid JSON
+        """
+        # Calculate tokens and cost
+        tokens_used = response.usage.total_tokens if response.usage else 0
+        prompt_tokens = response.usage.prompt_tokens if response.usage else 0
+        completion_tokens = response.usage.completion_tokens if response.usage else 0
+        cost = self._calculate_cost(tokens_used)
+        
+        # Prompt tokens served from the provider's prefix cache
+        details = getattr(response.usage, 'prompt_tokens_details', None) if response.usage else None
+        cached_tokens = (getattr(details, 'cached_tokens', None) or 0) if details else 0
+        
+        # Log the call
+        if session_id:
+            self.observability.log_llm_call(
+                session_id, self.model, tokens_used, cost,
+                prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cached_tokens=cached_tokens
+            )
+        
+        return json.loads(response.choices[0].message.content)
     
-    def _make_llm_call(self, prompt: str, session_id: str = None) -> Dict[str, Any]:
+    def _retry_delay_for(self, error: Exception, attempt: int) -> float:
         """
-        Make an LLM API call with retry logic and observability.
+        Seconds to wait before retrying a failed call.
+        
+        A server-provided Retry-After is honoured and also holds back every other
+        caller sharing the rate limiter; otherwise jittered exponential backoff is used.
+        """
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            self.rate_limiter.block_for(retry_after)
+            return retry_after
+        return backoff_delay(attempt, self.retry_delay, self.max_retry_delay)
+    
+    def _make_llm_call(self, prompt: Prompt, session_id: str = None) -> Dict[str, Any]:
+        """
+        Make an LLM API call with caching, rate limiting, retry logic and observability.
         
         Args:
-            prompt: The prompt to send to the LLM
+            prompt: The prompt (chat messages) to send to the LLM
             session_id: Optional session ID for tracking
             
         Returns:
             Parsed JSON response from the LLM
         """
+        request = self._request_kwargs(prompt)
+        cache_key, cached = self._cache_lookup(request, session_id)
+        if cached is not None:
+            return cached
+        
         for attempt in range(self.max_retries + 1):
             try:
-                start_time = time.time()
+                self.rate_limiter.acquire(self._request_tokens(prompt))
+                with self.observability.span("llm_call", session_id):
+                    response = self.client.chat.completions.create(**request)
+                result = self._parse_response(response, session_id)
+                self._cache_store(cache_key, result)
+                return result
                 
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=self.max_tokens,
-                    temperature=self.temperature
-                )
-                
-                # Calculate tokens and cost
-                tokens_used = response.usage.total_tokens if response.usage else 0
-                cost = self._calculate_cost(tokens_used)
-                
-                # Log the call
-                if session_id:
-                    self.observability.log_llm_call(session_id, self.model, tokens_used, cost)
-                
-                content = response.choices[0].message.content
-                
-                # Try to parse JSON
-                try:
-                    return json.loads(content)
-                except json.JSONDecodeError as e:
-                    if attempt < self.max_retries:
-                        if session_id:
-                            self.observability.log_retry_attempt(session_id, f"JSON parse error: {str(e)}")
-                        time.sleep(self.retry_delay * (attempt + 1))
-                        continue
-                    else:
-                        raise Exception(f"Failed to parse JSON response after {self.max_retries} retries: {str(e)}")
+            except json.JSONDecodeError as e:
+                if attempt < self.max_retries:
+                    if session_id:
+                        self.observability.log_retry_attempt(session_id, f"JSON parse error: {str(e)}")
+                    time.sleep(backoff_delay(attempt, self.retry_delay, self.max_retry_delay))
+                    continue
+                else:
+                    raise Exception(f"Failed to parse JSON response after {self.max_retries} retries: {str(e)}")
                 
             except Exception as e:
                 if attempt < self.max_retries:
                     if session_id:
                         self.observability.log_retry_attempt(session_id, f"API error: {str(e)}")
-                    time.sleep(self.retry_delay * (attempt + 1))
+                    time.sleep(self._retry_delay_for(e, attempt))
                     continue
                 else:
                     raise Exception(f"LLM API call failed after {self.max_retries} retries: {str(e)}")
@@ -97,15 +248,8 @@ class LLMClient:
             True if valid, False otherwise
         """
         try:
-            # Load schema
-            with open(Config.SCHEMA_PATH, 'r') as f:
-                schema = json.load(f)
-            
-            # Remove internal metadata fields before validation
-            clean_test_case = {k: v for k, v in test_case.items() if not k.startswith('_')}
-            
-            # Validate against schema
-            validate(instance=clean_test_case, schema=schema)
+            # Validate against the shared compiled schema, ignoring internal metadata fields
+            validate_test_case(test_case, Config.SCHEMA_PATH)
             return True
             
         except ValidationError as e:
@@ -136,15 +280,25 @@ class LLMClient:
         Returns:
             Analysis result with impacted cases and required updates
         """
-        # Use prompt template
-        prompt = self.prompt_manager.load_prompt(
+        prompt = self._analyze_prompt(change_request, iw_overview, existing_test_cases)
+        return self._make_llm_call(prompt, session_id)
+    
+    def _analyze_prompt(self, change_request: str, iw_overview: str, existing_test_cases: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Render the change request analysis prompt."""
+        return self._prompt_messages(
+            iw_overview,
             "analyze_change_request",
-            iw_overview=iw_overview,
             change_request=change_request,
-            existing_test_cases=json.dumps(existing_test_cases, indent=2)
+            existing_test_cases=self._pack_test_cases(existing_test_cases)
         )
-        
-        return self._make_llm_call(prompt, session_id)
+    
+    def _pack_test_cases(self, test_cases: List[Dict[str, Any]]) -> str:
+        """Compact JSON of the most relevant test cases that fit the prompt's token budget."""
+        packed_json, packed = pack_test_cases(test_cases, self.test_cases_token_budget, self.model)
+        if len(packed) < len(test_cases):
+            print(f"Warning: {len(test_cases) - len(packed)} of {len(test_cases)} test cases left out of the prompt "
+                  f"to stay within {self.test_cases_token_budget} tokens")
+        return packed_json
     
     def generate_test_case(
         self, 
@@ -171,48 +325,30 @@ class LLMClient:
         Returns:
             Generated test case as a dictionary
         """
-        # Use prompt template
-        prompt = self.prompt_manager.load_prompt(
+        prompt = self._generate_prompt(
+            change_request, iw_overview, test_case_type, title, priority, existing_test_cases
+        )
+        return self._call_with_schema_retry(prompt, session_id, "generate test case")
+    
+    def _generate_prompt(
+        self,
+        change_request: str,
+        iw_overview: str,
+        test_case_type: str,
+        title: str,
+        priority: str,
+        existing_test_cases: List[Dict[str, Any]]
+    ) -> List[Dict[str, str]]:
+        """Render the new test case generation prompt."""
+        return self._prompt_messages(
+            iw_overview,
             "generate_test_case",
-            iw_overview=iw_overview,
             change_request=change_request,
             test_case_type=test_case_type,
             title=title,
             priority=priority,
-            existing_test_cases=json.dumps(existing_test_cases, indent=2)
+            existing_test_cases=self._pack_test_cases(existing_test_cases)
         )
-        
-        # Generate with retry logic for schema validation
-        for attempt in range(self.max_retries + 1):
-            try:
-                # Make LLM call
-                test_case = self._make_llm_call(prompt, session_id)
-                
-                # Validate against schema
-                if self._validate_test_case_schema(test_case, session_id):
-                    return test_case
-                else:
-                    if attempt < self.max_retries:
-                        if session_id:
-                            self.observability.log_retry_attempt(session_id, "Schema validation failed")
-                        # Add more specific instructions for retry
-                        prompt += f"\n\nIMPORTANT: The previous response failed schema validation. Please ensure:\n"
-                        prompt += f"- 'type' field is exactly one of: functional, integration, ui, api, performance, security, regression\n"
-                        prompt += f"- 'priority' field is exactly one of: P1 - Critical, P2 - High, P3 - Medium, P4 - Low\n"
-                        prompt += f"- All required fields are present and properly formatted\n"
-                        prompt += f"- Steps array has at least 1 item with both 'step_text' and 'step_expected'\n"
-                        continue
-                    else:
-                        raise Exception(f"Failed to generate valid test case after {self.max_retries} retries")
-                        
-            except Exception as e:
-                if attempt < self.max_retries:
-                    if session_id:
-                        self.observability.log_retry_attempt(session_id, f"Generation error: {str(e)}")
-                    time.sleep(self.retry_delay * (attempt + 1))
-                    continue
-                else:
-                    raise Exception(f"Failed to generate test case after {self.max_retries} retries: {str(e)}")
     
     def update_existing_test_case(
         self, 
@@ -235,43 +371,213 @@ class LLMClient:
         Returns:
             Updated test case as a dictionary
         """
-        # Use prompt template
-        prompt = self.prompt_manager.load_prompt(
+        prompt = self._update_prompt(change_request, iw_overview, original_test_case, required_changes)
+        return self._call_with_schema_retry(prompt, session_id, "update test case")
+    
+    def _update_prompt(
+        self,
+        change_request: str,
+        iw_overview: str,
+        original_test_case: Dict[str, Any],
+        required_changes: List[str]
+    ) -> List[Dict[str, str]]:
+        """Render the test case update prompt."""
+        return self._prompt_messages(
+            iw_overview,
             "update_test_case",
-            iw_overview=iw_overview,
             change_request=change_request,
-            original_test_case=json.dumps(original_test_case, indent=2),
+            original_test_case=compact_json(prompt_test_case(original_test_case)),
             required_changes=chr(10).join(f"- {change}" for change in required_changes)
         )
+    
+    def _with_retry_instructions(self, prompt: Prompt, rejected: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Prompt followed by the rejected response and the schema retry instructions, as new messages."""
+        return self._messages_for(prompt) + [
+            {"role": "assistant", "content": compact_json(rejected)},
+            {"role": "user", "content": self.SCHEMA_RETRY_INSTRUCTIONS}
+        ]
+    
+    def _call_with_schema_retry(self, prompt: Prompt, session_id: str, action: str) -> Dict[str, Any]:
+        """
+        Request a test case until it passes schema validation.
         
-        # Update with retry logic for schema validation
+        Args:
+            prompt: The rendered prompt (chat messages)
+            session_id: Optional session ID for tracking
+            action: What is being done, for retry logs and errors (e.g. "generate test case")
+            
+        Returns:
+            Schema-valid test case as a dictionary
+        """
         for attempt in range(self.max_retries + 1):
             try:
                 # Make LLM call
-                updated_test_case = self._make_llm_call(prompt, session_id)
+                test_case = self._make_llm_call(prompt, session_id)
                 
-                # Validate against schema
-                if self._validate_test_case_schema(updated_test_case, session_id):
-                    return updated_test_case
+                # Validate against schema; only schema-valid responses stay cached
+                if self._validate_test_case_schema(test_case, session_id):
+                    return test_case
+                self._cache_discard(prompt)
+                if attempt < self.max_retries:
+                    if session_id:
+                        self.observability.log_retry_attempt(session_id, "Schema validation failed")
+                    # Answer the rejected response with more specific instructions, keeping the cached prefix intact
+                    prompt = self._with_retry_instructions(prompt, test_case)
+                    continue
                 else:
-                    if attempt < self.max_retries:
-                        if session_id:
-                            self.observability.log_retry_attempt(session_id, "Schema validation failed")
-                        # Add more specific instructions for retry
-                        prompt += f"\n\nIMPORTANT: The previous response failed schema validation. Please ensure:\n"
-                        prompt += f"- 'type' field is exactly one of: functional, integration, ui, api, performance, security, regression\n"
-                        prompt += f"- 'priority' field is exactly one of: P1 - Critical, P2 - High, P3 - Medium, P4 - Low\n"
-                        prompt += f"- All required fields are present and properly formatted\n"
-                        prompt += f"- Steps array has at least 1 item with both 'step_text' and 'step_expected'\n"
-                        continue
-                    else:
-                        raise Exception(f"Failed to generate valid updated test case after {self.max_retries} retries")
+                    raise Exception(f"Failed to {action}: no schema-valid response after {self.max_retries} retries")
                         
             except Exception as e:
                 if attempt < self.max_retries:
                     if session_id:
-                        self.observability.log_retry_attempt(session_id, f"Update error: {str(e)}")
-                    time.sleep(self.retry_delay * (attempt + 1))
+                        self.observability.log_retry_attempt(session_id, f"Failed to {action}: {str(e)}")
+                    time.sleep(backoff_delay(attempt, self.retry_delay, self.max_retry_delay))
+                    continue
+                else:
+                    raise Exception(f"Failed to {action} after {self.max_retries} retries: {str(e)}")
+
+
+class AsyncLLMClient(LLMClient):
+    """
+    Asyncio client for running many LLM calls concurrently.
+    
+    All calls go through one AsyncOpenAI client, and so one HTTP connection
+    pool, and are throttled by the same token-bucket limiter as the sync client.
+    Use it as an async context manager, or call ``aclose()`` when done.
+    """
+    
+    def __init__(
+        self,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        observability: Optional[ObservabilityManager] = None,
+        use_cache: Optional[bool] = None
+    ):
+        """
+        Initialize the async LLM client.
+        
+        Args:
+            rate_limiter: Request/token throttle (defaults to the process-wide limiter)
+            observability: Metrics sink; pass the caller's so sessions are shared
+            use_cache: Serve repeated requests from the response cache (defaults to Config.LLM_CACHE_ENABLED)
+        """
+        super().__init__(rate_limiter, observability, use_cache)
+        self.async_client = AsyncOpenAI(api_key=Config.OPENAI_API_KEY, max_retries=0)
+    
+    async def __aenter__(self) -> "AsyncLLMClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP connection pool."""
+        await self.async_client.close()
+    
+    async def _make_llm_call_async(self, prompt: Prompt, session_id: str = None) -> Dict[str, Any]:
+        """
+        Async version of _make_llm_call.
+        
+        The response cache (SQLite) and the metrics event log are blocking file
+        I/O, so they run in worker threads instead of on the event loop.
+        """
+        request = self._request_kwargs(prompt)
+        cache_key, cached = await asyncio.to_thread(self._cache_lookup, request, session_id)
+        if cached is not None:
+            return cached
+        
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.rate_limiter.acquire_async(self._request_tokens(prompt))
+                start = time.perf_counter()
+                try:
+                    response = await self.async_client.chat.completions.create(**request)
+                finally:
+                    await asyncio.to_thread(
+                        self.observability.record_latency, "llm_call", time.perf_counter() - start, session_id
+                    )
+                result = await asyncio.to_thread(self._parse_response, response, session_id)
+                await asyncio.to_thread(self._cache_store, cache_key, result)
+                return result
+                
+            except json.JSONDecodeError as e:
+                if attempt < self.max_retries:
+                    if session_id:
+                        await asyncio.to_thread(self.observability.log_retry_attempt, session_id, f"JSON parse error: {str(e)}")
+                    await asyncio.sleep(backoff_delay(attempt, self.retry_delay, self.max_retry_delay))
+                    continue
+                else:
+                    raise Exception(f"Failed to parse JSON response after {self.max_retries} retries: {str(e)}")
+                
+            except Exception as e:
+                if attempt < self.max_retries:
+                    if session_id:
+                        await asyncio.to_thread(self.observability.log_retry_attempt, session_id, f"API error: {str(e)}")
+                    await asyncio.sleep(self._retry_delay_for(e, attempt))
+                    continue
+                else:
+                    raise Exception(f"LLM API call failed after {self.max_retries} retries: {str(e)}")
+    
+    async def _call_with_schema_retry_async(self, prompt: Prompt, session_id: str, action: str) -> Dict[str, Any]:
+        """Async version of _call_with_schema_retry."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                test_case = await self._make_llm_call_async(prompt, session_id)
+                
+                if await asyncio.to_thread(self._validate_test_case_schema, test_case, session_id):
+                    return test_case
+                await asyncio.to_thread(self._cache_discard, prompt)
+                if attempt < self.max_retries:
+                    if session_id:
+                        await asyncio.to_thread(self.observability.log_retry_attempt, session_id, "Schema validation failed")
+                    prompt = self._with_retry_instructions(prompt, test_case)
+                    continue
+                else:
+                    raise Exception(f"Failed to {action}: no schema-valid response after {self.max_retries} retries")
+                
+            except Exception as e:
+                if attempt < self.max_retries:
+                    if session_id:
+                        await asyncio.to_thread(self.observability.log_retry_attempt, session_id, f"Failed to {action}: {str(e)}")
+                    await asyncio.sleep(backoff_delay(attempt, self.retry_delay, self.max_retry_delay))
                     continue
                 else:
-                    raise Exception(f"Failed to update test case after {self.max_retries} retries: {str(e)}")
+                    raise Exception(f"Failed to {action} after {self.max_retries} retries: {str(e)}")
+    
+    async def analyze_change_request_async(
+        self,
+        change_request: str,
+        iw_overview: str,
+        existing_test_cases: List[Dict[str, Any]],
+        session_id: str = None
+    ) -> Dict[str, Any]:
+        """Async version of analyze_change_request."""
+        prompt = self._analyze_prompt(change_request, iw_overview, existing_test_cases)
+        return await self._make_llm_call_async(prompt, session_id)
+    
+    async def generate_test_case_async(
+        self,
+        change_request: str,
+        iw_overview: str,
+        test_case_type: str,
+        title: str,
+        priority: str,
+        existing_test_cases: List[Dict[str, Any]],
+        session_id: str = None
+    ) -> Dict[str, Any]:
+        """Async version of generate_test_case."""
+        prompt = self._generate_prompt(
+            change_request, iw_overview, test_case_type, title, priority, existing_test_cases
+        )
+        return await self._call_with_schema_retry_async(prompt, session_id, "generate test case")
+    
+    async def update_existing_test_case_async(
+        self,
+        change_request: str,
+        iw_overview: str,
+        original_test_case: Dict[str, Any],
+        required_changes: List[str],
+        session_id: str = None
+    ) -> Dict[str, Any]:
+        """Async version of update_existing_test_case."""
+        prompt = self._update_prompt(change_request, iw_overview, original_test_case, required_changes)
+        return await self._call_with_schema_retry_async(prompt, session_id, "update test case")
@@ -0,0 +1,217 @@
+"""
+Metadata Store
+Offset-indexed, memory-mapped record store for vector database metadata.
+"""
+
+import os
+import re
+import json
+import mmap
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+
+class MetadataStore:
+    """
+    Append-only packed record store keyed by FAISS ID.
+
+    Records are compact JSON documents appended to a numbered records file
+    (``metadata_<n>.bin``). A small index array (FAISS ID, offset, length)
+    sorted by FAISS ID lives in ``metadata_index.npz`` together with the name
+    of the records file it points into. Opening the store only reads the
+    index; records are decoded lazily from a read-only mmap, so a top-k query
+    decodes k rows. Replaced and removed records become garbage that is
+    compacted away once it outweighs the live data: compaction writes the
+    next numbered records file and atomically switches the index to it, so a
+    crash at any point leaves an index matching its records file.
+    """
+
+    INDEX_DTYPE = np.dtype([('faiss_id', '<i8'), ('offset', '<i8'), ('length', '<i8')])
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the metadata store.
+
+        Args:
+            db_path: Directory holding the store files
+        """
+        self.db_path = Path(db_path)
+        self.records_file = self.db_path / "metadata_0.bin"
+        self.index_file = self.db_path / "metadata_index.npz"
+        # Unversioned layout: one records file and a bare index array
+        self.legacy_records_file = self.db_path / "metadata.bin"
+        self.legacy_index_file = self.db_path / "metadata_index.npy"
+
+        self._index = np.zeros(0, dtype=self.INDEX_DTYPE)
+        self._pending: Dict[int, Optional[bytes]] = {}  # FAISS ID -> encoded record, None if removed
+        self._mmap: Optional[mmap.mmap] = None
+        self._records_size = 0
+
+        self._load()
+
+    def _load(self) -> None:
+        """Load the index array and map the records file it points into."""
+        if self.index_file.exists():
+            with np.load(self.index_file) as saved:
+                records_file = self.db_path / str(saved['records_file'])
+                if records_file.exists():
+                    self._index, self.records_file = saved['index'], records_file
+        elif self.legacy_index_file.exists() and self.legacy_records_file.exists():
+            self._index, self.records_file = np.load(self.legacy_index_file), self.legacy_records_file
+        self._remap()
+
+    def _remap(self) -> None:
+        """(Re)open the read-only mmap over the records file."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+        self._records_size = self.records_file.stat().st_size if self.records_file.exists() else 0
+        if self._records_size > 0:
+            with open(self.records_file, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _find(self, faiss_id: int) -> int:
+        """Return the index row of a persisted FAISS ID, or -1."""
+        position = int(np.searchsorted(self._index['faiss_id'], faiss_id))
+        if position < len(self._index) and self._index['faiss_id'][position] == faiss_id:
+            return position
+        return -1
+
+    def __len__(self) -> int:
+        """Number of live records, including unsaved changes."""
+        count = len(self._index)
+        for faiss_id, record in self._pending.items():
+            persisted = self._find(faiss_id) >= 0
+            if record is None and persisted:
+                count -= 1
+            elif record is not None and not persisted:
+                count += 1
+        return count
+
+    def __contains__(self, faiss_id: int) -> bool:
+        """Check whether a FAISS ID has a live record."""
+        if faiss_id in self._pending:
+            return self._pending[faiss_id] is not None
+        return self._find(faiss_id) >= 0
+
+    def get(self, faiss_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Decode the record of a single FAISS ID.
+
+        Args:
+            faiss_id: FAISS ID of the record
+
+        Returns:
+            The stored document, or None if there is none
+        """
+        if faiss_id in self._pending:
+            record = self._pending[faiss_id]
+            return json.loads(record) if record is not None else None
+
+        position = self._find(faiss_id)
+        if position < 0:
+            return None
+        offset, length = int(self._index['offset'][position]), int(self._index['length'][position])
+        return json.loads(self._mmap[offset:offset + length])
+
+    def get_many(self, faiss_ids: List[int]) -> List[Optional[Dict[str, Any]]]:
+        """Decode the records of several FAISS IDs."""
+        return [self.get(int(faiss_id)) for faiss_id in faiss_ids]
+
+    def put(self, faiss_id: int, document: Dict[str, Any]) -> None:
+        """Insert or replace the record of a FAISS ID (persisted on save)."""
+        self._pending[int(faiss_id)] = json.dumps(document, separators=(',', ':')).encode('utf-8')
+
+    def remove(self, faiss_id: int) -> None:
+        """Remove the record of a FAISS ID (persisted on save)."""
+        self._pending[int(faiss_id)] = None
+
+    def clear(self) -> None:
+        """Drop all records, persisted and pending."""
+        self._index = np.zeros(0, dtype=self.INDEX_DTYPE)
+        self._pending = {}
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._records_size = 0
+        for path in [self.index_file, self.legacy_index_file, self.legacy_records_file] + self._numbered_records_files():
+            if path.exists():
+                path.unlink()
+        self.records_file = self.db_path / "metadata_0.bin"
+
+    def _numbered_records_files(self) -> List[Path]:
+        """All numbered records files, including ones left by an interrupted compaction."""
+        return list(self.db_path.glob("metadata_*.bin"))
+
+    def save(self) -> None:
+        """Append pending records and rewrite the index array."""
+        if not self._pending and self.index_file.exists():
+            return
+
+        changed_ids = np.fromiter(self._pending, dtype=np.int64, count=len(self._pending))
+        kept = self._index[~np.isin(self._index['faiss_id'], changed_ids)]
+
+        new_rows = []
+        offset = self._records_size
+        self.db_path.mkdir(exist_ok=True)
+        with open(self.records_file, 'ab') as f:
+            for faiss_id, record in self._pending.items():
+                if record is None:
+                    continue
+                f.write(record)
+                new_rows.append((faiss_id, offset, len(record)))
+                offset += len(record)
+            f.flush()
+            os.fsync(f.fileno())
+
+        index = np.concatenate([kept, np.array(new_rows, dtype=self.INDEX_DTYPE)])
+        index.sort(order='faiss_id')
+        self._write_index(index)
+        self._pending = {}
+        self._remap()
+
+        # Compact once garbage outweighs live records
+        if self._records_size > 2 * int(self._index['length'].sum()) + 4096:
+            self.compact()
+
+    def _write_index(self, index: np.ndarray, records_file: Optional[Path] = None) -> None:
+        """Atomically replace the index array and the records file it points into."""
+        records_file = records_file or self.records_file
+        tmp_path = self.index_file.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, index=index, records_file=np.array(records_file.name))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_file)
+        self._index = index
+        self.records_file = records_file
+        if self.legacy_index_file.exists():
+            self.legacy_index_file.unlink()
+
+    def compact(self) -> None:
+        """Write live records only to the next records file and switch the index to it."""
+        match = re.fullmatch(r"metadata_(\d+)\.bin", self.records_file.name)
+        records_file = self.db_path / f"metadata_{int(match.group(1)) + 1 if match else 1}.bin"
+
+        index = self._index.copy()
+        with open(records_file, 'wb') as f:
+            for start, length in zip(index['offset'].tolist(), index['length'].tolist()):
+                f.write(self._mmap[start:start + length])
+            f.flush()
+            os.fsync(f.fileno())
+        index['offset'] = np.concatenate([[0], np.cumsum(index['length'])[:-1]]) if len(index) else []
+
+        previous = self.records_file
+        self._write_index(index, records_file)
+        self._remap()
+        if previous.exists():
+            previous.unlink()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics."""
+        return {
+            'metadata_records': len(self),
+            'metadata_bytes': self._records_size
+        }
@@ -0,0 +1,226 @@
+"""
+Metrics Exporter
+Serves ObservabilityManager aggregates over HTTP in OpenMetrics text format.
+"""
+
+import os
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Any, Optional, Callable
+from .observability import ObservabilityManager, LatencyHistogram
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Fixed histogram boundaries so every scrape exposes the same series
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 60.0, 120.0, 300.0]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _family(lines: List[str], name: str, metric_type: str, help_text: str, unit: str = "") -> None:
+    """Append the metadata lines of a metric family."""
+    lines.append(f"# TYPE {name} {metric_type}")
+    if unit:
+        lines.append(f"# UNIT {name} {unit}")
+    lines.append(f"# HELP {name} {help_text}")
+
+
+def _histogram_lines(lines: List[str], name: str, stage: str, histogram: LatencyHistogram) -> None:
+    """Append the samples of one latency histogram, mapped onto LATENCY_BUCKETS."""
+    label = f'stage="{_escape(stage)}"'
+    bounds = sorted(histogram.buckets)
+    cumulative = 0
+    position = 0
+    for le in LATENCY_BUCKETS:
+        # A log bucket is counted once its upper bound fits under the boundary
+        while position < len(bounds) and LatencyHistogram.bucket_upper_bound(bounds[position]) <= le:
+            cumulative += histogram.buckets[bounds[position]]
+            position += 1
+        lines.append(f'{name}_bucket{{{label},le="{le}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{label},le="+Inf"}} {histogram.count}')
+    lines.append(f'{name}_count{{{label}}} {histogram.count}')
+    lines.append(f'{name}_sum{{{label}}} {histogram.sum}')
+
+
+def render_openmetrics(
+    observability: ObservabilityManager,
+    vector_stats: Optional[Callable[[], Dict[str, Any]]] = None
+) -> str:
+    """
+    Render the current metrics in OpenMetrics text format.
+
+    Only the pre-aggregated counters and histograms are read, so the cost is
+    independent of how many sessions have been recorded.
+
+    Args:
+        observability: Source of the counters and latency histograms
+        vector_stats: Optional callable returning vector store stats
+            ('total_documents', 'index_memory_bytes')
+
+    Returns:
+        Exposition text ending with '# EOF'
+    """
+    snapshot = observability.get_aggregate_snapshot()
+    counters = {key: snapshot.get(key, 0) for key in (
+        "successful_requests", "failed_requests", "total_tokens_used", "total_prompt_tokens",
+        "total_completion_tokens", "total_cached_prompt_tokens", "total_cost",
+        "retry_attempts", "schema_validation_failures", "test_cases_generated",
+        "test_cases_updated", "llm_cache_hits", "llm_cache_misses"
+    )}
+    histograms = snapshot["latency"]
+
+    lines: List[str] = []
+
+    _family(lines, "copilot_requests", "counter", "Processed change requests by outcome.")
+    lines.append(f'copilot_requests_total{{status="success"}} {counters["successful_requests"]}')
+    lines.append(f'copilot_requests_total{{status="error"}} {counters["failed_requests"]}')
+
+    for name, key, help_text, unit in (
+        ("copilot_llm_tokens", "total_tokens_used", "LLM tokens used by completed requests.", ""),
+        ("copilot_llm_prompt_tokens", "total_prompt_tokens", "LLM prompt tokens of completed requests.", ""),
+        ("copilot_llm_completion_tokens", "total_completion_tokens", "LLM completion tokens of completed requests.", ""),
+        ("copilot_llm_cached_prompt_tokens", "total_cached_prompt_tokens", "LLM prompt tokens served from the provider's prompt cache.", ""),
+        ("copilot_llm_cost_dollars", "total_cost", "Estimated LLM cost of completed requests.", "dollars"),
+        ("copilot_retries", "retry_attempts", "LLM retry attempts.", ""),
+        ("copilot_schema_validation_failures", "schema_validation_failures", "Generated test cases that failed schema validation.", ""),
+        ("copilot_test_cases_generated", "test_cases_generated", "New test cases written.", ""),
+        ("copilot_test_cases_updated", "test_cases_updated", "Existing test cases updated.", ""),
+    ):
+        _family(lines, name, "counter", help_text, unit)
+        lines.append(f"{name}_total {counters[key]}")
+
+    _family(lines, "copilot_llm_cache_lookups", "counter", "LLM response cache lookups by result.")
+    lines.append(f'copilot_llm_cache_lookups_total{{result="hit"}} {counters["llm_cache_hits"]}')
+    lines.append(f'copilot_llm_cache_lookups_total{{result="miss"}} {counters["llm_cache_misses"]}')
+
+    lookups = counters["llm_cache_hits"] + counters["llm_cache_misses"]
+    _family(lines, "copilot_llm_cache_hit_ratio", "gauge", "Share of LLM cache lookups that were hits.")
+    lines.append(f"copilot_llm_cache_hit_ratio {counters['llm_cache_hits'] / lookups if lookups else 0.0}")
+
+    _family(lines, "copilot_stage_duration_seconds", "histogram",
+            "Duration of pipeline stages and LLM calls.", "seconds")
+    for stage, histogram in histograms.items():
+        _histogram_lines(lines, "copilot_stage_duration_seconds", stage, histogram)
+
+    if vector_stats is not None:
+        try:
+            stats = vector_stats()
+            _family(lines, "copilot_vector_index_documents", "gauge", "Documents in the FAISS index.")
+            lines.append(f"copilot_vector_index_documents {stats.get('total_documents', 0)}")
+            if 'index_memory_bytes' in stats:
+                _family(lines, "copilot_vector_index_memory_bytes", "gauge",
+                        "Approximate memory used by the FAISS index.", "bytes")
+                lines.append(f"copilot_vector_index_memory_bytes {stats['index_memory_bytes']}")
+        except Exception as e:
+            print(f"Warning: Could not read vector store stats: {str(e)}")
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def persisted_vector_stats(db_path: str = "faiss_db") -> Dict[str, Any]:
+    """
+    Read vector store size from the files on disk, without loading the index.
+
+    The document count comes from the index info file, which every save
+    rewrites, so a scrape does not open the metadata store.
+
+    Args:
+        db_path: Directory of the FAISS database
+
+    Returns:
+        'total_documents' and, if the index was saved, 'index_memory_bytes'
+        approximated by the size of the serialized index
+    """
+    info: Dict[str, Any] = {}
+    info_file = os.path.join(db_path, "index_info.json")
+    if os.path.exists(info_file):
+        with open(info_file, 'r') as f:
+            info = json.load(f)
+    stats: Dict[str, Any] = {'total_documents': info.get('total_documents', 0)}
+    generation = info.get('index_generation', 0)
+    index_file = os.path.join(db_path, f"faiss_index_{generation}.bin")
+    if os.path.exists(index_file):
+        stats['index_memory_bytes'] = os.path.getsize(index_file)
+    return stats
+
+
+class MetricsExporter:
+    """Background HTTP server exposing copilot metrics at /metrics."""
+
+    def __init__(
+        self,
+        observability: ObservabilityManager,
+        vector_stats: Optional[Callable[[], Dict[str, Any]]] = None,
+        host: str = "127.0.0.1",
+        port: int = 9464,
+        reload_on_scrape: bool = False
+    ):
+        """
+        Initialize the exporter.
+
+        Args:
+            observability: Source of the metrics
+            vector_stats: Optional callable returning vector store stats
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            reload_on_scrape: Pick up events logged by other processes before each
+                scrape (for a standalone exporter next to separate workers)
+        """
+        self.observability = observability
+        self.vector_stats = vector_stats
+        self.reload_on_scrape = reload_on_scrape
+
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes are too frequent to log
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL of the metrics endpoint."""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def render(self) -> str:
+        """Render the metrics exposition."""
+        if self.reload_on_scrape:
+            self.observability.reload_if_changed()
+        return render_openmetrics(self.observability, self.vector_stats)
+
+    def start(self) -> "MetricsExporter":
+        """Serve in a daemon thread."""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="metrics-exporter", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve in the calling thread until interrupted."""
+        self.server.serve_forever()
+
+    def stop(self) -> None:
+        """Stop serving and release the port."""
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
@@ -1,96 +1,401 @@
 import time
 import json
 import os
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+import math
+import uuid
+import threading
+from itertools import islice
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterator, TextIO
+from datetime import datetime, timedelta
 from .config import Config
 
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram.
+    
+    Bucket ``i`` holds values in (2^((i-1)/8), 2^(i/8)] seconds, so quantiles
+    are accurate to within ~9% at any scale while memory stays bounded by the
+    dynamic range (a few hundred buckets from microseconds to hours).
+    """
+    
+    BUCKETS_PER_DOUBLING = 8
+    MIN_SECONDS = 1e-6
+    
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+    
+    @classmethod
+    def bucket_index(cls, seconds: float) -> int:
+        """Index of the bucket a value falls into."""
+        return math.ceil(math.log2(max(seconds, cls.MIN_SECONDS)) * cls.BUCKETS_PER_DOUBLING)
+    
+    @classmethod
+    def bucket_upper_bound(cls, index: int) -> float:
+        """Inclusive upper bound of a bucket in seconds."""
+        return 2 ** (index / cls.BUCKETS_PER_DOUBLING)
+    
+    def record(self, seconds: float) -> None:
+        """Add one observation."""
+        index = self.bucket_index(seconds)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+    
+    def percentile(self, percent: float) -> float:
+        """
+        Estimate a percentile.
+        
+        Args:
+            percent: Percentile between 0 and 100
+            
+        Returns:
+            Upper bound of the bucket holding the percentile, clamped to the observed range
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(max(self.bucket_upper_bound(index), self.min), self.max)
+        return self.max
+    
+    def summary(self) -> Dict[str, Any]:
+        """Count, mean, max and p50/p95/p99 in seconds."""
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count, 4) if self.count else 0.0,
+            "p50": round(self.percentile(50), 4),
+            "p95": round(self.percentile(95), 4),
+            "p99": round(self.percentile(99), 4),
+            "max": round(self.max, 4)
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for the metrics snapshot."""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max,
+            "buckets": {str(index): n for index, n in sorted(self.buckets.items())}
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        """Deserialize from the metrics snapshot."""
+        histogram = cls()
+        histogram.count = data.get("count", 0)
+        histogram.sum = data.get("sum", 0.0)
+        histogram.min = data["min"] if data.get("min") is not None else math.inf
+        histogram.max = data.get("max", 0.0)
+        histogram.buckets = {int(index): n for index, n in data.get("buckets", {}).items()}
+        return histogram
+
 class ObservabilityManager:
-    """Manages observability metrics and logging for the AI Test Copilot."""
+    """
+    Manages observability metrics and logging for the AI Test Copilot.
+    
+    Every event is appended as one JSON line to ``metrics_events.jsonl`` and
+    applied to the in-memory aggregates, so logging an event costs one small
+    append regardless of history size. Once the log grows past
+    COMPACTION_THRESHOLD_BYTES it is folded into the ``metrics.json`` snapshot
+    and truncated. Loading replays the log on top of the snapshot. Appends and
+    compaction hold an exclusive file lock, so concurrent processes never
+    clobber each other's events.
+    
+    Sessions are kept in a dict keyed by session ID, in start order. Only the
+    newest METRICS_SESSION_RETENTION sessions younger than
+    METRICS_SESSION_MAX_AGE_DAYS are kept individually; older ones are rolled
+    up into bounded hourly and daily aggregates. The retention count skips
+    running sessions, so their end is still applied; only the age limit rolls
+    them up, as abandoned.
+    """
+    
+    COMPACTION_THRESHOLD_BYTES = 1024 * 1024
+    HOURLY_ROLLUPS = 24 * 7
+    DAILY_ROLLUPS = 366
     
     def __init__(self):
         """Initialize the observability manager."""
         self.metrics_file = os.path.join(Config.REPORTS_DIR, "metrics.json")
+        self.events_file = os.path.join(Config.REPORTS_DIR, "metrics_events.jsonl")
+        # LLM calls run concurrently, so events may arrive from several threads
+        self._lock = threading.RLock()
+        self._log: Optional[TextIO] = None
+        self.session_retention = Config.METRICS_SESSION_RETENTION
+        self.session_max_age = timedelta(days=Config.METRICS_SESSION_MAX_AGE_DAYS)
         self.metrics = self._load_metrics()
+        self._loaded_signature = self._file_signature()
     
-    def _load_metrics(self) -> Dict[str, Any]:
-        """Load existing metrics from file."""
-        if os.path.exists(self.metrics_file):
-            try:
-                with open(self.metrics_file, 'r') as f:
-                    return json.load(f)
-            except Exception:
-                pass
-        
+    @staticmethod
+    def _empty_metrics() -> Dict[str, Any]:
+        """Metrics of a fresh installation."""
         return {
             "total_requests": 0,
             "successful_requests": 0,
             "failed_requests": 0,
             "total_tokens_used": 0,
+            "total_prompt_tokens": 0,
+            "total_completion_tokens": 0,
+            "total_cached_prompt_tokens": 0,
             "total_cost": 0.0,
             "average_response_time": 0.0,
             "schema_validation_failures": 0,
             "retry_attempts": 0,
             "test_cases_generated": 0,
             "test_cases_updated": 0,
-            "sessions": []
+            "llm_cache_hits": 0,
+            "llm_cache_misses": 0,
+            "sessions": {},
+            "rollups": {"hourly": {}, "daily": {}},
+            "latency": {}
+        }
+    
+    def _load_metrics(self) -> Dict[str, Any]:
+        """Load the metrics snapshot and replay the event log on top of it."""
+        try:
+            with self._locked_log() as log:
+                return self._read_state(log)
+        except Exception as e:
+            print(f"Warning: Failed to load metrics event log: {str(e)}")
+            return self._read_snapshot()
+    
+    def _file_signature(self) -> tuple:
+        """Modification time and size of the snapshot and the event log."""
+        signature = []
+        for path in (self.metrics_file, self.events_file):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+    
+    def reload_if_changed(self) -> bool:
+        """
+        Pick up events written by other processes since the last load.
+        
+        Returns:
+            True if the metrics were reloaded
+        """
+        with self._lock:
+            signature = self._file_signature()
+            if signature == self._loaded_signature:
+                return False
+            self.metrics = self._load_metrics()
+            self._loaded_signature = signature
+            return True
+    
+    def _read_snapshot(self) -> Dict[str, Any]:
+        """Read the compacted metrics snapshot."""
+        metrics = self._empty_metrics()
+        if os.path.exists(self.metrics_file):
+            try:
+                with open(self.metrics_file, 'r') as f:
+                    metrics.update(json.load(f))
+            except Exception:
+                pass
+        # Snapshots store sessions as a list, oldest first
+        if isinstance(metrics["sessions"], list):
+            metrics["sessions"] = {s.get("session_id"): s for s in metrics["sessions"]}
+        metrics["latency"] = {
+            stage: LatencyHistogram.from_dict(data) if isinstance(data, dict) else data
+            for stage, data in metrics["latency"].items()
         }
+        return metrics
+    
+    def _read_state(self, log: TextIO) -> Dict[str, Any]:
+        """Rebuild the metrics from the snapshot plus the event log (lock held)."""
+        metrics = self._read_snapshot()
+        log.seek(0)
+        header = log.readline()
+        # A log whose ID the snapshot already records was compacted right before a crash
+        if header and json.loads(header).get("log_id") != metrics.get("compacted_log_id"):
+            for line in log:
+                try:
+                    self._apply_event(metrics, json.loads(line))
+                except ValueError:
+                    continue  # Torn final line from a crashed writer
+        self._expire_sessions(metrics, datetime.now())
+        return metrics
+    
+    @contextmanager
+    def _locked_log(self) -> Iterator[TextIO]:
+        """Open the event log once and hold its exclusive lock for the block."""
+        with self._lock:
+            if self._log is None:
+                os.makedirs(os.path.dirname(self.events_file) or '.', exist_ok=True)
+                self._log = open(self.events_file, 'a+', encoding='utf-8')
+            if fcntl:
+                fcntl.flock(self._log.fileno(), fcntl.LOCK_EX)
+            try:
+                yield self._log
+            finally:
+                if fcntl:
+                    fcntl.flock(self._log.fileno(), fcntl.LOCK_UN)
+    
+    @staticmethod
+    def _start_log(log: TextIO) -> None:
+        """Truncate the event log and write a header with a fresh log ID (lock held)."""
+        log.seek(0)
+        log.truncate()
+        log.write(json.dumps({"type": "log_start", "log_id": uuid.uuid4().hex}) + "\n")
+        log.flush()
+    
+    def _record(self, event: Dict[str, Any]) -> None:
+        """Apply an event in memory and append it to the event log."""
+        with self._lock:
+            self._apply_event(self.metrics, event)
+            try:
+                with self._locked_log() as log:
+                    log.seek(0, os.SEEK_END)
+                    if log.tell() == 0:
+                        self._start_log(log)
+                    log.write(json.dumps(event, separators=(',', ':')) + "\n")
+                    log.flush()
+                    if log.tell() > self.COMPACTION_THRESHOLD_BYTES:
+                        self._compact(log)
+            except Exception as e:
+                print(f"Warning: Failed to save metrics: {str(e)}")
+    
+    def _compact(self, log: TextIO) -> None:
+        """Fold the event log into the snapshot and start a new log (lock held)."""
+        metrics = self._read_state(log)
+        log.seek(0)
+        header = log.readline()
+        if header:
+            metrics["compacted_log_id"] = json.loads(header).get("log_id")
+        self._write_snapshot(metrics)
+        self._start_log(log)
+        self.metrics = metrics
+    
+    def _write_snapshot(self, metrics: Dict[str, Any]) -> None:
+        """Atomically replace the metrics snapshot."""
+        tmp_path = f"{self.metrics_file}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                **metrics,
+                "sessions": list(metrics["sessions"].values()),
+                "latency": {stage: histogram.to_dict() for stage, histogram in metrics["latency"].items()}
+            }, f, indent=2)
+        os.replace(tmp_path, self.metrics_file)
     
     def _save_metrics(self) -> None:
-        """Save metrics to file."""
+        """Compact all logged events into the metrics snapshot."""
         try:
-            with open(self.metrics_file, 'w') as f:
-                json.dump(self.metrics, f, indent=2)
+            with self._locked_log() as log:
+                self._compact(log)
         except Exception as e:
             print(f"Warning: Failed to save metrics: {str(e)}")
     
-    def start_session(self, session_id: str, change_request_path: str) -> None:
-        """Start a new processing session."""
-        session = {
-            "session_id": session_id,
-            "change_request_path": change_request_path,
-            "start_time": datetime.now().isoformat(),
-            "end_time": None,
-            "status": "running",
-            "tokens_used": 0,
-            "cost": 0.0,
-            "test_cases_generated": 0,
-            "test_cases_updated": 0,
-            "retry_attempts": 0,
-            "schema_validation_failures": 0,
-            "errors": []
-        }
+    def _apply_event(self, metrics: Dict[str, Any], event: Dict[str, Any]) -> None:
+        """Apply one logged event to a metrics state."""
+        event_type = event.get("type")
         
-        self.metrics["sessions"].append(session)
-        self._save_metrics()
-    
-    def end_session(self, session_id: str, status: str, **kwargs) -> None:
-        """End a processing session."""
-        session = self._get_current_session(session_id)
+        if event_type == "session_start":
+            metrics["sessions"][event["session_id"]] = {
+                "session_id": event["session_id"],
+                "change_request_path": event.get("change_request_path"),
+                "start_time": event["time"],
+                "end_time": None,
+                "status": "running",
+                "tokens_used": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cached_prompt_tokens": 0,
+                "cost": 0.0,
+                "test_cases_generated": 0,
+                "test_cases_updated": 0,
+                "llm_cache_hits": 0,
+                "llm_cache_misses": 0,
+                "retry_attempts": 0,
+                "schema_validation_failures": 0,
+                "errors": []
+            }
+            self._expire_sessions(metrics, datetime.fromisoformat(event["time"]))
+            return
+        
+        if event_type == "cache":
+            key = "llm_cache_hits" if event.get("hit") else "llm_cache_misses"
+            metrics[key] = metrics.get(key, 0) + 1
+        elif event_type == "latency":
+            histogram = metrics["latency"].get(event["stage"])
+            if histogram is None:
+                histogram = metrics["latency"][event["stage"]] = LatencyHistogram()
+            histogram.record(event["seconds"])
+        
+        session = self._find_session(metrics, event.get("session_id"))
         if not session:
             return
         
-        session["end_time"] = datetime.now().isoformat()
+        if event_type == "session_end":
+            self._apply_session_end(metrics, session, event)
+        elif event_type == "llm_call":
+            session["tokens_used"] = session.get("tokens_used", 0) + event.get("tokens_used", 0)
+            session["prompt_tokens"] = session.get("prompt_tokens", 0) + event.get("prompt_tokens", 0)
+            session["completion_tokens"] = session.get("completion_tokens", 0) + event.get("completion_tokens", 0)
+            session["cached_prompt_tokens"] = session.get("cached_prompt_tokens", 0) + event.get("cached_tokens", 0)
+            session["cost"] = session.get("cost", 0.0) + event.get("cost", 0.0)
+        elif event_type == "schema_validation_failure":
+            session["schema_validation_failures"] = session.get("schema_validation_failures", 0) + 1
+            session["errors"].append(f"Schema validation failure: {event.get('error')}")
+        elif event_type == "retry":
+            session["retry_attempts"] = session.get("retry_attempts", 0) + 1
+            session["errors"].append(f"Retry attempt: {event.get('reason')}")
+        elif event_type == "test_case_operation":
+            if event.get("operation") == "generated":
+                session["test_cases_generated"] = session.get("test_cases_generated", 0) + event.get("count", 1)
+            elif event.get("operation") == "updated":
+                session["test_cases_updated"] = session.get("test_cases_updated", 0) + event.get("count", 1)
+        elif event_type == "cache":
+            key = "llm_cache_hits" if event.get("hit") else "llm_cache_misses"
+            session[key] = session.get(key, 0) + 1
+        elif event_type == "latency":
+            stage_seconds = session.setdefault("stage_seconds", {})
+            stage_seconds[event["stage"]] = round(stage_seconds.get(event["stage"], 0.0) + event["seconds"], 6)
+    
+    def _apply_session_end(self, metrics: Dict[str, Any], session: Dict[str, Any], event: Dict[str, Any]) -> None:
+        """Close a session and fold it into the global aggregates."""
+        status = event["status"]
+        session["end_time"] = event["time"]
         session["status"] = status
         
         # Update session with provided metrics
-        for key, value in kwargs.items():
+        for key, value in event.get("fields", {}).items():
             if key in session:
                 session[key] = value
         
         # Update global metrics
-        self.metrics["total_requests"] += 1
+        metrics["total_requests"] += 1
         if status == "success":
-            self.metrics["successful_requests"] += 1
+            metrics["successful_requests"] += 1
         else:
-            self.metrics["failed_requests"] += 1
+            metrics["failed_requests"] += 1
         
-        self.metrics["total_tokens_used"] += session.get("tokens_used", 0)
-        self.metrics["total_cost"] += session.get("cost", 0.0)
-        self.metrics["test_cases_generated"] += session.get("test_cases_generated", 0)
-        self.metrics["test_cases_updated"] += session.get("test_cases_updated", 0)
-        self.metrics["retry_attempts"] += session.get("retry_attempts", 0)
-        self.metrics["schema_validation_failures"] += session.get("schema_validation_failures", 0)
+        metrics["total_tokens_used"] += session.get("tokens_used", 0)
+        metrics["total_prompt_tokens"] += session.get("prompt_tokens", 0)
+        metrics["total_completion_tokens"] += session.get("completion_tokens", 0)
+        metrics["total_cached_prompt_tokens"] += session.get("cached_prompt_tokens", 0)
+        metrics["total_cost"] += session.get("cost", 0.0)
+        metrics["test_cases_generated"] += session.get("test_cases_generated", 0)
+        metrics["test_cases_updated"] += session.get("test_cases_updated", 0)
+        metrics["retry_attempts"] += session.get("retry_attempts", 0)
+        metrics["schema_validation_failures"] += session.get("schema_validation_failures", 0)
         
         # Calculate average response time
         if session["start_time"] and session["end_time"]:
@@ -98,93 +403,230 @@ class ObservabilityManager:
             end_time = datetime.fromisoformat(session["end_time"])
             response_time = (end_time - start_time).total_seconds()
             
-            # Update running average
-            total_sessions = len([s for s in self.metrics["sessions"] if s.get("end_time")])
-            if total_sessions > 0:
-                current_avg = self.metrics["average_response_time"]
-                self.metrics["average_response_time"] = (
-                    (current_avg * (total_sessions - 1) + response_time) / total_sessions
-                )
+            # Update running average over all completed sessions
+            total_sessions = metrics["total_requests"]
+            current_avg = metrics["average_response_time"]
+            metrics["average_response_time"] = (
+                (current_avg * (total_sessions - 1) + response_time) / total_sessions
+            )
+    
+    def _expire_sessions(self, metrics: Dict[str, Any], now: datetime) -> None:
+        """Roll up the oldest ended sessions beyond the retention count, and all sessions beyond the age."""
+        sessions = metrics["sessions"]
+        cutoff = (now - self.session_max_age).isoformat()
+        excess = len(sessions) - self.session_retention
+        expired = []
+        for session_id, session in sessions.items():
+            too_old = (session.get("start_time") or "") < cutoff
+            if too_old or (excess > 0 and session.get("end_time")):
+                expired.append(session_id)
+                excess -= 1
+            elif excess <= 0:
+                break  # Later sessions are younger, and the count is within the retention
+        
+        for session_id in expired:
+            self._roll_up(metrics, sessions.pop(session_id))
+    
+    def _roll_up(self, metrics: Dict[str, Any], session: Dict[str, Any]) -> None:
+        """Fold an expired session into its hourly and daily aggregates."""
+        start_time = session.get("start_time") or ""
+        rollups = metrics.setdefault("rollups", {"hourly": {}, "daily": {}})
+        response_time = 0.0
+        if start_time and session.get("end_time"):
+            response_time = (
+                datetime.fromisoformat(session["end_time"]) - datetime.fromisoformat(start_time)
+            ).total_seconds()
         
-        self._save_metrics()
+        for granularity, key, limit in (("hourly", start_time[:13], self.HOURLY_ROLLUPS),
+                                        ("daily", start_time[:10], self.DAILY_ROLLUPS)):
+            buckets = rollups[granularity]
+            bucket = buckets.setdefault(key, {
+                "sessions": 0, "successful": 0, "failed": 0, "tokens_used": 0, "cost": 0.0,
+                "test_cases_generated": 0, "test_cases_updated": 0, "total_response_time": 0.0
+            })
+            bucket["sessions"] += 1
+            if session.get("status") == "success":
+                bucket["successful"] += 1
+            elif session.get("end_time"):
+                bucket["failed"] += 1
+            bucket["tokens_used"] += session.get("tokens_used", 0)
+            bucket["cost"] += session.get("cost", 0.0)
+            bucket["test_cases_generated"] += session.get("test_cases_generated", 0)
+            bucket["test_cases_updated"] += session.get("test_cases_updated", 0)
+            bucket["total_response_time"] += response_time
+            
+            # Sessions expire in start order, so the first bucket is the oldest
+            while len(buckets) > limit:
+                del buckets[next(iter(buckets))]
+    
+    def start_session(self, session_id: str, change_request_path: str) -> None:
+        """Start a new processing session."""
+        self._record({
+            "type": "session_start",
+            "session_id": session_id,
+            "change_request_path": change_request_path,
+            "time": datetime.now().isoformat()
+        })
+    
+    def end_session(self, session_id: str, status: str, **kwargs) -> None:
+        """End a processing session."""
+        with self._lock:
+            if not self._get_current_session(session_id):
+                return
+            self._record({
+                "type": "session_end",
+                "session_id": session_id,
+                "status": status,
+                "time": datetime.now().isoformat(),
+                "fields": kwargs
+            })
+    
+    @staticmethod
+    def _find_session(metrics: Dict[str, Any], session_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Find a session of a metrics state by ID."""
+        if not session_id:
+            return None
+        return metrics["sessions"].get(session_id)
     
     def _get_current_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get the current session by ID."""
-        for session in reversed(self.metrics["sessions"]):
-            if session.get("session_id") == session_id:
-                return session
-        return None
-    
-    def log_llm_call(self, session_id: str, model: str, tokens_used: int, cost: float) -> None:
-        """Log an LLM API call."""
-        session = self._get_current_session(session_id)
-        if session:
-            session["tokens_used"] = session.get("tokens_used", 0) + tokens_used
-            session["cost"] = session.get("cost", 0.0) + cost
-            self._save_metrics()
+        return self._find_session(self.metrics, session_id)
+    
+    def log_llm_call(
+        self,
+        session_id: str,
+        model: str,
+        tokens_used: int,
+        cost: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        cached_tokens: int = 0
+    ) -> None:
+        """Log an LLM API call, with its prompt/completion token split and provider-cached prompt tokens when known."""
+        self._record({
+            "type": "llm_call",
+            "session_id": session_id,
+            "model": model,
+            "tokens_used": tokens_used,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+            "cost": cost
+        })
     
     def log_schema_validation_failure(self, session_id: str, error: str) -> None:
         """Log a schema validation failure."""
-        session = self._get_current_session(session_id)
-        if session:
-            session["schema_validation_failures"] = session.get("schema_validation_failures", 0) + 1
-            session["errors"].append(f"Schema validation failure: {error}")
-            self._save_metrics()
+        self._record({"type": "schema_validation_failure", "session_id": session_id, "error": error})
     
     def log_retry_attempt(self, session_id: str, reason: str) -> None:
         """Log a retry attempt."""
-        session = self._get_current_session(session_id)
-        if session:
-            session["retry_attempts"] = session.get("retry_attempts", 0) + 1
-            session["errors"].append(f"Retry attempt: {reason}")
-            self._save_metrics()
+        self._record({"type": "retry", "session_id": session_id, "reason": reason})
     
     def log_test_case_operation(self, session_id: str, operation: str, count: int = 1) -> None:
         """Log test case generation or update."""
-        session = self._get_current_session(session_id)
-        if session:
-            if operation == "generated":
-                session["test_cases_generated"] = session.get("test_cases_generated", 0) + count
-            elif operation == "updated":
-                session["test_cases_updated"] = session.get("test_cases_updated", 0) + count
-            self._save_metrics()
+        self._record({"type": "test_case_operation", "session_id": session_id, "operation": operation, "count": count})
+    
+    def log_cache_event(self, session_id: Optional[str], hit: bool) -> None:
+        """Log an LLM response cache hit or miss."""
+        self._record({"type": "cache", "session_id": session_id, "hit": hit})
+    
+    def record_latency(self, stage: str, seconds: float, session_id: Optional[str] = None) -> None:
+        """
+        Record how long a pipeline stage or LLM call took.
+        
+        Args:
+            stage: Stage name, e.g. "analyze" or "llm_call"
+            seconds: Elapsed wall-clock time
+            session_id: Optional session the time is attributed to
+        """
+        self._record({"type": "latency", "session_id": session_id, "stage": stage, "seconds": round(seconds, 6)})
+    
+    @contextmanager
+    def span(self, stage: str, session_id: Optional[str] = None) -> Iterator[None]:
+        """Time the enclosed block as a stage, including when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_latency(stage, time.perf_counter() - start, session_id)
+    
+    def get_latency_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Get count, mean, max and p50/p95/p99 seconds per stage."""
+        return {stage: histogram.summary() for stage, histogram in sorted(self.metrics["latency"].items())}
+    
+    def get_aggregate_snapshot(self) -> Dict[str, Any]:
+        """
+        Consistent copy of the global counters and latency histograms, taken under the lock.
+        
+        Returns:
+            The scalar global counters (e.g. "total_tokens_used"), plus "latency"
+            mapping each stage to a copy of its histogram
+        """
+        with self._lock:
+            snapshot = {key: value for key, value in self.metrics.items() if isinstance(value, (int, float))}
+            snapshot["latency"] = {
+                stage: LatencyHistogram.from_dict(histogram.to_dict())
+                for stage, histogram in sorted(self.metrics["latency"].items())
+            }
+        return snapshot
     
     def get_metrics_summary(self) -> Dict[str, Any]:
         """Get a summary of current metrics."""
-        total_sessions = len(self.metrics["sessions"])
-        successful_sessions = len([s for s in self.metrics["sessions"] if s.get("status") == "success"])
+        total_requests = self.metrics["total_requests"]
+        success_rate = (self.metrics["successful_requests"] / total_requests * 100) if total_requests > 0 else 0
         
-        success_rate = (successful_sessions / total_sessions * 100) if total_sessions > 0 else 0
+        cache_hits = self.metrics.get("llm_cache_hits", 0)
+        cache_lookups = cache_hits + self.metrics.get("llm_cache_misses", 0)
+        cache_hit_rate = (cache_hits / cache_lookups * 100) if cache_lookups > 0 else 0
+        
+        prompt_tokens = self.metrics["total_prompt_tokens"]
+        prompt_cache_hit_rate = (self.metrics["total_cached_prompt_tokens"] / prompt_tokens * 100) if prompt_tokens > 0 else 0
         
         return {
             "total_requests": self.metrics["total_requests"],
             "success_rate": round(success_rate, 2),
             "total_tokens_used": self.metrics["total_tokens_used"],
+            "total_prompt_tokens": self.metrics["total_prompt_tokens"],
+            "total_completion_tokens": self.metrics["total_completion_tokens"],
+            "total_cached_prompt_tokens": self.metrics["total_cached_prompt_tokens"],
+            "prompt_cache_hit_rate": round(prompt_cache_hit_rate, 2),
             "total_cost": round(self.metrics["total_cost"], 4),
             "average_response_time": round(self.metrics["average_response_time"], 2),
             "test_cases_generated": self.metrics["test_cases_generated"],
             "test_cases_updated": self.metrics["test_cases_updated"],
             "schema_validation_failures": self.metrics["schema_validation_failures"],
-            "retry_attempts": self.metrics["retry_attempts"]
+            "retry_attempts": self.metrics["retry_attempts"],
+            "llm_cache_hits": cache_hits,
+            "llm_cache_misses": self.metrics.get("llm_cache_misses", 0),
+            "llm_cache_hit_rate": round(cache_hit_rate, 2),
+            "latency": self.get_latency_summary()
         }
     
     def get_recent_sessions(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get recent processing sessions."""
-        return self.metrics["sessions"][-limit:]
+        """Get recent processing sessions, oldest first."""
+        recent = list(islice(reversed(self.metrics["sessions"].values()), limit))
+        return recent[::-1]
+    
+    def get_rollups(self, granularity: str = "daily") -> List[Dict[str, Any]]:
+        """
+        Get aggregates of sessions that aged out of retention.
+        
+        Args:
+            granularity: "hourly" or "daily"
+            
+        Returns:
+            One aggregate per period, oldest first
+        """
+        buckets = self.metrics.get("rollups", {}).get(granularity, {})
+        return [{"period": period, **bucket} for period, bucket in sorted(buckets.items())]
     
     def reset_metrics(self) -> None:
         """Reset all metrics (use with caution)."""
-        self.metrics = {
-            "total_requests": 0,
-            "successful_requests": 0,
-            "failed_requests": 0,
-            "total_tokens_used": 0,
-            "total_cost": 0.0,
-            "average_response_time": 0.0,
-            "schema_validation_failures": 0,
-            "retry_attempts": 0,
-            "test_cases_generated": 0,
-            "test_cases_updated": 0,
-            "sessions": []
-        }
-        self._save_metrics()
+        with self._lock:
+            self.metrics = self._empty_metrics()
+            try:
+                with self._locked_log() as log:
+                    self._write_snapshot(self.metrics)
+                    self._start_log(log)
+            except Exception as e:
+                print(f"Warning: Failed to save metrics: {str(e)}")
@@ -0,0 +1,297 @@
+"""
+Packed Corpus
+Single-file SQLite storage of test cases, plus import/export from the per-file layout.
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Callable, Iterator
+from .test_case_repository import TestCaseRepository
+
+
+class PackedTestCaseRepository(TestCaseRepository):
+    """
+    Test case repository backed by one SQLite file instead of a directory.
+
+    Test cases are rows keyed by their file name (e.g. "tc_001.json"), with
+    the ID number, type and priority as indexed columns. Every write bumps a
+    store-wide revision and stamps the row with it, so a refresh only fetches
+    rows newer than the cached revision; a cold load is one sequential scan.
+    Backups are copied into a table of the same file rather than written as
+    loose files. Reported paths are virtual: "<db path>/<file name>".
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the packed repository.
+
+        Args:
+            db_path: Path of the SQLite corpus file (created if missing)
+        """
+        super().__init__(db_path)
+        self.db_path = db_path
+        self._revision = -1
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS test_cases ("
+                "file_name TEXT PRIMARY KEY, number INTEGER, type TEXT, priority TEXT, "
+                "revision INTEGER NOT NULL, body TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS test_cases_revision ON test_cases (revision)")
+            conn.execute("CREATE INDEX IF NOT EXISTS test_cases_type ON test_cases (type)")
+            conn.execute("CREATE INDEX IF NOT EXISTS test_cases_priority ON test_cases (priority)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', 0)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS backups ("
+                "name TEXT PRIMARY KEY, file_name TEXT NOT NULL, body TEXT NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one operation, committing and closing it afterwards."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _current_revision(conn: sqlite3.Connection) -> int:
+        """Store-wide revision, bumped by every write."""
+        return conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+
+    def refresh(self, progress: Optional[Callable[[int, int], None]] = None) -> None:
+        """
+        Fetch rows written since the cached revision.
+
+        Args:
+            progress: Called as progress(done, total) after each fetched row is parsed
+        """
+        with self._lock:
+            with self._connect() as conn:
+                revision = self._current_revision(conn)
+                if revision == self._revision:
+                    return
+
+                total = conn.execute(
+                    "SELECT COUNT(*) FROM test_cases WHERE revision > ?", (self._revision,)
+                ).fetchone()[0]
+                rows = conn.execute(
+                    "SELECT file_name, revision, body FROM test_cases WHERE revision > ? ORDER BY file_name",
+                    (self._revision,)
+                )
+                for done, (file_name, row_revision, body) in enumerate(rows, 1):
+                    self._set_entry(file_name, row_revision, self._decode(file_name, body))
+                    if progress:
+                        progress(done, total)
+
+                # Rows removed by another writer leave the counts out of step
+                count = conn.execute("SELECT COUNT(*) FROM test_cases").fetchone()[0]
+                if count != len(self._entries):
+                    names = {name for (name,) in conn.execute("SELECT file_name FROM test_cases")}
+                    for file_name in [name for name in self._entries if name not in names]:
+                        self._drop_entry(file_name)
+
+            self._revision = revision
+
+    def _refresh_one(self, file_name: str) -> None:
+        """Fetch rows written since the cached revision (one query when nothing changed)."""
+        self.refresh()
+
+    def invalidate(self, file_name: Optional[str] = None) -> None:
+        """Forget cached rows so they are fetched again (all rows if file_name is None)."""
+        with self._lock:
+            super().invalidate(file_name)
+            if file_name is None:
+                self._revision = -1
+                return
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT revision, body FROM test_cases WHERE file_name = ?", (file_name,)
+                ).fetchone()
+            if row is not None:
+                self._set_entry(file_name, row[0], self._decode(file_name, row[1]))
+
+    def path_for(self, file_name: str) -> str:
+        """Virtual path of a test case inside the packed corpus."""
+        return os.path.join(self.db_path, file_name)
+
+    def fingerprint(self) -> str:
+        """Fingerprint of the corpus: changes with every write to the store."""
+        with self._connect() as conn:
+            revision = self._current_revision(conn)
+            count = conn.execute("SELECT COUNT(*) FROM test_cases").fetchone()[0]
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"packed\0{os.path.abspath(self.db_path)}\0{revision}\0{count}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def write(self, file_name: str, test_case: Dict[str, Any]) -> str:
+        """
+        Insert or replace a (clean, validated) test case.
+
+        Args:
+            file_name: Test case file name (e.g., "tc_001.json")
+            test_case: Test case without internal '_' fields
+
+        Returns:
+            The virtual path of the written test case
+        """
+        with self._connect() as conn:
+            self._write_rows(conn, [(file_name, test_case)])
+        return self.path_for(file_name)
+
+    def write_raw(self, file_name: str, content: str) -> str:
+        """Insert or replace a test case from its serialized JSON; returns its virtual path."""
+        return self.write(file_name, json.loads(content))
+
+    def delete(self, file_name: str) -> None:
+        """Remove a test case row if it exists."""
+        with self._connect() as conn:
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+            conn.execute("DELETE FROM test_cases WHERE file_name = ?", (file_name,))
+        with self._lock:
+            self._drop_entry(file_name)
+
+    def exists(self, file_name: str) -> bool:
+        """Whether the corpus has a row for the test case."""
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM test_cases WHERE file_name = ?", (file_name,)).fetchone() is not None
+
+    def backup(self, file_name: str) -> str:
+        """Copy a test case row into the backups table; returns the backup's virtual path."""
+        backup_name = self._backup_name(file_name)
+        with self._connect() as conn:
+            copied = conn.execute(
+                "INSERT INTO backups (name, file_name, body) SELECT ?, file_name, body FROM test_cases WHERE file_name = ?",
+                (backup_name, file_name)
+            ).rowcount
+        if not copied:
+            raise FileNotFoundError(f"No test case {file_name} in {self.db_path}")
+        return os.path.join(self.db_path, "backups", backup_name)
+
+    def read_backup(self, backup_name: str) -> str:
+        """Backup as pretty-printed JSON, by the name of its path; raises FileNotFoundError if missing."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT body FROM backups WHERE name = ?", (backup_name,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"No backup {backup_name} in {self.db_path}")
+        return json.dumps(json.loads(row[0]), indent=2)
+
+    def reserve_numbers(self, prefix: str = "tc_", count: int = 1, at_least: int = 0) -> List[int]:
+        """
+        Reserve numbers for new <prefix>N.json test cases from a sequence in the corpus.
+
+        The sequence is bumped inside one write transaction, so concurrent
+        processes never get the same numbers. It is seeded from the highest
+        indexed number on first use.
+
+        Args:
+            prefix: ID prefix (e.g., "tc_")
+            count: How many consecutive numbers to reserve
+            at_least: Skip numbers up to this one
+
+        Returns:
+            The reserved numbers, ascending
+        """
+        key = f"id:{prefix}"
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) "
+                "SELECT ?, COALESCE(MAX(number), 0) FROM test_cases WHERE file_name LIKE ? || '%'",
+                (key, prefix)
+            )
+            conn.execute("UPDATE meta SET value = MAX(value, ?) + ? WHERE key = ?", (at_least, count, key))
+            last = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[0]
+        return list(range(last - count + 1, last + 1))
+
+    def _sync_directory(self) -> None:
+        """Nothing to do: SQLite commits are durable on their own."""
+
+    @staticmethod
+    def _write_rows(conn: sqlite3.Connection, test_cases) -> int:
+        """Write (file name, test case) pairs under one new revision; returns the row count."""
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+        revision = PackedTestCaseRepository._current_revision(conn)
+        rows = []
+        for file_name, test_case in test_cases:
+            stem = file_name[:-5] if file_name.endswith('.json') else file_name
+            number = int(stem[3:]) if stem.startswith("tc_") and stem[3:].isdigit() else None
+            rows.append((
+                file_name, number, test_case.get('type'), test_case.get('priority'), revision,
+                json.dumps(test_case, separators=(',', ':'), ensure_ascii=False)
+            ))
+        conn.executemany(
+            "INSERT OR REPLACE INTO test_cases (file_name, number, type, priority, revision, body) "
+            "VALUES (?, ?, ?, ?, ?, ?)", rows
+        )
+        return len(rows)
+
+    def read_raw(self, file_name: str) -> str:
+        """Test case as pretty-printed JSON, like its per-file form; raises FileNotFoundError if missing."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT body FROM test_cases WHERE file_name = ?", (file_name,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"No test case {file_name} in {self.db_path}")
+        return json.dumps(json.loads(row[0]), indent=2)
+
+
+def import_directory(
+    source_dir: str,
+    db_path: str,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> int:
+    """
+    Pack a directory of per-file test cases into a SQLite corpus.
+
+    Existing rows with the same file name are replaced; unreadable files are
+    skipped with a warning.
+
+    Args:
+        source_dir: Directory of "*.json" test case files
+        db_path: SQLite corpus file to create or extend
+        progress: Called as progress(done, total) while files are read
+
+    Returns:
+        Number of test cases imported
+    """
+    test_cases = TestCaseRepository(source_dir).all(progress)
+    store = PackedTestCaseRepository(db_path)
+    with store._connect() as conn:
+        return store._write_rows(conn, (
+            (tc['_file_name'], {k: v for k, v in tc.items() if not k.startswith('_')})
+            for tc in test_cases
+        ))
+
+
+def export_directory(db_path: str, target_dir: str) -> int:
+    """
+    Unpack a SQLite corpus into one JSON file per test case.
+
+    Args:
+        db_path: SQLite corpus file
+        target_dir: Directory to write "*.json" files into (created if missing)
+
+    Returns:
+        Number of test cases exported
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"No packed corpus at {db_path}")
+
+    os.makedirs(target_dir, exist_ok=True)
+    count = 0
+    for test_case in PackedTestCaseRepository(db_path).all():
+        file_name = test_case['_file_name']
+        with open(os.path.join(target_dir, file_name), 'w') as f:
+            json.dump({k: v for k, v in test_case.items() if not k.startswith('_')}, f, indent=2)
+        count += 1
+    return count
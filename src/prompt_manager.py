@@ -1,13 +1,140 @@
 import os
-from typing import Dict, Any
+import hashlib
+import threading
+from string import Formatter
+from typing import Dict, Any, List, Optional, Tuple
 from .config import Config
 
+class PromptTemplate:
+    """A prompt template parsed once into literal text and substitution fields."""
+    
+    def __init__(self, name: str, text: str, mtime_ns: int = 0):
+        """
+        Parse a template.
+        
+        Args:
+            name: Template name (file name without .txt extension)
+            text: Template text in str.format syntax
+            mtime_ns: Modification time of the template file it was read from
+        """
+        self.name = name
+        self.text = text
+        self.mtime_ns = mtime_ns
+        self.version = hashlib.blake2b(text.encode('utf-8'), digest_size=6).hexdigest()
+        
+        # (literal text, field name or None, format spec, conversion)
+        self._segments: List[Tuple[str, Optional[str], str, Optional[str]]] = [
+            (literal, field, spec or '', conversion)
+            for literal, field, spec, conversion in Formatter().parse(text)
+        ]
+        self.fields = {field for _, field, _, _ in self._segments if field is not None}
+    
+    @staticmethod
+    def _format(value: Any, spec: str, conversion: Optional[str]) -> str:
+        """Format one substituted value like str.format does."""
+        if conversion == 'r':
+            value = repr(value)
+        elif conversion == 'a':
+            value = ascii(value)
+        elif conversion == 's':
+            value = str(value)
+        return value if isinstance(value, str) and not spec else format(value, spec)
+    
+    def render(self, **kwargs) -> str:
+        """
+        Substitute all fields.
+        
+        Args:
+            **kwargs: Values of the template's fields
+            
+        Returns:
+            The rendered prompt
+        """
+        parts = []
+        for literal, field, spec, conversion in self._segments:
+            parts.append(literal)
+            if field is not None:
+                if field not in kwargs:
+                    raise KeyError(field)
+                parts.append(self._format(kwargs[field], spec, conversion))
+        return ''.join(parts)
+    
+    def bind(self, **static) -> "PromptTemplate":
+        """
+        Pre-render some fields, e.g. large constant context such as iw_overview.
+        
+        Args:
+            **static: Values of the fields to substitute now
+            
+        Returns:
+            A template with those fields folded into its literal text
+        """
+        bound = PromptTemplate.__new__(PromptTemplate)
+        bound.name, bound.text, bound.mtime_ns, bound.version = self.name, self.text, self.mtime_ns, self.version
+        
+        segments, pending = [], []
+        for literal, field, spec, conversion in self._segments:
+            pending.append(literal)
+            if field is None:
+                continue
+            if field in static:
+                pending.append(self._format(static[field], spec, conversion))
+            else:
+                segments.append((''.join(pending), field, spec, conversion))
+                pending = []
+        if pending:
+            segments.append((''.join(pending), None, '', None))
+        
+        bound._segments = segments
+        bound.fields = {field for _, field, _, _ in segments if field is not None}
+        return bound
+
+
 class PromptManager:
     """Manages prompt templates and loading."""
     
-    def __init__(self):
-        """Initialize the prompt manager."""
-        self.prompts_dir = "prompts"
+    # Parsed templates shared by every manager in the process, by absolute path
+    _templates: Dict[str, PromptTemplate] = {}
+    _templates_lock = threading.Lock()
+    
+    def __init__(self, prompts_dir: str = "prompts"):
+        """
+        Initialize the prompt manager.
+        
+        Args:
+            prompts_dir: Directory of the "*.txt" prompt templates
+        """
+        self.prompts_dir = prompts_dir
+        # Template name -> (template version, static values, bound template)
+        self._bound: Dict[str, Tuple[str, Dict[str, Any], PromptTemplate]] = {}
+        self._bound_lock = threading.Lock()
+    
+    def get_template(self, template_name: str) -> PromptTemplate:
+        """
+        Get a parsed template, reading the file only when its modification time changed.
+        
+        Args:
+            template_name: Name of the template file (without .txt extension)
+            
+        Returns:
+            The parsed template
+        """
+        template_path = os.path.abspath(os.path.join(self.prompts_dir, f"{template_name}.txt"))
+        
+        try:
+            mtime_ns = os.stat(template_path).st_mtime_ns
+        except FileNotFoundError:
+            raise Exception(f"Prompt template not found: {template_path}")
+        
+        with self._templates_lock:
+            cached = self._templates.get(template_path)
+            if cached is not None and cached.mtime_ns == mtime_ns:
+                return cached
+            
+            with open(template_path, 'r') as f:
+                template = PromptTemplate(template_name, f.read(), mtime_ns)
+            self._templates[template_path] = template
+            return template
     
     def load_prompt(self, template_name: str, **kwargs) -> str:
         """
@@ -20,20 +147,53 @@ class PromptManager:
         Returns:
             Formatted prompt string
         """
-        template_path = os.path.join(self.prompts_dir, f"{template_name}.txt")
+        template = self.get_template(template_name)
         
         try:
-            with open(template_path, 'r') as f:
-                template = f.read()
-            
             # Format the template with provided variables
-            return template.format(**kwargs)
+            return template.render(**kwargs)
             
-        except FileNotFoundError:
-            raise Exception(f"Prompt template not found: {template_path}")
         except Exception as e:
             raise Exception(f"Failed to load prompt template {template_name}: {str(e)}")
     
+    def load_bound_prompt(self, template_name: str, static: Dict[str, Any], **kwargs) -> str:
+        """
+        Format a prompt template whose static fields are pre-rendered once.
+        
+        The template bound to the static values is kept until the template
+        file or one of the values changes, so constant sections are assembled
+        once rather than on every call.
+        
+        Args:
+            template_name: Name of the template file (without .txt extension)
+            static: Values that rarely change (e.g., {"iw_overview": ...})
+            **kwargs: Per-call variables to substitute in the template
+            
+        Returns:
+            Formatted prompt string
+        """
+        template = self.get_template(template_name)
+        
+        with self._bound_lock:
+            cached = self._bound.get(template_name)
+            if (cached is None or cached[0] != template.version or cached[1].keys() != static.keys()
+                    or any(cached[1][k] is not v and cached[1][k] != v for k, v in static.items())):
+                try:
+                    cached = (template.version, dict(static), template.bind(**static))
+                except Exception as e:
+                    raise Exception(f"Failed to load prompt template {template_name}: {str(e)}")
+                self._bound[template_name] = cached
+            bound = cached[2]
+        
+        try:
+            return bound.render(**kwargs)
+        except Exception as e:
+            raise Exception(f"Failed to load prompt template {template_name}: {str(e)}")
+    
+    def template_versions(self) -> Dict[str, str]:
+        """Content hash of each available template, to tell prompt revisions apart."""
+        return {name: self.get_template(name).version for name in self.get_available_templates()}
+    
     def get_available_templates(self) -> list:
         """Get list of available prompt templates."""
         if not os.path.exists(self.prompts_dir):
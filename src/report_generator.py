@@ -20,11 +20,10 @@ class ReportGenerator:
     ) -> str:
         """Generate a comprehensive report of all changes made."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        report_filename = f"change_request_report_{timestamp}.md"
-        report_path = os.path.join(self.reports_dir, report_filename)
         
         try:
-            with open(report_path, 'w') as f:
+            report_path, f = self._create_report_file("change_request_report", timestamp)
+            with f:
                 self._write_report_header(f, change_request, timestamp)
                 self._write_execution_summary(f, execution_summary)
                 self._write_analysis_summary(f, analysis_result)
@@ -38,6 +37,60 @@ class ReportGenerator:
         except Exception as e:
             raise Exception(f"Failed to generate report: {str(e)}")
     
+    def generate_batch_report(self, results: List[Dict[str, Any]], execution_time: float) -> str:
+        """
+        Generate a roll-up report of a batch of change requests.
+        
+        Args:
+            results: One entry per change request with 'change_request', 'status',
+                'report_path' and 'error'
+            execution_time: Wall-clock time of the whole batch in seconds
+            
+        Returns:
+            Path to the summary report
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        succeeded = sum(1 for result in results if result['status'] == 'success')
+        
+        try:
+            report_path, f = self._create_report_file("batch_report", timestamp)
+            with f:
+                f.write("# AI Test Case Copilot - Batch Report\n\n")
+                f.write(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write(f"**Report ID:** {timestamp}\n\n")
+                
+                f.write("## Summary\n\n")
+                f.write(f"- **Change requests:** {len(results)}\n")
+                f.write(f"- **Succeeded:** {succeeded}\n")
+                f.write(f"- **Failed:** {len(results) - succeeded}\n")
+                f.write(f"- **Execution time:** {execution_time:.2f} seconds\n\n")
+                
+                f.write("## Change Requests\n\n")
+                f.write("| Change Request | Status | Report |\n")
+                f.write("|----------------|--------|--------|\n")
+                for result in results:
+                    report = os.path.basename(result['report_path']) if result['report_path'] else result['error']
+                    f.write(f"| {result['change_request']} | {result['status']} | {report} |\n")
+                f.write("\n---\n\n")
+                f.write("*Report generated by AI Test Case Copilot v1.0*\n")
+            
+            return report_path
+            
+        except Exception as e:
+            raise Exception(f"Failed to generate batch report: {str(e)}")
+    
+    def _create_report_file(self, prefix: str, timestamp: str):
+        """Create a new report file, suffixing the name if another report claimed it this second."""
+        suffix = ""
+        attempt = 0
+        while True:
+            report_path = os.path.join(self.reports_dir, f"{prefix}_{timestamp}{suffix}.md")
+            try:
+                return report_path, open(report_path, 'x')
+            except FileExistsError:
+                attempt += 1
+                suffix = f"_{attempt}"
+    
     def _write_report_header(self, file, change_request: str, timestamp: str):
         """Write the report header section."""
         file.write("# AI Test Case Copilot - Change Request Report\n\n")
@@ -0,0 +1,94 @@
+"""
+Schema Validator
+Process-wide compiled validators for the test case JSON schema.
+"""
+
+import os
+import json
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from jsonschema import ValidationError
+from jsonschema.validators import validator_for
+from .config import Config
+
+_validators: Dict[str, Tuple[int, Any]] = {}
+_validators_lock = threading.Lock()
+
+
+def get_schema_validator(schema_path: Optional[str] = None):
+    """
+    Compiled validator for a schema file, shared by the whole process.
+
+    The validator class is picked from the schema's ``$schema`` (Draft
+    2019-09 for the test case schema) and the schema is checked once. The
+    validator is rebuilt only if the file's modification time changes.
+
+    Args:
+        schema_path: Path of the JSON schema (defaults to Config.SCHEMA_PATH)
+
+    Returns:
+        A jsonschema validator instance
+    """
+    schema_path = os.path.abspath(schema_path or Config.SCHEMA_PATH)
+    mtime_ns = os.stat(schema_path).st_mtime_ns
+
+    with _validators_lock:
+        cached = _validators.get(schema_path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+
+        with open(schema_path, 'r') as f:
+            schema = json.load(f)
+        validator_class = validator_for(schema)
+        validator_class.check_schema(schema)
+        validator = validator_class(schema)
+        _validators[schema_path] = (mtime_ns, validator)
+        return validator
+
+
+def clean_test_case(test_case: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop internal '_'-prefixed fields, which are not part of the schema."""
+    return {k: v for k, v in test_case.items() if not k.startswith('_')}
+
+
+def validate_test_case(test_case: Dict[str, Any], schema_path: Optional[str] = None) -> None:
+    """
+    Validate one test case.
+
+    Args:
+        test_case: The test case to validate
+        schema_path: Path of the JSON schema (defaults to Config.SCHEMA_PATH)
+
+    Raises:
+        ValidationError: With the most relevant error if the test case is invalid
+    """
+    get_schema_validator(schema_path).validate(clean_test_case(test_case))
+
+
+def _format_error(error: ValidationError) -> str:
+    """Render a validation error with the path of the offending field."""
+    location = "/".join(str(part) for part in error.absolute_path)
+    return f"{location}: {error.message}" if location else error.message
+
+
+def validate_many(
+    test_cases: Iterable[Tuple[str, Dict[str, Any]]],
+    schema_path: Optional[str] = None
+) -> Dict[str, List[str]]:
+    """
+    Validate a corpus, collecting every error instead of stopping at the first.
+
+    Args:
+        test_cases: (name, test case) pairs
+        schema_path: Path of the JSON schema (defaults to Config.SCHEMA_PATH)
+
+    Returns:
+        Error messages of each invalid test case, keyed by name
+    """
+    validator = get_schema_validator(schema_path)
+    errors = {}
+    for name, test_case in test_cases:
+        messages = [_format_error(e) for e in validator.iter_errors(clean_test_case(test_case))]
+        if messages:
+            errors[name] = messages
+    return errors
@@ -0,0 +1,341 @@
+"""
+Copilot Service
+Long-running HTTP daemon that keeps an AITestCopilot warm, and a thin client for it.
+"""
+
+import os
+import json
+import time
+import uuid
+import queue
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Any, Optional
+from .metrics_exporter import CONTENT_TYPE as OPENMETRICS_CONTENT_TYPE, render_openmetrics
+
+
+class CopilotService:
+    """
+    Local JSON-over-HTTP API around one warm AITestCopilot.
+
+    Endpoints:
+        GET  /status                 System status
+        GET  /search?q=...&limit=N   Semantic test case search
+        POST /validate               Queue validation of all test cases
+        GET  /metrics                OpenMetrics exposition
+        GET  /metrics/summary        Metrics summary as JSON
+        POST /process                Queue change requests: {"change_request": path}
+                                     or {"change_requests": [paths], "concurrency": N}
+        GET  /jobs/<job_id>          Job status and result
+
+    Processing and validation jobs run on a fixed pool of worker threads fed
+    by a queue, so a burst of submissions cannot overload the LLM and no HTTP
+    request waits on a long-running job; the copilot's locks keep concurrent
+    jobs from clobbering shared test cases and the FAISS index.
+    """
+
+    MAX_FINISHED_JOBS = 1000
+
+    def __init__(self, copilot, host: str = "127.0.0.1", port: int = 8765, workers: Optional[int] = None):
+        """
+        Initialize the service.
+
+        Args:
+            copilot: The AITestCopilot kept warm for all requests
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            workers: Jobs processed at once (defaults to Config.BATCH_CONCURRENCY)
+        """
+        self.copilot = copilot
+        self.workers = max(1, workers if workers is not None else copilot.config.BATCH_CONCURRENCY)
+
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                service._dispatch(self, "GET")
+
+            def do_POST(self):
+                service._dispatch(self, "POST")
+
+            def log_message(self, format, *args):
+                pass  # Jobs are tracked in observability instead
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """Base URL of the service."""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "CopilotService":
+        """Start the workers and serve in a daemon thread."""
+        self._start_workers()
+        thread = threading.Thread(target=self.server.serve_forever, name="copilot-service", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return self
+
+    def serve_forever(self) -> None:
+        """Start the workers and serve in the calling thread until interrupted."""
+        self._start_workers()
+        self.server.serve_forever()
+
+    def stop(self) -> None:
+        """Stop serving and let the workers finish their current job."""
+        self.server.shutdown()
+        self.server.server_close()
+        for _ in range(self.workers):
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _start_workers(self) -> None:
+        """Start the job worker threads."""
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"copilot-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, payload: Dict[str, Any], kind: str = "process") -> Dict[str, Any]:
+        """
+        Queue a job.
+
+        Args:
+            payload: For "process" jobs, {"change_request": path} or
+                {"change_requests": [paths], "concurrency": N}; ignored for "validate" jobs
+            kind: "process" or "validate"
+
+        Returns:
+            The queued job
+        """
+        if kind == "process" and not payload.get('change_request') and not payload.get('change_requests'):
+            raise ValueError("Expected 'change_request' or 'change_requests'")
+
+        job = {
+            'job_id': str(uuid.uuid4()),
+            'kind': kind,
+            'status': 'queued',
+            'change_request': payload.get('change_request'),
+            'change_requests': payload.get('change_requests'),
+            'concurrency': payload.get('concurrency'),
+            'progress': None,
+            'submitted_at': time.time(),
+            'finished_at': None,
+            'result': None,
+            'error': None
+        }
+        with self._jobs_lock:
+            self._jobs[job['job_id']] = job
+        self._queue.put(job['job_id'])
+        return dict(job)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a snapshot of a job, or None if unknown."""
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _work(self) -> None:
+        """Process queued jobs until a stop sentinel arrives."""
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+
+            with self._jobs_lock:
+                job = self._jobs[job_id]
+                job['status'] = 'running'
+
+            try:
+                if job['kind'] == "validate":
+                    result = self.copilot.validate_all_test_cases(
+                        progress=lambda done, total: self._set_progress(job, done, total)
+                    )
+                elif job['change_requests']:
+                    result = self.copilot.process_change_requests(job['change_requests'], job['concurrency'])
+                else:
+                    result = {'report_path': self.copilot.process_change_request(job['change_request'])}
+                status, error = 'success', None
+            except Exception as e:
+                result, status, error = None, 'error', str(e)
+
+            with self._jobs_lock:
+                job.update(status=status, result=result, error=error, finished_at=time.time())
+                self._forget_old_jobs()
+
+    def _set_progress(self, job: Dict[str, Any], done: int, total: int) -> None:
+        """Record the progress of a running job."""
+        with self._jobs_lock:
+            job['progress'] = {'done': done, 'total': total}
+
+    def _forget_old_jobs(self) -> None:
+        """Drop the oldest finished jobs beyond MAX_FINISHED_JOBS (lock held)."""
+        finished = [job_id for job_id, job in self._jobs.items() if job['finished_at'] is not None]
+        for job_id in finished[:max(0, len(finished) - self.MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        """Route one HTTP request."""
+        url = urllib.parse.urlsplit(handler.path)
+        params = urllib.parse.parse_qs(url.query)
+        path = url.path.rstrip('/')
+
+        try:
+            if method == "GET" and path == "/status":
+                self._send_json(handler, 200, self.copilot.get_status())
+            elif method == "GET" and path == "/search":
+                query = params.get('q', [''])[0]
+                if not query:
+                    raise ValueError("Missing query parameter 'q'")
+                limit = int(params.get('limit', ['3'])[0])
+                self._send_json(handler, 200, self.copilot.search_test_cases(query, limit))
+            elif method == "POST" and path == "/validate":
+                self._send_json(handler, 202, self.submit({}, kind="validate"))
+            elif method == "GET" and path == "/metrics":
+                body = render_openmetrics(self.copilot.observability, self.copilot.get_vector_store_stats)
+                self._send(handler, 200, body.encode('utf-8'), OPENMETRICS_CONTENT_TYPE)
+            elif method == "GET" and path == "/metrics/summary":
+                self._send_json(handler, 200, self.copilot.get_metrics())
+            elif method == "POST" and path == "/process":
+                self._send_json(handler, 202, self.submit(self._read_json(handler)))
+            elif method == "GET" and path.startswith("/jobs/"):
+                job = self.get_job(path[len("/jobs/"):])
+                if job is None:
+                    self._send_json(handler, 404, {'error': 'Unknown job'})
+                else:
+                    self._send_json(handler, 200, job)
+            else:
+                self._send_json(handler, 404, {'error': f"No endpoint {method} {url.path}"})
+        except ValueError as e:
+            self._send_json(handler, 400, {'error': str(e)})
+        except Exception as e:
+            self._send_json(handler, 500, {'error': str(e)})
+
+    @staticmethod
+    def _read_json(handler: BaseHTTPRequestHandler) -> Dict[str, Any]:
+        """Decode the JSON request body."""
+        length = int(handler.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(handler.rfile.read(length) or b'{}')
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON body: {str(e)}")
+        if not isinstance(payload, dict):
+            raise ValueError("Expected a JSON object")
+        return payload
+
+    @classmethod
+    def _send_json(cls, handler: BaseHTTPRequestHandler, status: int, payload: Any) -> None:
+        """Send a JSON response."""
+        cls._send(handler, status, json.dumps(payload, default=str).encode('utf-8'), 'application/json')
+
+    @staticmethod
+    def _send(handler: BaseHTTPRequestHandler, status: int, body: bytes, content_type: str) -> None:
+        """Send a response body."""
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+class CopilotServiceClient:
+    """
+    Thin client of a running CopilotService.
+
+    Mirrors the AITestCopilot methods used by the CLI, so commands work the
+    same against a local copilot or a daemon. Paths are sent as absolute
+    paths; the daemon must share the client's filesystem.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 30.0, poll_interval: float = 0.5):
+        """
+        Initialize the client.
+
+        Args:
+            base_url: Base URL of the daemon, e.g. http://127.0.0.1:8765
+            timeout: Timeout of a single HTTP request in seconds
+            poll_interval: Delay between job status polls in seconds
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Any:
+        """Send a request and decode the JSON response."""
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(
+            f"{self.base_url}{path}", data=data, method=method,
+            headers={'Content-Type': 'application/json'} if data is not None else {}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get('error', e.reason)
+            except Exception:
+                message = e.reason
+            raise Exception(f"Daemon request {method} {path} failed ({e.code}): {message}")
+        except urllib.error.URLError as e:
+            raise Exception(f"Could not reach copilot daemon at {self.base_url}: {e.reason}")
+
+    def submit(self, payload: Dict[str, Any], path: str = "/process") -> str:
+        """Queue a job (processing by default) and return its ID."""
+        return self._request("POST", path, payload)['job_id']
+
+    def wait_for_job(self, job_id: str, progress=None) -> Dict[str, Any]:
+        """Poll a job until it finishes and return it, passing its reported progress to progress(done, total)."""
+        while True:
+            job = self._request("GET", f"/jobs/{job_id}")
+            if progress and job.get('progress'):
+                progress(job['progress']['done'], job['progress']['total'])
+            if job['status'] in ('success', 'error'):
+                return job
+            time.sleep(self.poll_interval)
+
+    def _run_job(self, payload: Dict[str, Any], path: str = "/process", progress=None) -> Dict[str, Any]:
+        """Submit a job, wait for it and return its result."""
+        job = self.wait_for_job(self.submit(payload, path), progress)
+        if job['status'] == 'error':
+            raise Exception(job['error'])
+        return job['result']
+
+    def process_change_request(self, change_request_path: str) -> str:
+        """Process a change request on the daemon and return the report path."""
+        return self._run_job({'change_request': os.path.abspath(change_request_path)})['report_path']
+
+    def process_change_requests(self, change_request_paths: List[str], concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """Process a batch of change requests on the daemon."""
+        return self._run_job({
+            'change_requests': [os.path.abspath(path) for path in change_request_paths],
+            'concurrency': concurrency
+        })
+
+    def search_test_cases(self, query: str, n_results: int = 3) -> List[Dict[str, Any]]:
+        """Search for test cases on the daemon."""
+        params = urllib.parse.urlencode({'q': query, 'limit': n_results})
+        return self._request("GET", f"/search?{params}")
+
+    def validate_all_test_cases(self, progress=None) -> Dict[str, Any]:
+        """Validate all test cases on the daemon as a job, so no single request has to outlast it."""
+        return self._run_job({}, "/validate", progress)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get the daemon's system status."""
+        return self._request("GET", "/status")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get the daemon's metrics summary."""
+        return self._request("GET", "/metrics/summary")
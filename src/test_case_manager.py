@@ -1,60 +1,92 @@
-import json
 import os
-import glob
-from typing import List, Dict, Any, Optional
-from jsonschema import validate, ValidationError
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
+from jsonschema import ValidationError
 from .config import Config
+from .schema_validator import get_schema_validator, clean_test_case, validate_many
+from .test_case_repository import TestCaseRepository
+from .packed_corpus import PackedTestCaseRepository
+from .journal import WriteJournal
+from .id_allocator import format_test_case_id
 
 class TestCaseManager:
     """Manages test case operations including reading, writing, and validation."""
     
-    def __init__(self):
-        """Initialize the test case manager."""
+    def __init__(self, store_path: Optional[str] = None):
+        """
+        Initialize the test case manager.
+        
+        Args:
+            store_path: SQLite file of a packed corpus; None keeps one JSON file
+                per test case in Config.TEST_CASES_DIR
+        """
         self.test_cases_dir = Config.TEST_CASES_DIR
         self.schema_path = Config.SCHEMA_PATH
         self.schema = self._load_schema()
+        if store_path:
+            self.repository = PackedTestCaseRepository(store_path)
+        else:
+            self.repository = TestCaseRepository(self.test_cases_dir, Config.TEST_CASE_LOAD_WORKERS)
+        self.journal = WriteJournal(Config.JOURNAL_DIR)
     
     def _load_schema(self) -> Dict[str, Any]:
-        """Load the test case JSON schema."""
+        """Load the test case JSON schema, compiling the shared validator."""
         try:
-            with open(self.schema_path, 'r') as f:
-                return json.load(f)
+            return get_schema_validator(self.schema_path).schema
         except Exception as e:
             raise Exception(f"Failed to load schema from {self.schema_path}: {str(e)}")
     
-    def load_all_test_cases(self) -> List[Dict[str, Any]]:
-        """Load all existing test cases from the test_cases directory."""
-        test_cases = []
-        pattern = os.path.join(self.test_cases_dir, "*.json")
+    def load_all_test_cases(self, progress: Optional[Callable[[int, int], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Load all existing test cases from the test_cases directory.
         
-        for file_path in glob.glob(pattern):
-            try:
-                with open(file_path, 'r') as f:
-                    test_case = json.load(f)
-                    # Add file path for reference
-                    test_case['_file_path'] = file_path
-                    test_case['_file_name'] = os.path.basename(file_path)
-                    test_cases.append(test_case)
-            except Exception as e:
-                print(f"Warning: Failed to load test case from {file_path}: {str(e)}")
+        Args:
+            progress: Called as progress(done, total) while changed files are read
+        """
+        # Served from the repository cache; only changed files are read again
+        return self.repository.all(progress)
+    
+    def load_corpus(
+        self, progress: Optional[Callable[[int, int], None]] = None
+    ) -> Tuple[List[str], List[Dict[str, Any]], Dict[str, str]]:
+        """
+        Load every test case file in one pass, keeping the files that failed to load.
         
-        return test_cases
+        Args:
+            progress: Called as progress(done, total) while changed files are read
+            
+        Returns:
+            (sorted file names, readable test cases, file name -> load error)
+        """
+        return self.repository.snapshot(progress)
     
-    def load_test_case(self, file_name: str) -> Optional[Dict[str, Any]]:
-        """Load a specific test case by file name."""
-        file_path = os.path.join(self.test_cases_dir, file_name)
+    def find_test_cases(self, test_case_type: Optional[str] = None, priority: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Find test cases by type and/or priority.
         
-        if not os.path.exists(file_path):
-            return None
+        Args:
+            test_case_type: Test case 'type' to match (e.g., "functional"), any if None
+            priority: Test case 'priority' to match (e.g., "P2 - High"), any if None
+            
+        Returns:
+            Matching test cases, sorted by file name
+        """
+        return self.repository.find(test_case_type, priority)
+    
+    def corpus_fingerprint(self) -> str:
+        """
+        Fingerprint the test cases without reading them.
         
-        try:
-            with open(file_path, 'r') as f:
-                test_case = json.load(f)
-                test_case['_file_path'] = file_path
-                test_case['_file_name'] = file_name
-                return test_case
-        except Exception as e:
-            raise Exception(f"Failed to load test case from {file_path}: {str(e)}")
+        Any added, removed or edited test case changes the fingerprint.
+        
+        Returns:
+            Hex digest identifying the current state of the test case corpus
+        """
+        return self.repository.fingerprint()
+    
+    def load_test_case(self, file_name: str) -> Optional[Dict[str, Any]]:
+        """Load a specific test case by file name."""
+        return self.repository.get(file_name)
     
     def validate_test_case(self, test_case: Dict[str, Any]) -> bool:
         """
@@ -67,90 +99,173 @@ class TestCaseManager:
             True if valid, raises ValidationError if invalid
         """
         try:
-            # Remove internal metadata fields before validation
-            clean_test_case = {k: v for k, v in test_case.items() if not k.startswith('_')}
-            validate(instance=clean_test_case, schema=self.schema)
+            # Internal metadata fields are removed before validation
+            get_schema_validator(self.schema_path).validate(clean_test_case(test_case))
             return True
         except ValidationError as e:
             raise ValidationError(f"Test case validation failed: {str(e)}")
     
-    def save_test_case(self, test_case: Dict[str, Any], file_name: str) -> str:
+    def validate_test_cases(self, test_cases: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """
+        Validate many test cases with the shared compiled validator.
+        
+        Args:
+            test_cases: Test cases loaded by this manager (keyed by '_file_name')
+            
+        Returns:
+            All error messages of each invalid test case, keyed by file name
+        """
+        return validate_many(
+            ((tc.get('_file_name', str(i)), tc) for i, tc in enumerate(test_cases)), self.schema_path
+        )
+    
+    def save_test_case(self, test_case: Dict[str, Any], file_name: str, session_id: Optional[str] = None) -> str:
         """
         Save a test case to a JSON file.
         
+        The file is replaced atomically, so a crash never leaves it half written.
+        
         Args:
             test_case: The test case to save
             file_name: The filename to save as
+            session_id: Session to journal the previous content under, for rollback
             
         Returns:
             The full path where the test case was saved
         """
         # Remove internal fields before saving
-        clean_test_case = {k: v for k, v in test_case.items() if not k.startswith('_')}
+        clean = clean_test_case(test_case)
         
         # Validate before saving
-        self.validate_test_case(clean_test_case)
+        self.validate_test_case(clean)
         
-        file_path = os.path.join(self.test_cases_dir, file_name)
+        if session_id:
+            self.journal_before_images(session_id, [file_name])
         
         try:
-            with open(file_path, 'w') as f:
-                json.dump(clean_test_case, f, indent=2)
-            return file_path
+            return self.repository.write(file_name, clean)
         except Exception as e:
-            raise Exception(f"Failed to save test case to {file_path}: {str(e)}")
+            raise Exception(f"Failed to save test case to {self.repository.path_for(file_name)}: {str(e)}")
     
-    def update_test_case(self, test_case_id: str, updated_test_case: Dict[str, Any]) -> str:
+    def update_test_case(self, test_case_id: str, updated_test_case: Dict[str, Any], session_id: Optional[str] = None) -> str:
         """
         Update an existing test case.
         
         Args:
             test_case_id: The ID of the test case to update (e.g., "tc_001")
             updated_test_case: The updated test case data
+            session_id: Session to journal the previous content under, for rollback
             
         Returns:
             The full path where the test case was saved
         """
         # Find the existing test case file
-        pattern = os.path.join(self.test_cases_dir, f"{test_case_id}.json")
-        matching_files = glob.glob(pattern)
-        
-        if not matching_files:
+        file_name = f"{test_case_id}.json"
+        if not self.repository.exists(file_name):
             raise FileNotFoundError(f"No test case file found for ID: {test_case_id}")
         
-        file_path = matching_files[0]
-        file_name = os.path.basename(file_path)
+        return self.save_test_case(updated_test_case, file_name, session_id)
+    
+    def reserve_test_case_ids(self, count: int = 1) -> List[str]:
+        """
+        Reserve IDs for new test cases, safely across threads and processes.
         
-        return self.save_test_case(updated_test_case, file_name)
+        Args:
+            count: How many IDs to reserve in one go (e.g., for a batch of generated cases)
+            
+        Returns:
+            The reserved IDs in ascending order (e.g., ["tc_042", "tc_043"])
+        """
+        return [format_test_case_id(number) for number in self.repository.reserve_numbers("tc_", count)]
     
-    def create_new_test_case(self, test_case: Dict[str, Any], test_case_type: str) -> str:
+    def create_new_test_case(
+        self,
+        test_case: Dict[str, Any],
+        test_case_type: str,
+        session_id: Optional[str] = None,
+        test_case_id: Optional[str] = None
+    ) -> str:
         """
         Create a new test case file.
         
         Args:
             test_case: The test case to create
             test_case_type: Type of test case (positive, negative, edge)
+            session_id: Session to journal the creation under, for rollback
+            test_case_id: ID from reserve_test_case_ids; one is reserved if None
             
         Returns:
             The full path where the test case was saved
         """
-        # Generate a unique filename
-        existing_files = glob.glob(os.path.join(self.test_cases_dir, "*.json"))
-        max_number = 0
+        if test_case_id is None:
+            test_case_id = self.reserve_test_case_ids()[0]
+        
+        # Files added without the allocator (e.g. copied in by hand) can be ahead
+        # of its counter; move the counter past them instead of overwriting one
+        if self.repository.exists(f"{test_case_id}.json"):
+            max_number = self.repository.max_number("tc_")
+            test_case_id = format_test_case_id(self.repository.reserve_numbers("tc_", 1, at_least=max_number)[0])
         
-        for file_path in existing_files:
-            file_name = os.path.basename(file_path)
-            if file_name.startswith("tc_") and file_name.endswith(".json"):
-                try:
-                    number = int(file_name[3:-5])  # Extract number from "tc_XXX.json"
-                    max_number = max(max_number, number)
-                except ValueError:
-                    continue
+        return self.save_test_case(test_case, f"{test_case_id}.json", session_id)
+    
+    def journal_before_images(self, session_id: str, file_names: List[str]) -> None:
+        """
+        Durably record the current content of test cases a session is about to write.
         
-        new_number = max_number + 1
-        file_name = f"tc_{new_number:03d}.json"
+        All before-images share one journal fsync; files the session already
+        journaled keep their first before-image.
         
-        return self.save_test_case(test_case, file_name)
+        Args:
+            session_id: Session making the changes
+            file_names: Test case files about to be written (missing files are recorded as new)
+        """
+        before_images = {}
+        for file_name in file_names:
+            try:
+                before_images[file_name] = self.repository.read_raw(file_name)
+            except FileNotFoundError:
+                before_images[file_name] = None
+        self.journal.record(session_id, before_images)
+    
+    @contextmanager
+    def batch_writes(self) -> Iterator[None]:
+        """Group test case writes so their directory is fsynced once, at the end."""
+        with self.repository.batch():
+            yield
+    
+    def rollback(self, session_id: str) -> List[str]:
+        """
+        Restore the test cases a session changed to their content before it ran.
+        
+        Updated test cases get their previous content back and created ones are
+        removed. The session's journal is then retired, so a rollback cannot be
+        applied twice.
+        
+        Args:
+            session_id: The session ID, or a unique prefix of it
+            
+        Returns:
+            The file names of the restored test cases
+        """
+        matches = [s for s in self.journal.sessions() if s == session_id or s.startswith(session_id)]
+        if session_id in matches:
+            matches = [session_id]
+        if len(matches) != 1:
+            problem = "No journal" if not matches else "Ambiguous session ID"
+            raise Exception(f"{problem} for session {session_id} in {self.journal.journal_dir}")
+        session_id = matches[0]
+        
+        restored = []
+        with self.batch_writes():
+            for entry in reversed(self.journal.entries(session_id)):
+                file_name = entry['file_name']
+                if entry['before'] is None:
+                    self.repository.delete(file_name)
+                else:
+                    self.repository.write_raw(file_name, entry['before'])
+                restored.append(file_name)
+        self.journal.close(session_id)
+        return restored
     
     def backup_test_case(self, file_name: str) -> str:
         """
@@ -160,19 +275,11 @@ class TestCaseManager:
             file_name: The name of the test case file to backup
             
         Returns:
-            The path to the backup file
+            The path to the backup file (a virtual path inside a packed corpus)
         """
-        original_path = os.path.join(self.test_cases_dir, file_name)
-        backup_dir = os.path.join(self.test_cases_dir, "backups")
-        os.makedirs(backup_dir, exist_ok=True)
-        
-        backup_name = f"{os.path.splitext(file_name)[0]}_backup.json"
-        backup_path = os.path.join(backup_dir, backup_name)
-        
         try:
-            with open(original_path, 'r') as src, open(backup_path, 'w') as dst:
-                dst.write(src.read())
-            return backup_path
+            # Stored next to the test cases: a backups directory, or a table of the packed corpus
+            return self.repository.backup(file_name)
         except Exception as e:
             raise Exception(f"Failed to create backup of {file_name}: {str(e)}")
     
@@ -186,16 +293,13 @@ class TestCaseManager:
         Returns:
             The test case data or None if not found
         """
-        pattern = os.path.join(self.test_cases_dir, f"{test_case_id}.json")
-        matching_files = glob.glob(pattern)
-        
-        if not matching_files:
-            return None
-        
-        return self.load_test_case(os.path.basename(matching_files[0]))
+        return self.load_test_case(f"{test_case_id}.json")
     
-    def list_test_cases(self) -> List[str]:
-        """List all available test case files."""
-        pattern = os.path.join(self.test_cases_dir, "*.json")
-        files = glob.glob(pattern)
-        return [os.path.basename(f) for f in files]
+    def list_test_cases(self, progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        """
+        List all available test case files.
+        
+        Args:
+            progress: Called as progress(done, total) while changed files are read
+        """
+        return self.repository.file_names(progress)
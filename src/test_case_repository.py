@@ -0,0 +1,390 @@
+"""
+Test Case Repository
+In-memory cache of the test case directory, kept in sync by file stat checks.
+"""
+
+import os
+import copy
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Set, Tuple, Callable, Iterator
+from .journal import atomic_write_text, fsync_directory
+from .id_allocator import IdCounterFile, id_sort_key
+
+try:
+    import orjson
+except ImportError:  # Optional: faster parsing of large corpora
+    orjson = None
+
+
+class TestCaseRepository:
+    """
+    Cached view of the ``*.json`` test cases in one directory.
+
+    Listings rescan the directory with ``os.scandir`` and compare every
+    file's (size, mtime) with the cached one, so only added, edited or
+    removed files are read again; single-case lookups stat just that file.
+    Test cases are indexed by ID (file name without ``.json``), type and
+    priority, and listed in ID number order. Callers always get copies, so
+    mutating a returned test case never corrupts the cache.
+
+    Large batches of changed files (e.g. the first load) are read and parsed
+    on a thread pool, which overlaps file I/O; orjson is used when installed.
+    """
+
+    PARALLEL_THRESHOLD = 64
+    ID_COUNTER_FILE = ".id_counter"
+
+    def __init__(self, test_cases_dir: str, workers: int = 8):
+        """
+        Initialize the repository.
+
+        Args:
+            test_cases_dir: Directory holding the test case files
+            workers: Threads reading files when many changed at once
+        """
+        self.test_cases_dir = test_cases_dir
+        self.workers = workers
+
+        # File name -> ((size, mtime_ns), test case or None, load error or None)
+        self._entries: Dict[str, Tuple[Tuple[int, int], Optional[Dict[str, Any]], Optional[str]]] = {}
+        self._by_type: Dict[str, Set[str]] = {}
+        self._by_priority: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._batch_dirty = False
+        self._id_counter = IdCounterFile(os.path.join(test_cases_dir, self.ID_COUNTER_FILE))
+
+    def refresh(self, progress: Optional[Callable[[int, int], None]] = None) -> None:
+        """
+        Reload files whose size or modification time changed and drop deleted ones.
+
+        Args:
+            progress: Called as progress(done, total) after each changed file is read
+        """
+        with self._lock:
+            seen = {}
+            try:
+                with os.scandir(self.test_cases_dir) as it:
+                    for entry in it:
+                        if entry.name.endswith('.json') and entry.is_file():
+                            stat = entry.stat()
+                            seen[entry.name] = (stat.st_size, stat.st_mtime_ns)
+            except FileNotFoundError:
+                pass
+
+            removed = [file_name for file_name in self._entries if file_name not in seen]
+            for file_name in removed:
+                self._drop_entry(file_name)
+
+            stale = [file_name for file_name, signature in seen.items()
+                     if file_name not in self._entries or self._entries[file_name][0] != signature]
+            for done, (file_name, loaded) in enumerate(zip(stale, self._read_all(stale)), 1):
+                self._set_entry(file_name, seen[file_name], loaded)
+                if progress:
+                    progress(done, len(stale))
+
+    def _refresh_one(self, file_name: str) -> None:
+        """Re-read one file if its size or modification time changed (lock held)."""
+        try:
+            stat = os.stat(self.path_for(file_name))
+        except FileNotFoundError:
+            self._drop_entry(file_name)
+            return
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = self._entries.get(file_name)
+        if cached is None or cached[0] != signature:
+            self._set_entry(file_name, signature, self._read(file_name))
+
+    def _read_all(self, file_names: List[str]):
+        """Read files in order, in parallel when there are many of them."""
+        if len(file_names) < self.PARALLEL_THRESHOLD or self.workers <= 1:
+            return map(self._read, file_names)
+
+        def read_parallel():
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tc-load") as executor:
+                yield from executor.map(self._read, file_names)
+        return read_parallel()
+
+    def _read(self, file_name: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Parse one test case file, returning (test case, None) or (None, error)."""
+        try:
+            with open(self.path_for(file_name), 'rb') as f:
+                data = f.read()
+        except Exception as e:
+            print(f"Warning: Failed to load test case from {self.path_for(file_name)}: {str(e)}")
+            return None, str(e)
+        return self._decode(file_name, data)
+
+    def _decode(self, file_name: str, data) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Parse a serialized test case, returning (test case, None) or (None, error)."""
+        file_path = self.path_for(file_name)
+        try:
+            test_case = orjson.loads(data) if orjson else json.loads(data)
+            test_case['_file_path'] = file_path
+            test_case['_file_name'] = file_name
+            return test_case, None
+        except Exception as e:
+            print(f"Warning: Failed to load test case from {file_path}: {str(e)}")
+            return None, str(e)
+
+    def path_for(self, file_name: str) -> str:
+        """Path reported for a test case (its '_file_path')."""
+        return os.path.join(self.test_cases_dir, file_name)
+
+    def fingerprint(self) -> str:
+        """
+        Fingerprint the test case files without reading them.
+
+        The fingerprint covers every file name with its size and modification
+        time, so adding, removing or editing any test case changes it.
+
+        Returns:
+            Hex digest identifying the current state of the test case directory
+        """
+        entries = []
+        try:
+            with os.scandir(self.test_cases_dir) as it:
+                for entry in it:
+                    if entry.name.endswith('.json') and entry.is_file():
+                        stat = entry.stat()
+                        entries.append((entry.name, stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            pass
+
+        digest = hashlib.blake2b(digest_size=16)
+        for name, size, mtime_ns in sorted(entries):
+            digest.update(f"{name}\0{size}\0{mtime_ns}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def write(self, file_name: str, test_case: Dict[str, Any]) -> str:
+        """
+        Write a (clean, validated) test case.
+
+        Args:
+            file_name: Test case file name (e.g., "tc_001.json")
+            test_case: Test case without internal '_' fields
+
+        Returns:
+            The path of the written test case
+        """
+        return self.write_raw(file_name, json.dumps(test_case, indent=2))
+
+    def write_raw(self, file_name: str, content: str) -> str:
+        """Atomically replace a test case file with serialized content; returns its path."""
+        file_path = self.path_for(file_name)
+        try:
+            with self._lock:
+                atomic_write_text(file_path, content, sync_directory=self._batch_depth == 0)
+                if self._batch_depth:
+                    self._batch_dirty = True
+            return file_path
+        finally:
+            self.invalidate(file_name)
+
+    def delete(self, file_name: str) -> None:
+        """Remove a test case file if it exists."""
+        try:
+            os.remove(self.path_for(file_name))
+            self._sync_directory()
+        except FileNotFoundError:
+            pass
+        finally:
+            self.invalidate(file_name)
+
+    def read_raw(self, file_name: str) -> str:
+        """Serialized content of a test case, as stored; raises FileNotFoundError if missing."""
+        with open(self.path_for(file_name), 'r') as f:
+            return f.read()
+
+    def exists(self, file_name: str) -> bool:
+        """Whether a test case file exists, checked without rescanning the directory."""
+        return os.path.isfile(self.path_for(file_name))
+
+    @staticmethod
+    def _backup_name(file_name: str) -> str:
+        """Timestamped backup name, so backups from earlier sessions are kept rather than overwritten."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        return f"{os.path.splitext(file_name)[0]}_backup_{timestamp}.json"
+
+    def backup(self, file_name: str) -> str:
+        """Copy a test case file into the backups directory; returns the backup's path."""
+        backup_dir = os.path.join(self.test_cases_dir, "backups")
+        os.makedirs(backup_dir, exist_ok=True)
+        backup_path = os.path.join(backup_dir, self._backup_name(file_name))
+        atomic_write_text(backup_path, self.read_raw(file_name))
+        return backup_path
+
+    def read_backup(self, backup_name: str) -> str:
+        """Serialized content of a backup, by the name of its path; raises FileNotFoundError if missing."""
+        with open(os.path.join(self.test_cases_dir, "backups", backup_name), 'r') as f:
+            return f.read()
+
+    def _sync_directory(self) -> None:
+        """Make renames and deletions in the test case directory durable."""
+        fsync_directory(self.test_cases_dir)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Group writes so the directory is fsynced once at the end instead of per file.
+
+        Each file is still written atomically; only the durability of the
+        renames is deferred to the end of the outermost batch.
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._batch_dirty:
+                    self._batch_dirty = False
+                    self._sync_directory()
+
+    def _set_entry(self, file_name: str, signature, loaded) -> None:
+        """Cache one (test case, error) pair and index it (lock held)."""
+        self._drop_entry(file_name)
+        self._entries[file_name] = (signature,) + tuple(loaded)
+        test_case = loaded[0]
+        if test_case is not None:
+            self._by_type.setdefault(test_case.get('type'), set()).add(file_name)
+            self._by_priority.setdefault(test_case.get('priority'), set()).add(file_name)
+
+    def _drop_entry(self, file_name: str) -> None:
+        """Forget one cached file and remove it from the indexes (lock held)."""
+        cached = self._entries.pop(file_name, None)
+        if cached is None or cached[1] is None:
+            return
+        for index, key in ((self._by_type, cached[1].get('type')), (self._by_priority, cached[1].get('priority'))):
+            names = index.get(key)
+            if names is not None:
+                names.discard(file_name)
+                if not names:
+                    del index[key]
+
+    def invalidate(self, file_name: Optional[str] = None) -> None:
+        """
+        Forget cached files so they are read again on the next lookup.
+
+        Needed after in-process writes, since a rewrite within the file
+        system's timestamp granularity may keep size and mtime unchanged.
+
+        Args:
+            file_name: File to forget (all files if None)
+        """
+        with self._lock:
+            if file_name is None:
+                self._entries.clear()
+                self._by_type, self._by_priority = {}, {}
+            else:
+                self._drop_entry(file_name)
+
+    def file_names(self, progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        """Names of all test case files, sorted."""
+        with self._lock:
+            self.refresh(progress)
+            return sorted(self._entries, key=id_sort_key)
+
+    def all(self, progress: Optional[Callable[[int, int], None]] = None) -> List[Dict[str, Any]]:
+        """All readable test cases, sorted by file name; unreadable files are skipped."""
+        with self._lock:
+            self.refresh(progress)
+            return [copy.deepcopy(self._entries[name][1]) for name in sorted(self._entries, key=id_sort_key)
+                    if self._entries[name][1] is not None]
+
+    def snapshot(
+        self, progress: Optional[Callable[[int, int], None]] = None
+    ) -> Tuple[List[str], List[Dict[str, Any]], Dict[str, str]]:
+        """
+        All file names, readable test cases and load errors from one directory scan.
+
+        Args:
+            progress: Called as progress(done, total) after each changed file is read
+
+        Returns:
+            (sorted file names, readable test cases in that order, file name -> load error)
+        """
+        with self._lock:
+            self.refresh(progress)
+            names = sorted(self._entries, key=id_sort_key)
+            test_cases = [copy.deepcopy(self._entries[name][1]) for name in names
+                          if self._entries[name][1] is not None]
+            errors = {name: self._entries[name][2] for name in names if self._entries[name][1] is None}
+            return names, test_cases, errors
+
+    def get(self, file_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a test case by file name.
+
+        Args:
+            file_name: Test case file name (e.g., "tc_001.json")
+
+        Returns:
+            The test case, or None if there is no such file
+        """
+        with self._lock:
+            self._refresh_one(file_name)
+            cached = self._entries.get(file_name)
+            if cached is None:
+                return None
+            if cached[1] is None:
+                file_path = os.path.join(self.test_cases_dir, file_name)
+                raise Exception(f"Failed to load test case from {file_path}: {cached[2]}")
+            return copy.deepcopy(cached[1])
+
+    def find(self, test_case_type: Optional[str] = None, priority: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get test cases by type and/or priority.
+
+        Args:
+            test_case_type: Value of the 'type' field to match (any if None)
+            priority: Value of the 'priority' field to match (any if None)
+
+        Returns:
+            Matching test cases, sorted by file name
+        """
+        with self._lock:
+            self.refresh()
+            names = self._entries.keys()
+            if test_case_type is not None:
+                names = self._by_type.get(test_case_type, set())
+            if priority is not None:
+                names = self._by_priority.get(priority, set()) & set(names)
+            return [copy.deepcopy(self._entries[name][1]) for name in sorted(names, key=id_sort_key)
+                    if self._entries[name][1] is not None]
+
+    def max_number(self, prefix: str = "tc_") -> int:
+        """Highest number N among files named <prefix>N.json (0 if none)."""
+        with self._lock:
+            self.refresh()
+            max_number = 0
+            for file_name in self._entries:
+                if file_name.startswith(prefix):
+                    try:
+                        max_number = max(max_number, int(file_name[len(prefix):-5]))
+                    except ValueError:
+                        continue
+            return max_number
+
+    def reserve_numbers(self, prefix: str = "tc_", count: int = 1, at_least: int = 0) -> List[int]:
+        """
+        Reserve numbers for new <prefix>N.json files, safely across threads and processes.
+
+        The last allocated number is persisted next to the test cases; the
+        directory is only scanned once, to seed it.
+
+        Args:
+            prefix: ID prefix (e.g., "tc_")
+            count: How many consecutive numbers to reserve
+            at_least: Skip numbers up to this one (e.g. after finding files the counter missed)
+
+        Returns:
+            The reserved numbers, ascending
+        """
+        return self._id_counter.reserve(prefix, count, lambda: self.max_number(prefix), at_least)
@@ -0,0 +1,120 @@
+"""
+Token Budget
+Token counting and budgeted packing of test cases into prompts.
+"""
+
+import json
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+from .rate_limiter import estimate_tokens
+
+try:
+    import tiktoken
+except ImportError:  # Optional: exact counts; a character heuristic is used without it
+    tiktoken = None
+
+_encodings: Dict[str, Any] = {}
+_encodings_lock = threading.Lock()
+
+
+def _encoding_for(model: Optional[str]):
+    """Tokenizer of a model, loaded once per process (None without tiktoken)."""
+    if tiktoken is None:
+        return None
+    key = model or ""
+    with _encodings_lock:
+        if key not in _encodings:
+            try:
+                _encodings[key] = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
+            except KeyError:  # Model unknown to this tiktoken version
+                _encodings[key] = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:  # e.g. encoding files cannot be downloaded
+                print(f"Warning: Falling back to estimated token counts: {str(e)}")
+                _encodings[key] = None
+        return _encodings[key]
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Number of tokens in a text for a model.
+
+    Args:
+        text: Text to count
+        model: Model name picking the tokenizer (e.g., "gpt-4")
+
+    Returns:
+        Exact count with tiktoken installed, otherwise an estimate
+    """
+    encoding = _encoding_for(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def compact_json(value: Any) -> str:
+    """Serialize without indentation or spaces after separators, to save prompt tokens."""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+def prompt_test_case(test_case: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Test case as shown to the LLM: only its schema fields, without internal metadata.
+
+    Nothing is added, so a test case the LLM echoes back still validates
+    against the schema (which allows no additional properties).
+
+    Args:
+        test_case: Test case, possibly with internal '_' fields
+
+    Returns:
+        The test case without '_' fields
+    """
+    return {k: v for k, v in test_case.items() if not k.startswith('_')}
+
+
+def prompt_test_case_id(test_case: Dict[str, Any], position: int) -> str:
+    """ID a test case is listed under in a prompt (its file name without .json)."""
+    file_name = test_case.get('_file_name')
+    if not file_name:
+        return f"#{position + 1}"
+    return file_name[:-5] if file_name.endswith('.json') else file_name
+
+
+def pack_test_cases(
+    test_cases: List[Dict[str, Any]],
+    budget_tokens: int,
+    model: Optional[str] = None
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Serialize the most relevant test cases that fit a token budget.
+
+    The result is a JSON object keyed by test case ID, so the IDs sit outside
+    the test case objects themselves. Test cases are taken by descending
+    '_relevance_score' (test cases without one keep their order, after
+    scored ones) and added greedily: one that does not fit is skipped and
+    smaller, less relevant ones may still be added.
+
+    Args:
+        test_cases: Candidate test cases
+        budget_tokens: Tokens the serialized JSON may use (0 or less: no limit)
+        model: Model name picking the tokenizer
+
+    Returns:
+        The compact JSON object, and the test cases it contains in that order
+    """
+    ranked = sorted(
+        enumerate(test_cases),
+        key=lambda item: (item[1].get('_relevance_score') is None, -(item[1].get('_relevance_score') or 0), item[0])
+    )
+
+    used = count_tokens("{}", model)
+    parts, packed = [], []
+    for position, test_case in ranked:
+        serialized = compact_json(prompt_test_case_id(test_case, position)) + ":" + compact_json(prompt_test_case(test_case))
+        cost = count_tokens(serialized, model) + (1 if parts else 0)  # Separating comma
+        if budget_tokens > 0 and used + cost > budget_tokens:
+            continue
+        used += cost
+        parts.append(serialized)
+        packed.append(test_case)
+    return "{" + ",".join(parts) + "}", packed
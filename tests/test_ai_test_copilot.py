@@ -0,0 +1,213 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from src.ai_test_copilot import AITestCopilot
+
+class TestAITestCopilot:
+    """Test cases for the AITestCopilot LLM fan-out."""
+
+    def setup_method(self):
+        """Set up a copilot with mocked collaborators."""
+        self.copilot = AITestCopilot.__new__(AITestCopilot)
+        self.copilot.config = MagicMock(LLM_MAX_CONCURRENCY=2)
+        self.copilot.llm_client = MagicMock()
+        self.copilot.test_case_manager = MagicMock()
+        self.copilot.report_generator = MagicMock()
+        self.copilot._index_lock = threading.RLock()
+        self.copilot._test_case_locks = {}
+        self.copilot._test_case_locks_guard = threading.Lock()
+        self.copilot._unindexed_sessions = set()
+        self.copilot._index_behind = False
+        self.copilot._llm_loop = None
+        self.copilot._llm_loop_guard = threading.Lock()
+
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    async def _slow_generate(self, change_request, iw_overview, test_case_type, title, priority, existing, session_id):
+        """Fake LLM generation where earlier specs finish last."""
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.05 if title == 'first' else 0.01)
+        with self.lock:
+            self.in_flight -= 1
+        if title == 'broken':
+            raise Exception("LLM failure")
+        return {'title': title}
+
+    def test_generate_new_test_cases_keeps_order_and_skips_failures(self):
+        """Test that concurrent generation saves in spec order and warns on failures."""
+        self.copilot.llm_client.generate_test_case_async = self._slow_generate
+        saved = []
+        self.copilot.test_case_manager.reserve_test_case_ids.return_value = ['tc_007', 'tc_008', 'tc_009']
+        self.copilot.test_case_manager.create_new_test_case.side_effect = (
+            lambda tc, tc_type, session_id, test_case_id: saved.append(tc['title']) or f"test_cases/{test_case_id}.json"
+        )
+        analysis = {'new_test_cases_needed': [
+            {'title': title} for title in ['first', 'broken', 'third', 'fourth']
+        ]}
+
+        results = self.copilot._generate_new_test_cases('cr', 'overview', analysis, [], 'session')
+
+        assert [tc['title'] for tc in results] == ['first', 'third', 'fourth']
+        assert saved == ['first', 'third', 'fourth']
+        assert [tc['_file_name'] for tc in results] == ['tc_007.json', 'tc_008.json', 'tc_009.json']
+        self.copilot.test_case_manager.reserve_test_case_ids.assert_called_once_with(3)
+        assert self.max_in_flight == 2
+
+    def test_run_llm_tasks_on_the_shared_event_loop(self):
+        """Test that tasks of every caller run on one event loop, one at a time at a concurrency of one."""
+        self.copilot.config.LLM_MAX_CONCURRENCY = 1
+
+        async def task():
+            with self.lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            with self.lock:
+                self.in_flight -= 1
+            return asyncio.get_running_loop()
+
+        async def fail():
+            return 1 / 0
+
+        outcomes = self.copilot._run_llm_tasks([task, fail, task])
+        again = self.copilot._run_llm_tasks([task])
+
+        assert outcomes[0] == (self.copilot._llm_loop, None)
+        assert outcomes[1][0] is None
+        assert isinstance(outcomes[1][1], ZeroDivisionError)
+        assert again == [(self.copilot._llm_loop, None)]
+        assert self.max_in_flight == 1
+        assert self.copilot._run_llm_tasks([]) == []
+
+    def test_concurrent_updates_of_one_test_case_are_serialized(self):
+        """Test that two requests impacting the same test case do not overlap."""
+        async def slow_update(change_request, iw_overview, existing, changes, session_id):
+            with self.lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.02)
+            with self.lock:
+                self.in_flight -= 1
+            return {'title': change_request}
+
+        self.copilot.llm_client.update_existing_test_case_async = slow_update
+        self.copilot.test_case_manager.get_test_case_by_id.return_value = {'_file_name': 'tc_001.json'}
+        self.copilot.test_case_manager.update_test_case.return_value = 'test_cases/tc_001.json'
+        analysis = {'impacted_test_cases': [{'test_case_id': 'tc_001.json'}]}
+
+        threads = [
+            threading.Thread(target=self.copilot._process_impacted_test_cases, args=(cr, 'overview', analysis))
+            for cr in ('cr1', 'cr2')
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert self.copilot.test_case_manager.update_test_case.call_count == 2
+        assert self.max_in_flight == 1
+
+    def test_only_test_cases_about_to_be_written_are_journaled(self):
+        """Test that before-images are journaled after the LLM calls, for successful updates only."""
+        manager = self.copilot.test_case_manager
+        manager.get_test_case_by_id.side_effect = lambda test_case_id: {'_file_name': f'{test_case_id}.json'}
+        manager.update_test_case.side_effect = lambda test_case_id, tc, session_id: f'test_cases/{test_case_id}.json'
+        calls = []
+        manager.journal_before_images.side_effect = lambda session_id, names: calls.append(('journal', names))
+
+        async def update(change_request, iw_overview, existing, changes, session_id):
+            calls.append(('llm', existing['_file_name']))
+            if existing['_file_name'] == 'tc_002.json':
+                raise Exception("LLM failure")
+            return {'title': 'Updated'}
+
+        self.copilot.llm_client.update_existing_test_case_async = update
+        self.copilot.config.LLM_MAX_CONCURRENCY = 1
+        updated = self.copilot._update_test_cases(
+            'cr', 'overview', [('tc_001', {}), ('tc_002', {})], session_id='session'
+        )
+
+        assert [tc['_file_name'] for tc in updated] == ['tc_001.json']
+        assert calls == [('llm', 'tc_001.json'), ('llm', 'tc_002.json'), ('journal', ['tc_001.json'])]
+
+    def test_process_change_requests_shares_setup_and_keeps_order(self):
+        """Test that a batch loads context once and reports each request in input order."""
+        self.copilot._load_iw_overview = MagicMock(return_value='overview')
+        self.copilot._ensure_retriever_fitted = MagicMock()
+        self.copilot.semantic_retriever = MagicMock()
+        self.copilot.test_case_manager.corpus_fingerprint.return_value = 'after-batch'
+
+        def process(path, iw_overview, check_index):
+            assert iw_overview == 'overview'
+            assert check_index is False  # Fitted once for the whole batch
+            time.sleep(0.03 if path == 'a.md' else 0.01)
+            if path == 'b.md':
+                raise Exception("boom")
+            return f"reports/{path}.report"
+
+        self.copilot.process_change_request = MagicMock(side_effect=process)
+        self.copilot.report_generator.generate_batch_report.return_value = 'reports/batch.md'
+
+        outcome = self.copilot.process_change_requests(['a.md', 'b.md', 'c.md'], concurrency=3)
+
+        assert [r['change_request'] for r in outcome['results']] == ['a.md', 'b.md', 'c.md']
+        assert [r['status'] for r in outcome['results']] == ['success', 'error', 'success']
+        assert outcome['results'][1]['error'] == 'boom'
+        assert outcome['summary_report'] == 'reports/batch.md'
+        self.copilot._load_iw_overview.assert_called_once()
+        self.copilot._ensure_retriever_fitted.assert_called_once()
+        self.copilot.semantic_retriever.mark_current.assert_called_once_with('after-batch')
+
+    def test_index_is_marked_current_only_without_unindexed_writes(self):
+        """Test that a request does not mark the index current while another one's writes are unindexed."""
+        copilot = self.copilot
+        copilot.observability = MagicMock()
+        copilot.semantic_retriever = MagicMock()
+        copilot._load_change_request = MagicMock(return_value='CR')
+        copilot._ensure_retriever_fitted = MagicMock()
+        copilot._process_impacted_test_cases = MagicMock(return_value=[{'_file_name': 'tc_001.json'}])
+        copilot._generate_new_test_cases = MagicMock(return_value=[])
+        copilot.test_case_manager.corpus_fingerprint.return_value = 'after-writes'
+        mark_current = copilot.semantic_retriever.mark_current
+
+        # Another request of the batch has written but not reindexed yet
+        copilot._unindexed_sessions.add('other-session')
+        copilot.process_change_request('a.md', 'overview')
+        copilot.semantic_retriever.upsert_test_cases.assert_called_once_with([{'_file_name': 'tc_001.json'}])
+        mark_current.assert_not_called()
+
+        # A request failing after its writes started keeps the index unmarked until a refit
+        copilot._unindexed_sessions.clear()
+        copilot._generate_new_test_cases.side_effect = Exception("LLM failure")
+        with pytest.raises(Exception, match="LLM failure"):
+            copilot.process_change_request('b.md', 'overview')
+        copilot._generate_new_test_cases.side_effect = None
+        copilot.process_change_request('c.md', 'overview')
+        mark_current.assert_not_called()
+        assert copilot._unindexed_sessions == set()
+
+        copilot._index_behind = False  # As after a refit
+        copilot.process_change_request('d.md', 'overview')
+        mark_current.assert_called_once_with('after-writes')
+
+    def test_validate_all_test_cases_uses_one_corpus_snapshot(self):
+        """Test that validation reads the corpus once instead of looking up each file."""
+        manager = self.copilot.test_case_manager
+        manager.load_corpus.return_value = (
+            ['tc_001.json', 'tc_002.json', 'tc_003.json'],
+            [{'_file_name': 'tc_001.json'}, {'_file_name': 'tc_003.json'}],
+            {'tc_002.json': 'Expecting value'}
+        )
+        manager.validate_test_cases.return_value = {'tc_003.json': ["title: 7 is not of type 'string'"]}
+
+        results = self.copilot.validate_all_test_cases()
+
+        assert results['total_files'] == 3 and results['valid_files'] == 1
+        assert results['invalid_files'] == ['tc_002.json', 'tc_003.json']
+        manager.load_test_case.assert_not_called()
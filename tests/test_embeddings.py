@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import numpy as np
+from src.embeddings import HashingEmbedder
+
+class TestHashingEmbedder:
+    """Test cases for the HashingEmbedder class."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.embedder = HashingEmbedder(dimension=64)
+        self.texts = [
+            "Pro completes onboarding without resume",
+            "Business posts a shift and pro books it",
+            "",
+            "a an of",  # Only short words
+            "Shift shift SHIFT, shift!"
+        ]
+
+    def test_embed_batch_shape_and_dtype(self):
+        """Test that embed_batch returns one float32 row per text."""
+        embeddings = self.embedder.embed_batch(self.texts)
+
+        assert embeddings.shape == (len(self.texts), 64)
+        assert embeddings.dtype == np.float32
+
+    def test_rows_are_normalized(self):
+        """Test that non-empty rows are unit length and empty rows are zero."""
+        embeddings = self.embedder.embed_batch(self.texts)
+        norms = np.linalg.norm(embeddings, axis=1)
+
+        assert np.allclose(norms[[0, 1, 4]], 1.0, atol=1e-5)
+        assert norms[2] == 0
+        assert norms[3] == 0
+
+    def test_batch_matches_single(self):
+        """Test that batching does not change individual vectors."""
+        embedder = HashingEmbedder(dimension=64, batch_size=2)
+        batch = embedder.embed_batch(self.texts)
+
+        for i, text in enumerate(self.texts):
+            assert np.allclose(batch[i], embedder.embed(text))
+
+    def test_seed_changes_vectors(self):
+        """Test that a different seed yields different vectors and version."""
+        other = HashingEmbedder(dimension=64, seed=1)
+
+        assert other.version != self.embedder.version
+        assert not np.allclose(other.embed(self.texts[0]), self.embedder.embed(self.texts[0]))
+
+    def test_stable_across_processes(self):
+        """Test that vectors do not depend on the per-process hash salt."""
+        code = (
+            "from src.embeddings import HashingEmbedder;"
+            "print(HashingEmbedder(dimension=64).embed('onboarding resume shift').tobytes().hex())"
+        )
+        outputs = set()
+        for hash_seed in ("1", "2"):
+            env = dict(os.environ, PYTHONHASHSEED=hash_seed)
+            result = subprocess.run(
+                [sys.executable, "-c", code], capture_output=True, text=True, env=env,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            )
+            assert result.returncode == 0, result.stderr
+            outputs.add(result.stdout.strip())
+
+        assert len(outputs) == 1
@@ -0,0 +1,244 @@
+import random
+import tempfile
+import shutil
+from unittest.mock import patch
+from src.faiss_vector_db import FAISSVectorDB
+
+class TestFAISSVectorDB:
+    """Test cases for the FAISSVectorDB class."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.documents = [
+            {'id': 'tc_001.json', 'text': 'pro completes onboarding without resume', 'metadata': {'title': 'Onboarding'}},
+            {'id': 'tc_002.json', 'text': 'business posts shift and pro books shift', 'metadata': {'title': 'Booking'}},
+            {'id': 'tc_003.json', 'text': 'pro joins waitlist for full shift', 'metadata': {'title': 'Waitlist'}}
+        ]
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_add_documents_and_search(self):
+        """Test that added documents can be found by similarity."""
+        db = FAISSVectorDB(self.temp_dir, dimension=64)
+        db.add_documents(self.documents)
+
+        results = db.search('onboarding resume', top_k=1)
+        assert len(results) == 1
+        assert results[0]['metadata']['title'] == 'Onboarding'
+        assert results[0]['similarity_score'] > 0
+
+    def test_search_batch(self):
+        """Test that batched search returns one result list per query, matching single search."""
+        db = FAISSVectorDB(self.temp_dir, dimension=64)
+        db.add_documents(self.documents)
+
+        queries = ['onboarding resume', 'waitlist full shift', 'a b']  # Last query has no usable tokens
+        batch = db.search_batch(queries, top_k=2)
+
+        assert len(batch) == 3
+        assert batch[0][0]['metadata']['title'] == 'Onboarding'
+        assert batch[1][0]['metadata']['title'] == 'Waitlist'
+        assert batch[2] == []
+        for query, results in zip(queries, batch):
+            assert results == db.search(query, top_k=2)
+        assert db.search_batch([]) == []
+
+    def test_upsert_replaces_existing_document(self):
+        """Test that upserting an existing ID replaces its vector and metadata."""
+        db = FAISSVectorDB(self.temp_dir, dimension=64)
+        db.add_documents(self.documents)
+
+        db.upsert([{'id': 'tc_001.json', 'text': 'payment invoice refund', 'metadata': {'title': 'Payments'}}])
+
+        assert db.index.ntotal == 3
+        assert db.search('payment invoice refund', top_k=1)[0]['metadata']['title'] == 'Payments'
+        assert all(r['metadata']['title'] != 'Onboarding' for r in db.search('onboarding resume'))
+
+    def test_upsert_adds_new_document(self):
+        """Test that upserting a new ID keeps existing documents."""
+        db = FAISSVectorDB(self.temp_dir, dimension=64)
+        db.add_documents(self.documents)
+
+        db.upsert([{'id': 'tc_004.json', 'text': 'payment invoice refund', 'metadata': {'title': 'Payments'}}])
+
+        assert db.index.ntotal == 4
+        assert db.get_stats()['total_documents'] == 4
+
+    def test_delete(self):
+        """Test deleting documents by ID."""
+        db = FAISSVectorDB(self.temp_dir, dimension=64)
+        db.add_documents(self.documents)
+
+        assert db.delete(['tc_002.json', 'missing.json']) == 1
+        assert db.index.ntotal == 2
+        assert all(r['metadata']['title'] != 'Booking' for r in db.search('business posts shift'))
+        assert db.delete_document('tc_002.json') is False
+
+    def test_persisted_ids_survive_reload(self):
+        """Test that a reloaded database can still upsert and delete by ID."""
+        db = FAISSVectorDB(self.temp_dir, dimension=64)
+        db.add_documents(self.documents)
+
+        reloaded = FAISSVectorDB(self.temp_dir, dimension=64)
+        assert reloaded.index.ntotal == 3
+        assert reloaded.search('waitlist full shift', top_k=1)[0]['metadata']['title'] == 'Waitlist'
+
+        assert reloaded.delete(['tc_003.json']) == 1
+        assert reloaded.index.ntotal == 2
+
+    def test_embedding_cache_only_embeds_changed_documents(self):
+        """Test that refitting after a restart only embeds changed texts."""
+        db = FAISSVectorDB(self.temp_dir, dimension=64)
+        db.add_documents(self.documents)
+        assert db.get_stats()['embedding_cache_misses'] == 3
+
+        changed = [dict(doc) for doc in self.documents]
+        changed[1]['text'] = 'payment invoice refund'
+
+        reloaded = FAISSVectorDB(self.temp_dir, dimension=64)
+        reloaded.add_documents(changed)
+
+        stats = reloaded.get_stats()
+        assert stats['embedding_cache_hits'] == 2
+        assert stats['embedding_cache_misses'] == 1
+        # The stale entry for the old text is pruned
+        assert stats['embedding_cache_entries'] == 3
+        assert reloaded.search('payment invoice refund', top_k=1)[0]['id'] == 'tc_002.json'
+
+        # Keys and vectors live in one records file, swapped by a single replace
+        cache = reloaded.embedding_cache
+        assert cache.records_file.exists()
+        assert not any(path.exists() for path in cache.legacy_files)
+        assert list(cache.keys) == sorted(cache.keys)
+
+    def test_upserts_are_logged_without_rewriting_the_index(self):
+        """Test that upserts and deletes append to the delta log, which a reload replays."""
+        db = FAISSVectorDB(self.temp_dir, dimension=64)
+        db.add_documents(self.documents)
+        base_index = db.index_file
+
+        with patch('src.faiss_vector_db.faiss.write_index', side_effect=AssertionError("index rewritten")):
+            db.upsert([{'id': 'tc_004.json', 'text': 'payment invoice refund', 'metadata': {'title': 'Payments'}}])
+            db.delete(['tc_001.json'])
+            db.upsert([{'id': 'tc_002.json', 'text': 'overtime schedule review', 'metadata': {'title': 'Overtime'}}])
+        assert db.delta_file.stat().st_size == 3 * db.delta_dtype.itemsize
+        assert db.embedding_cache.pending_file.exists()
+
+        reloaded = FAISSVectorDB(self.temp_dir, dimension=64)
+        assert reloaded.index.ntotal == 3
+        assert reloaded.search('payment invoice refund', top_k=1)[0]['metadata']['title'] == 'Payments'
+        assert reloaded.search('overtime schedule review', top_k=1)[0]['metadata']['title'] == 'Overtime'
+        assert all(r['id'] != 'tc_001.json' for r in reloaded.search('onboarding resume'))
+        assert reloaded.get_stats()['embedding_cache_entries'] == 5
+
+        # A long delta log is folded into a new index generation
+        reloaded.DELTA_MIN_RECORDS = 3
+        reloaded.delete(['tc_003.json'])
+        assert reloaded.index_file != base_index
+        assert not base_index.exists() and not reloaded.delta_file.exists()
+        assert FAISSVectorDB(self.temp_dir, dimension=64).index.ntotal == 2
+
+        # A full refit merges the pending embeddings into the sorted cache
+        reloaded.add_documents(self.documents)
+        assert not reloaded.embedding_cache.pending_file.exists()
+        assert reloaded.get_stats()['embedding_cache_entries'] == 3
+
+    def test_corpus_fingerprint_persists_until_mutation(self):
+        """Test that a recorded corpus fingerprint survives a reload and is cleared by writes."""
+        db = FAISSVectorDB(self.temp_dir, dimension=64)
+        db.add_documents(self.documents)
+        assert db.corpus_fingerprint is None
+        db.set_corpus_fingerprint('abc123')
+
+        reloaded = FAISSVectorDB(self.temp_dir, dimension=64)
+        assert reloaded.corpus_fingerprint == 'abc123'
+        assert reloaded.get_stats()['corpus_fingerprint'] == 'abc123'
+
+        reloaded.delete(['tc_001.json'])
+        assert reloaded.corpus_fingerprint is None
+        assert FAISSVectorDB(self.temp_dir, dimension=64).corpus_fingerprint is None
+
+    def _corpus(self, size):
+        """Build a synthetic corpus large enough to train IVF/PQ indexes."""
+        words = ['shift', 'pro', 'business', 'onboarding', 'payment', 'waitlist', 'resume', 'invoice',
+                 'booking', 'cancel', 'review', 'rating', 'position', 'location', 'schedule', 'overtime']
+        rng = random.Random(0)
+        return [
+            {'id': f'tc_{i:04d}.json', 'text': ' '.join(rng.choice(words) + str(rng.randint(1, 20)) for _ in range(12)),
+             'metadata': {'n': i}}
+            for i in range(size)
+        ]
+
+    def test_index_types(self):
+        """Test building, searching, upserting and reloading each index type."""
+        documents = self._corpus(400)
+        for index_type, expected_spec in [('Flat', 'Flat'), ('IVF,Flat', 'IVF'), ('HNSW32', 'HNSW32'), ('IVF,PQ', 'PQ')]:
+            path = tempfile.mkdtemp(dir=self.temp_dir)
+            db = FAISSVectorDB(path, dimension=64, index_type=index_type, nprobe=64)
+            db.add_documents(documents)
+
+            stats = db.get_stats()
+            assert expected_spec in stats['index_type']
+            assert stats['configured_index_type'] == index_type
+            assert stats['is_trained'] is True
+            assert stats['index_memory_bytes'] > 0
+            assert db.search(documents[5]['text'], top_k=1)[0]['metadata']['n'] == 5
+
+            db.upsert([{'id': 'tc_0005.json', 'text': 'payment invoice refund', 'metadata': {'n': -1}}])
+            assert db.delete(['tc_0006.json']) == 1
+            assert db.get_stats()['index_size'] == 399
+
+            reloaded = FAISSVectorDB(path, dimension=64, index_type=index_type, nprobe=64)
+            assert reloaded.get_stats()['index_type'] == stats['index_type']
+            assert reloaded.get_stats()['index_size'] == 399
+            assert reloaded.search('payment invoice refund', top_k=1)[0]['metadata']['n'] == -1
+
+    def test_removal_without_support_is_tombstoned(self):
+        """Test that HNSW removals are filtered at search time and compacted on the next generation."""
+        documents = self._corpus(50)
+        db = FAISSVectorDB(self.temp_dir, dimension=64, index_type='HNSW32')
+        db.add_documents(documents)
+
+        with patch.object(FAISSVectorDB, '_compact_index', side_effect=AssertionError("index rebuilt")):
+            db.upsert([{'id': 'tc_0005.json', 'text': 'payment invoice refund', 'metadata': {'n': -1}}])
+            db.delete(['tc_0006.json'])
+            assert db.get_stats()['tombstoned_vectors'] == 2
+            assert db.index.ntotal == 51
+
+            results = db.search('payment invoice refund', top_k=50)
+            assert len({r['id'] for r in results}) == len(results)
+            assert 'tc_0006.json' not in {r['id'] for r in results}
+            assert results[0]['metadata']['n'] == -1
+            assert len(db.search(documents[1]['text'], top_k=3)) == 3
+            assert all(r['id'] != 'tc_0006.json' for r in db.search(documents[6]['text'], top_k=5))
+
+        # Replaying the delta log tombstones the same vectors
+        reloaded = FAISSVectorDB(self.temp_dir, dimension=64, index_type='HNSW32')
+        assert reloaded.get_stats()['tombstoned_vectors'] == 2
+        assert reloaded.search('payment invoice refund', top_k=1)[0]['metadata']['n'] == -1
+
+        # Writing a new generation drops the tombstoned vectors
+        reloaded.DELTA_MIN_RECORDS, reloaded.DELTA_MAX_FRACTION = 2, 0
+        reloaded.delete(['tc_0007.json'])
+        assert reloaded.get_stats()['tombstoned_vectors'] == 0
+        assert reloaded.index.ntotal == 48
+        assert FAISSVectorDB(self.temp_dir, dimension=64, index_type='HNSW32').index.ntotal == 48
+        assert reloaded.search(documents[10]['text'], top_k=1)[0]['metadata']['n'] == 10
+
+    def test_untrainable_index_falls_back_to_flat(self):
+        """Test that too small a corpus for the configured index uses a flat index."""
+        db = FAISSVectorDB(self.temp_dir, dimension=64, index_type='IVF1024,Flat')
+        db.add_documents(self.documents)
+
+        assert db.get_stats()['index_type'] == 'Flat'
+        assert db.search('onboarding resume', top_k=1)[0]['metadata']['title'] == 'Onboarding'
+
+    def test_changed_index_type_starts_fresh(self):
+        """Test that an index persisted with another index type is not reused."""
+        FAISSVectorDB(self.temp_dir, dimension=64).add_documents(self.documents)
+
+        db = FAISSVectorDB(self.temp_dir, dimension=64, index_type='HNSW32')
+        assert db.index.ntotal == 0
@@ -0,0 +1,87 @@
+import os
+import time
+import shutil
+import tempfile
+from src.llm_cache import LLMResponseCache
+
+class TestLLMResponseCache:
+    """Test cases for the LLMResponseCache class."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, 'cache', 'responses.sqlite')
+        self.request = {'model': 'gpt-4', 'messages': [{'role': 'user', 'content': 'hi'}],
+                        'max_tokens': 100, 'temperature': 0.1}
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_key_depends_on_every_request_field(self):
+        """Test that keys are stable and change with any request parameter."""
+        key = LLMResponseCache.key_for(self.request)
+        assert key == LLMResponseCache.key_for(dict(reversed(list(self.request.items()))))
+        for field, value in [('model', 'gpt-3.5'), ('max_tokens', 200), ('temperature', 0.2),
+                             ('messages', [{'role': 'user', 'content': 'hello'}])]:
+            assert LLMResponseCache.key_for({**self.request, field: value}) != key
+
+    def test_put_get_and_persistence(self):
+        """Test that stored responses are returned, also from a new instance."""
+        cache = LLMResponseCache(self.db_path)
+        key = LLMResponseCache.key_for(self.request)
+        assert cache.get(key) is None
+
+        cache.put(key, {'summary': 'ok'})
+        assert cache.get(key) == {'summary': 'ok'}
+        assert LLMResponseCache(self.db_path).get(key) == {'summary': 'ok'}
+        assert cache.get_stats()['llm_cache_entries'] == 1
+
+        cache.delete(key)
+        assert cache.get(key) is None
+
+        cache.put(key, {'summary': 'ok'})
+        cache.clear()
+        assert cache.get(key) is None
+
+    def test_ttl_expiry(self):
+        """Test that entries older than the TTL are not served."""
+        cache = LLMResponseCache(self.db_path, ttl_seconds=0.05)
+        cache.put('k', {'v': 1})
+        time.sleep(0.1)
+
+        assert cache.get('k') is None
+        assert cache.get_stats()['llm_cache_entries'] == 0
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entries are evicted past the size limit."""
+        cache = LLMResponseCache(self.db_path, max_bytes=250)
+        payload = {'text': 'x' * 80}  # ~91 bytes encoded
+        cache.put('a', payload)
+        time.sleep(0.01)
+        cache.put('b', payload)
+        time.sleep(0.01)
+        cache.get('a')  # 'b' is now least recently used
+        time.sleep(0.01)
+        cache.put('c', payload)
+
+        assert cache.get('a') == payload
+        assert cache.get('b') is None
+        assert cache.get('c') == payload
+        assert cache.get_stats()['llm_cache_bytes'] <= 250
+
+    def test_running_total_size(self):
+        """Test that the stored size total follows puts, replacements, deletes and clears."""
+        cache = LLMResponseCache(self.db_path)
+        cache.put('a', {'text': 'x' * 10})
+        cache.put('b', {'text': 'y' * 20})
+        cache.put('a', {'text': 'x' * 30})  # Replacing an entry swaps its size
+        cache.delete('b')
+
+        with cache._connect() as conn:
+            summed = conn.execute("SELECT SUM(size) FROM responses").fetchone()[0]
+        assert cache.get_stats()['llm_cache_bytes'] == summed == len('{"text":""}') + 30
+
+        cache.clear()
+        assert cache.get_stats()['llm_cache_bytes'] == 0
+        assert LLMResponseCache(self.db_path).get_stats()['llm_cache_bytes'] == 0
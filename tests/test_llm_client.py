@@ -0,0 +1,206 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import httpx
+import openai
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+from src.llm_client import LLMClient, AsyncLLMClient
+from src.rate_limiter import TokenBucketRateLimiter
+
+class TestAsyncLLMClient:
+    """Test cases for the AsyncLLMClient class."""
+
+    def _completion(self, content):
+        return MagicMock(usage=MagicMock(total_tokens=10), choices=[MagicMock(message=MagicMock(content=content))])
+
+    def _rate_limit_error(self, retry_after):
+        request = httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')
+        response = httpx.Response(429, headers={'retry-after': retry_after}, request=request)
+        return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+    @patch('src.llm_client.Config.OPENAI_API_KEY', 'test-key')
+    def test_rate_limited_call_honours_retry_after(self):
+        """Test that a 429 is retried after its Retry-After and blocks the shared limiter."""
+        limiter = TokenBucketRateLimiter()
+        client = AsyncLLMClient(rate_limiter=limiter, observability=MagicMock(), use_cache=False)
+        client.async_client = MagicMock()
+        client.async_client.chat.completions.create = AsyncMock(side_effect=[
+            self._rate_limit_error('0.01'),
+            self._completion('{"ok": true}')
+        ])
+        client.async_client.close = AsyncMock()
+
+        async def run():
+            async with client:
+                return await client._make_llm_call_async('prompt')
+
+        with patch.object(limiter, 'block_for', wraps=limiter.block_for) as block_for:
+            assert asyncio.run(run()) == {'ok': True}
+            block_for.assert_called_once_with(0.01)
+
+        assert client.async_client.chat.completions.create.await_count == 2
+        client.async_client.close.assert_awaited_once()
+
+    @patch('src.llm_client.Config.OPENAI_API_KEY', 'test-key')
+    def test_concurrent_calls_share_one_client(self):
+        """Test that concurrent calls run through the same async client."""
+        client = AsyncLLMClient(rate_limiter=TokenBucketRateLimiter(), observability=MagicMock(), use_cache=False)
+        client.async_client = MagicMock()
+        client.async_client.chat.completions.create = AsyncMock(
+            side_effect=[self._completion(f'{{"n": {i}}}') for i in range(5)]
+        )
+
+        async def run():
+            return await asyncio.gather(*(client._make_llm_call_async(f'prompt {i}') for i in range(5)))
+
+        results = asyncio.run(run())
+        assert sorted(result['n'] for result in results) == list(range(5))
+        assert client.async_client.chat.completions.create.await_count == 5
+
+    @patch('src.llm_client.Config.OPENAI_API_KEY', 'test-key')
+    def test_cache_and_metrics_io_stay_off_the_event_loop(self):
+        """Test that response cache and observability calls run in worker threads."""
+        threads = []
+        record = lambda *args, **kwargs: threads.append(threading.current_thread())
+        observability = MagicMock()
+        observability.log_cache_event.side_effect = record
+        observability.record_latency.side_effect = record
+        observability.log_llm_call.side_effect = record
+        client = AsyncLLMClient(rate_limiter=TokenBucketRateLimiter(), observability=observability, use_cache=False)
+        client.response_cache = MagicMock()
+        client.response_cache.get.side_effect = lambda key: record()
+        client.response_cache.put.side_effect = lambda key, response: record()
+        client.async_client = MagicMock()
+        client.async_client.chat.completions.create = AsyncMock(return_value=self._completion('{"ok": true}'))
+
+        async def run():
+            return await client._make_llm_call_async('prompt', 'session'), threading.current_thread()
+
+        result, loop_thread = asyncio.run(run())
+        assert result == {'ok': True}
+        assert len(threads) == 5
+        assert loop_thread not in threads
+
+
+class TestLLMClientCache:
+    """Test cases for LLMClient response caching."""
+
+    def setup_method(self):
+        """Set up a temporary cache location."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        """Clean up the temporary cache."""
+        shutil.rmtree(self.temp_dir)
+
+    def _client(self, use_cache=True):
+        with patch('src.llm_client.Config.OPENAI_API_KEY', 'test-key'), \
+                patch('src.llm_client.Config.LLM_CACHE_PATH', os.path.join(self.temp_dir, 'cache.sqlite')):
+            client = LLMClient(rate_limiter=TokenBucketRateLimiter(), observability=MagicMock(), use_cache=use_cache)
+        client.client = MagicMock()
+        completion = MagicMock(usage=MagicMock(total_tokens=10),
+                               choices=[MagicMock(message=MagicMock(content='{"ok": true}'))])
+        client.client.chat.completions.create.return_value = completion
+        return client
+
+    def test_repeated_prompt_is_served_from_cache(self):
+        """Test that an identical request is answered from the cache and counted as a hit."""
+        client = self._client()
+
+        assert client._make_llm_call('prompt', 'session') == {'ok': True}
+        assert client._make_llm_call('prompt', 'session') == {'ok': True}
+        assert client.client.chat.completions.create.call_count == 1
+
+        client.observability.log_cache_event.assert_any_call('session', hit=False)
+        client.observability.log_cache_event.assert_any_call('session', hit=True)
+
+        # Another prompt, or another temperature, is a different request
+        client._make_llm_call('other prompt')
+        client.temperature = 0.5
+        client._make_llm_call('prompt')
+        assert client.client.chat.completions.create.call_count == 3
+
+    def test_schema_invalid_response_is_not_kept(self):
+        """Test that a response rejected by schema validation is dropped from the cache."""
+        client = self._client()
+        client.max_retries = 1
+        client.retry_delay = 0
+
+        with pytest.raises(Exception, match="no schema-valid response"):
+            client._call_with_schema_retry('prompt', None, 'generate test case')
+        assert client.response_cache.get_stats()['llm_cache_entries'] == 0
+
+        # Asking again reaches the LLM instead of replaying the rejected response
+        with pytest.raises(Exception):
+            client._call_with_schema_retry('prompt', None, 'generate test case')
+        assert client.client.chat.completions.create.call_count == 4
+
+    def test_no_cache(self):
+        """Test that disabling the cache always calls the API."""
+        client = self._client(use_cache=False)
+
+        client._make_llm_call('prompt')
+        client._make_llm_call('prompt')
+
+        assert client.response_cache is None
+        assert client.client.chat.completions.create.call_count == 2
+        client.observability.log_cache_event.assert_not_called()
+
+
+class TestLLMClientPromptLayout:
+    """Test cases for the cache-friendly prompt layout."""
+
+    def setup_method(self):
+        """Set up a client whose completions fail schema validation once."""
+        with patch('src.llm_client.Config.OPENAI_API_KEY', 'test-key'):
+            self.client = LLMClient(rate_limiter=TokenBucketRateLimiter(), observability=MagicMock(), use_cache=False)
+        self.client.client = MagicMock()
+        self.client.retry_delay = 0
+
+        usage = MagicMock(total_tokens=120, prompt_tokens=100, completion_tokens=20,
+                          prompt_tokens_details=MagicMock(cached_tokens=64))
+        valid = '{"title": "Valid title", "type": "functional", "priority": "P2 - High", ' \
+                '"steps": [{"step_text": "Open the shift list", "step_expected": "The shift list is shown"}]}'
+        self.client.client.chat.completions.create.side_effect = [
+            MagicMock(usage=usage, choices=[MagicMock(message=MagicMock(content=content))])
+            for content in ('{"title": "x"}', valid)
+        ]
+
+    def test_shared_system_prefix_across_tasks(self):
+        """Test that every task starts with the same system message and ends with its per-call data."""
+        case = {'_file_name': 'tc_001.json', 'title': 'Case', 'steps': []}
+        prompts = [
+            self.client._analyze_prompt('CR one', 'Overview', [case]),
+            self.client._generate_prompt('CR two', 'Overview', 'edge', 'Title', 'P2 - High', []),
+            self.client._update_prompt('CR three', 'Overview', case, ['Change'])
+        ]
+
+        assert len({prompt[0]['content'] for prompt in prompts}) == 1
+        assert 'Overview' in prompts[0][0]['content']
+        assert [prompt[0]['role'] for prompt in prompts] == ['system'] * 3
+        assert prompts[0][1]['content'].rstrip().endswith('CR one')
+        assert prompts[1][1]['content'].rstrip().endswith('- Priority: P2 - High')
+        assert prompts[2][1]['content'].rstrip().endswith('- Change')
+        assert '{"tc_001":{"title":"Case","steps":[]}}' in prompts[0][1]['content']
+        assert '{"title":"Case","steps":[]}' in prompts[2][1]['content']
+        assert 'tc_001' not in prompts[2][1]['content']
+
+    def test_schema_retry_appends_a_message_and_records_cached_tokens(self):
+        """Test that a retry keeps the earlier messages byte-identical and logs provider cache usage."""
+        result = self.client.generate_test_case('CR', 'Overview', 'edge', 'Title', 'P2 - High', [], 'session')
+        assert result['title'] == 'Valid title'
+
+        first, second = [call.kwargs['messages'] for call in self.client.client.chat.completions.create.call_args_list]
+        assert second[:len(first)] == first
+        assert second[len(first):] == [
+            {'role': 'assistant', 'content': '{"title":"x"}'},
+            {'role': 'user', 'content': LLMClient.SCHEMA_RETRY_INSTRUCTIONS}
+        ]
+
+        self.client.observability.log_llm_call.assert_called_with(
+            'session', self.client.model, 120, self.client._calculate_cost(120),
+            prompt_tokens=100, completion_tokens=20, cached_tokens=64
+        )
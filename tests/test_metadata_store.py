@@ -0,0 +1,87 @@
+import tempfile
+import shutil
+import pytest
+from unittest.mock import patch
+from src.metadata_store import MetadataStore
+
+class TestMetadataStore:
+    """Test cases for the MetadataStore class."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_put_get_before_and_after_save(self):
+        """Test that records are readable while pending and after a reload."""
+        store = MetadataStore(self.temp_dir)
+        store.put(7, {'id': 'tc_001.json', 'title': 'Onboarding'})
+        assert store.get(7)['title'] == 'Onboarding'
+        assert len(store) == 1
+
+        store.save()
+        reloaded = MetadataStore(self.temp_dir)
+        assert len(reloaded) == 1
+        assert 7 in reloaded
+        assert reloaded.get(7) == {'id': 'tc_001.json', 'title': 'Onboarding'}
+        assert reloaded.get(8) is None
+
+    def test_replace_and_remove(self):
+        """Test replacing and removing persisted records."""
+        store = MetadataStore(self.temp_dir)
+        store.put(1, {'title': 'One'})
+        store.put(2, {'title': 'Two'})
+        store.save()
+
+        store.put(1, {'title': 'One again'})
+        store.remove(2)
+        assert len(store) == 1
+        store.save()
+
+        reloaded = MetadataStore(self.temp_dir)
+        assert reloaded.get_many([1, 2]) == [{'title': 'One again'}, None]
+        assert 2 not in reloaded
+
+    def test_compaction_drops_garbage(self):
+        """Test that repeated replacements are compacted away."""
+        store = MetadataStore(self.temp_dir)
+        for i in range(200):
+            store.put(1, {'title': 'x' * 100, 'version': i})
+            store.save()
+
+        assert store.get(1)['version'] == 199
+        assert store.get_stats()['metadata_bytes'] < 20 * 1024
+        assert MetadataStore(self.temp_dir).get(1)['version'] == 199
+
+    def test_interrupted_compaction_keeps_the_previous_records(self):
+        """Test that a crash before the index switch leaves the store readable as before."""
+        store = MetadataStore(self.temp_dir)
+        for i in range(3):
+            store.put(1, {'version': i})
+            store.put(2, {'title': 'Two'})
+            store.save()
+        old_records = store.records_file
+
+        with patch.object(store, '_write_index', side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                store.compact()
+        reloaded = MetadataStore(self.temp_dir)
+        assert reloaded.records_file == old_records
+        assert reloaded.get_many([1, 2]) == [{'version': 2}, {'title': 'Two'}]
+
+        reloaded.compact()
+        assert reloaded.records_file != old_records and not old_records.exists()
+        assert MetadataStore(self.temp_dir).get_many([1, 2]) == [{'version': 2}, {'title': 'Two'}]
+
+    def test_clear(self):
+        """Test that clear removes everything."""
+        store = MetadataStore(self.temp_dir)
+        store.put(1, {'title': 'One'})
+        store.save()
+        store.clear()
+
+        assert len(store) == 0
+        assert len(MetadataStore(self.temp_dir)) == 0
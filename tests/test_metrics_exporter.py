@@ -0,0 +1,82 @@
+import shutil
+import tempfile
+import urllib.request
+from unittest.mock import patch
+from src.observability import ObservabilityManager
+from src.metrics_exporter import MetricsExporter, render_openmetrics, persisted_vector_stats, CONTENT_TYPE
+from src.faiss_vector_db import FAISSVectorDB
+
+class TestMetricsExporter:
+    """Test cases for the OpenMetrics exporter."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_patch = patch('src.observability.Config')
+        mock_config = self.config_patch.start()
+        mock_config.REPORTS_DIR = self.temp_dir
+        mock_config.METRICS_SESSION_RETENTION = 1000
+        mock_config.METRICS_SESSION_MAX_AGE_DAYS = 30
+
+        self.manager = ObservabilityManager()
+        self.manager.start_session('s1', 'cr.md')
+        self.manager.log_llm_call('s1', 'gpt-4', 150, 0.02, prompt_tokens=120, completion_tokens=30, cached_tokens=64)
+        self.manager.log_cache_event('s1', hit=True)
+        self.manager.log_cache_event('s1', hit=False)
+        for seconds in (0.003, 0.2, 0.2, 4.0):
+            self.manager.record_latency('analyze', seconds, 's1')
+        self.manager.end_session('s1', 'success', test_cases_generated=1)
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.config_patch.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_render_openmetrics(self):
+        """Test counters, cache ratio, histogram buckets and vector gauges."""
+        text = render_openmetrics(self.manager, lambda: {'total_documents': 7, 'index_memory_bytes': 1024})
+        lines = text.splitlines()
+
+        assert 'copilot_requests_total{status="success"} 1' in lines
+        assert 'copilot_llm_tokens_total 150' in lines
+        assert 'copilot_llm_prompt_tokens_total 120' in lines
+        assert 'copilot_llm_completion_tokens_total 30' in lines
+        assert 'copilot_llm_cached_prompt_tokens_total 64' in lines
+        assert '# UNIT copilot_llm_cost_dollars dollars' in lines
+        assert 'copilot_llm_cache_lookups_total{result="hit"} 1' in lines
+        assert 'copilot_llm_cache_hit_ratio 0.5' in lines
+        assert 'copilot_stage_duration_seconds_bucket{stage="analyze",le="0.005"} 1' in lines
+        assert 'copilot_stage_duration_seconds_bucket{stage="analyze",le="0.25"} 3' in lines
+        assert 'copilot_stage_duration_seconds_bucket{stage="analyze",le="2.5"} 3' in lines
+        assert 'copilot_stage_duration_seconds_bucket{stage="analyze",le="+Inf"} 4' in lines
+        assert 'copilot_stage_duration_seconds_count{stage="analyze"} 4' in lines
+        assert 'copilot_vector_index_documents 7' in lines
+        assert lines[-1] == '# EOF'
+
+    def test_persisted_vector_stats_reads_the_index_info(self):
+        """Test that vector stats come from the saved info and index files, not the metadata store."""
+        db_path = tempfile.mkdtemp(dir=self.temp_dir)
+        db = FAISSVectorDB(db_path, dimension=64)
+        db.add_documents([{'id': f'tc_{i}.json', 'text': f'shift {i}'} for i in range(3)])
+        db.delete(['tc_0.json'])
+
+        with patch('src.metadata_store.MetadataStore.__init__', side_effect=AssertionError("metadata store opened")):
+            stats = persisted_vector_stats(db_path)
+
+        assert stats['total_documents'] == 2
+        assert stats['index_memory_bytes'] == db.index_file.stat().st_size
+
+    def test_http_scrape_picks_up_other_writers(self):
+        """Test scraping over HTTP, reloading events logged by another manager."""
+        exporter = MetricsExporter(self.manager, port=0, reload_on_scrape=True).start()
+        try:
+            other = ObservabilityManager()
+            other.start_session('s2', 'cr.md')
+            other.end_session('s2', 'error')
+
+            with urllib.request.urlopen(exporter.url) as response:
+                assert response.headers['Content-Type'] == CONTENT_TYPE
+                body = response.read().decode('utf-8')
+            assert 'copilot_requests_total{status="error"} 1' in body.splitlines()
+        finally:
+            exporter.stop()
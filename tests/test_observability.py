@@ -0,0 +1,200 @@
+import os
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from src.observability import ObservabilityManager, LatencyHistogram
+
+class TestObservabilityManager:
+    """Test cases for the ObservabilityManager event log."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_patch = patch('src.observability.Config')
+        mock_config = self.config_patch.start()
+        mock_config.REPORTS_DIR = self.temp_dir
+        mock_config.METRICS_SESSION_RETENTION = 1000
+        mock_config.METRICS_SESSION_MAX_AGE_DAYS = 30
+        self.mock_config = mock_config
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.config_patch.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def _run_session(self, manager, session_id, tokens=100):
+        manager.start_session(session_id, 'cr.md')
+        manager.log_llm_call(session_id, 'gpt-4', tokens, 0.01)
+        manager.log_retry_attempt(session_id, 'API error')
+        manager.log_cache_event(session_id, hit=True)
+        manager.end_session(session_id, 'success', test_cases_generated=2)
+
+    def test_events_are_appended_not_rewritten(self):
+        """Test that events go to the log and are replayed on load."""
+        manager = ObservabilityManager()
+        self._run_session(manager, 's1')
+
+        assert not os.path.exists(manager.metrics_file)
+        with open(manager.events_file) as f:
+            assert len(f.readlines()) == 6  # Header plus five events
+
+        summary = ObservabilityManager().get_metrics_summary()
+        assert summary['total_requests'] == 1
+        assert summary['total_tokens_used'] == 100
+        assert summary['retry_attempts'] == 1
+        assert summary['test_cases_generated'] == 2
+        assert summary['llm_cache_hits'] == 1
+
+    def test_concurrent_writers_do_not_clobber(self):
+        """Test that two managers on the same files keep each other's events."""
+        first, second = ObservabilityManager(), ObservabilityManager()
+        first.start_session('a', 'a.md')
+        second.start_session('b', 'b.md')
+        first.log_llm_call('a', 'gpt-4', 10, 0.0)
+        second.log_llm_call('b', 'gpt-4', 20, 0.0)
+        first.end_session('a', 'success')
+        second.end_session('b', 'error')
+
+        summary = ObservabilityManager().get_metrics_summary()
+        assert summary['total_requests'] == 2
+        assert summary['total_tokens_used'] == 30
+        assert summary['success_rate'] == 50.0
+
+    def test_compaction(self):
+        """Test that a large log is folded into the snapshot and truncated."""
+        with patch.object(ObservabilityManager, 'COMPACTION_THRESHOLD_BYTES', 2000):
+            manager = ObservabilityManager()
+            for i in range(10):
+                self._run_session(manager, f's{i}')
+
+            assert os.path.exists(manager.metrics_file)
+            assert os.path.getsize(manager.events_file) < 2000
+            assert manager.get_metrics_summary()['total_requests'] == 10
+            assert ObservabilityManager().get_metrics_summary()['total_requests'] == 10
+
+    def test_log_compacted_before_crash_is_not_replayed(self):
+        """Test that a log already folded into the snapshot is not applied twice."""
+        manager = ObservabilityManager()
+        self._run_session(manager, 's1')
+        with open(manager.events_file) as f:
+            log_id = json.loads(f.readline())['log_id']
+
+        # Simulate a crash between writing the snapshot and truncating the log
+        snapshot = dict(manager.metrics, compacted_log_id=log_id)
+        with open(manager.metrics_file, 'w') as f:
+            json.dump(snapshot, f)
+
+        assert ObservabilityManager().get_metrics_summary()['total_requests'] == 1
+
+    def test_reset_metrics(self):
+        """Test that a reset clears the snapshot and the log."""
+        manager = ObservabilityManager()
+        self._run_session(manager, 's1')
+        manager.reset_metrics()
+
+        assert ObservabilityManager().get_metrics_summary()['total_requests'] == 0
+
+    def test_session_retention_rolls_up_old_sessions(self):
+        """Test that sessions beyond the retention count are rolled up, keeping totals."""
+        self.mock_config.METRICS_SESSION_RETENTION = 3
+        manager = ObservabilityManager()
+        for i in range(5):
+            self._run_session(manager, f's{i}')
+
+        assert [s['session_id'] for s in manager.get_recent_sessions(10)] == ['s2', 's3', 's4']
+        assert [s['session_id'] for s in manager.get_recent_sessions(2)] == ['s3', 's4']
+        assert manager._get_current_session('s0') is None
+
+        daily = manager.get_rollups('daily')
+        assert len(daily) == 1
+        assert daily[0]['sessions'] == 2
+        assert daily[0]['successful'] == 2
+        assert daily[0]['tokens_used'] == 200
+        assert manager.get_rollups('hourly')[0]['sessions'] == 2
+
+        summary = manager.get_metrics_summary()
+        assert summary['total_requests'] == 5
+        assert summary['success_rate'] == 100.0
+
+        # Replaying the log yields the same state
+        reloaded = ObservabilityManager()
+        assert reloaded.get_recent_sessions(10) == manager.get_recent_sessions(10)
+        assert reloaded.get_rollups('daily') == daily
+
+    def test_running_sessions_outlive_the_retention_count(self):
+        """Test that a running session is not rolled up by newer ones, so its end still counts."""
+        self.mock_config.METRICS_SESSION_RETENTION = 2
+        manager = ObservabilityManager()
+        manager.start_session('long', 'cr.md')
+        manager.log_llm_call('long', 'gpt-4', 50, 0.01)
+        for i in range(3):
+            self._run_session(manager, f's{i}')
+
+        assert [s['session_id'] for s in manager.get_recent_sessions(10)] == ['long', 's2']
+        manager.end_session('long', 'error')
+
+        summary = manager.get_metrics_summary()
+        assert summary['total_requests'] == 4
+        assert summary['total_tokens_used'] == 350
+        self._run_session(manager, 's3')
+        assert [s['session_id'] for s in manager.get_recent_sessions(10)] == ['s2', 's3']
+        assert ObservabilityManager().get_metrics_summary()['total_requests'] == 5
+
+    def test_aggregate_snapshot_is_a_copy(self):
+        """Test that the aggregate snapshot holds global counters and detached histograms."""
+        manager = ObservabilityManager()
+        self._run_session(manager, 's1')
+        manager.record_latency('analyze', 0.5)
+
+        snapshot = manager.get_aggregate_snapshot()
+        assert snapshot['total_tokens_used'] == 100 and snapshot['llm_cache_hits'] == 1
+        assert 'sessions' not in snapshot
+
+        manager.record_latency('analyze', 0.5)
+        assert snapshot['latency']['analyze'].count == 1
+        assert manager.get_aggregate_snapshot()['latency']['analyze'].count == 2
+
+    def test_session_max_age(self):
+        """Test that sessions older than the maximum age are rolled up on load."""
+        manager = ObservabilityManager()
+        manager._record({'type': 'session_start', 'session_id': 'old', 'change_request_path': 'cr.md',
+                         'time': (datetime.now() - timedelta(days=31)).isoformat()})
+        manager.end_session('old', 'success')
+        assert len(manager.get_recent_sessions()) == 1
+
+        reloaded = ObservabilityManager()
+        assert reloaded.get_recent_sessions() == []
+        assert reloaded.get_rollups('daily')[0]['sessions'] == 1
+        assert reloaded.get_metrics_summary()['total_requests'] == 1
+
+    def test_latency_histograms(self):
+        """Test that spans feed per-stage histograms with percentiles that survive reload."""
+        manager = ObservabilityManager()
+        manager.start_session('s1', 'cr.md')
+        for i in range(1, 101):
+            manager.record_latency('analyze', i / 100, 's1')
+        with manager.span('report', 's1'):
+            pass
+
+        latency = manager.get_metrics_summary()['latency']
+        assert latency['analyze']['count'] == 100
+        assert abs(latency['analyze']['p50'] - 0.5) <= 0.05
+        assert abs(latency['analyze']['p95'] - 0.95) <= 0.09
+        assert latency['analyze']['p99'] <= latency['analyze']['max'] == 1.0
+        assert latency['report']['count'] == 1
+        assert manager.get_recent_sessions()[0]['stage_seconds']['analyze'] > 50
+
+        manager._save_metrics()
+        assert ObservabilityManager().get_latency_summary() == manager.get_latency_summary()
+
+    def test_histogram_percentile_accuracy(self):
+        """Test that log buckets keep relative error small across scales."""
+        histogram = LatencyHistogram()
+        for seconds in [0.001, 0.01, 0.1, 1.0, 10.0, 100.0]:
+            histogram.record(seconds)
+            assert histogram.bucket_upper_bound(histogram.bucket_index(seconds)) / seconds < 1.1
+        assert 0.001 <= histogram.percentile(0) < 0.0011
+        assert histogram.percentile(100) == 100.0
+        assert LatencyHistogram().percentile(50) == 0.0
@@ -0,0 +1,89 @@
+import os
+import json
+import shutil
+import tempfile
+import pytest
+from unittest.mock import patch
+from src.test_case_manager import TestCaseManager
+from src.packed_corpus import import_directory, export_directory
+
+class TestPackedCorpus:
+    """Test cases for the packed SQLite test case corpus."""
+
+    def setup_method(self):
+        """Set up a per-file corpus and a schema."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.test_cases_dir = os.path.join(self.temp_dir, 'test_cases')
+        self.db_path = os.path.join(self.temp_dir, 'corpus.sqlite')
+        os.makedirs(self.test_cases_dir)
+
+        self.schema_path = os.path.join(self.temp_dir, 'schema.json')
+        with open(self.schema_path, 'w') as f:
+            json.dump({"type": "object", "required": ["title", "type", "priority"]}, f)
+
+        for i, priority in [(1, 'P2 - High'), (2, 'P3 - Medium'), (1000, 'P2 - High')]:
+            with open(os.path.join(self.test_cases_dir, f'tc_{i:03d}.json'), 'w') as f:
+                json.dump({'title': f'Case {i}', 'type': 'functional', 'priority': priority}, f)
+
+        self.config_patch = patch('src.test_case_manager.Config')
+        mock_config = self.config_patch.start()
+        mock_config.TEST_CASES_DIR = self.test_cases_dir
+        mock_config.SCHEMA_PATH = self.schema_path
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.config_patch.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_manager_on_packed_corpus(self):
+        """Test loading, numbering, updating and backing up through the packed store."""
+        assert import_directory(self.test_cases_dir, self.db_path) == 3
+        manager = TestCaseManager(self.db_path)
+
+        assert manager.list_test_cases() == ['tc_001.json', 'tc_002.json', 'tc_1000.json']
+        assert manager.get_test_case_by_id('tc_002')['title'] == 'Case 2'
+        assert len(manager.find_test_cases(priority='P2 - High')) == 2
+
+        fingerprint = manager.corpus_fingerprint()
+        path = manager.create_new_test_case({'title': 'New', 'type': 'functional', 'priority': 'P4 - Low'}, 'edge')
+        assert os.path.basename(path) == 'tc_1001.json'
+        assert manager.corpus_fingerprint() != fingerprint
+
+        manager.update_test_case('tc_001', {'title': 'Updated', 'type': 'functional', 'priority': 'P1 - Critical'})
+        assert TestCaseManager(self.db_path).get_test_case_by_id('tc_001')['title'] == 'Updated'
+
+        # Backups go into the corpus file instead of loose files next to it
+        backup_path = manager.backup_test_case('tc_001.json')
+        assert not os.path.exists(os.path.dirname(backup_path))
+        assert json.loads(manager.repository.read_backup(os.path.basename(backup_path)))['title'] == 'Updated'
+        assert manager.list_test_cases() == ['tc_001.json', 'tc_002.json', 'tc_1000.json', 'tc_1001.json']
+        with pytest.raises(Exception, match="Failed to create backup"):
+            manager.backup_test_case('missing.json')
+
+    def test_writes_from_another_process_are_picked_up(self):
+        """Test that a cached store fetches rows written through another handle."""
+        import_directory(self.test_cases_dir, self.db_path)
+        reader, writer = TestCaseManager(self.db_path), TestCaseManager(self.db_path)
+        assert len(reader.load_all_test_cases()) == 3
+
+        writer.save_test_case({'title': 'Edited', 'type': 'functional', 'priority': 'P2 - High'}, 'tc_002.json')
+        assert reader.get_test_case_by_id('tc_002')['title'] == 'Edited'
+
+    def test_id_reservation_shared_between_handles(self):
+        """Test that the corpus sequence hands out each ID once and survives reopening."""
+        import_directory(self.test_cases_dir, self.db_path)
+        first, second = TestCaseManager(self.db_path), TestCaseManager(self.db_path)
+
+        assert first.reserve_test_case_ids(2) == ['tc_1001', 'tc_1002']
+        assert second.reserve_test_case_ids(1) == ['tc_1003']
+        assert TestCaseManager(self.db_path).reserve_test_case_ids(1) == ['tc_1004']
+
+    def test_export_round_trip(self):
+        """Test that exporting recreates the per-file layout."""
+        import_directory(self.test_cases_dir, self.db_path)
+        target = os.path.join(self.temp_dir, 'exported')
+
+        assert export_directory(self.db_path, target) == 3
+        for name in os.listdir(self.test_cases_dir):
+            with open(os.path.join(self.test_cases_dir, name)) as a, open(os.path.join(target, name)) as b:
+                assert json.load(a) == json.load(b)
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import pytest
+from unittest.mock import patch
+from src.prompt_manager import PromptManager, PromptTemplate
+
+class TestPromptManager:
+    """Test cases for the prompt template registry."""
+
+    def setup_method(self):
+        """Set up a prompts directory with one template."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.template_path = os.path.join(self.temp_dir, 'greet.txt')
+        self._write_template("CONTEXT:\n{iw_overview}\n\nHello {name!r}, {count:>3} items {{literal}}\n")
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def _write_template(self, text, mtime_ns=None):
+        """Write the template, optionally forcing its modification time."""
+        with open(self.template_path, 'w') as f:
+            f.write(text)
+        if mtime_ns is not None:
+            os.utime(self.template_path, ns=(mtime_ns, mtime_ns))
+
+    def test_render_matches_str_format(self):
+        """Test that parsed templates render exactly like str.format."""
+        text = "A {a} b {b!r} c {c:05.1f} {{x}} {a}"
+        values = {'a': 'one', 'b': 'two', 'c': 3.14159}
+        template = PromptTemplate('t', text)
+
+        assert template.render(**values) == text.format(**values)
+        assert template.bind(a='one').render(b='two', c=3.14159) == text.format(**values)
+        assert template.bind(a='one').fields == {'b', 'c'}
+        with pytest.raises(KeyError):
+            template.render(a='one')
+
+    def test_templates_are_read_once_and_reloaded_on_change(self):
+        """Test the shared cache, mtime reload and version hashes."""
+        first, second = PromptManager(self.temp_dir), PromptManager(self.temp_dir)
+        rendered = first.load_prompt('greet', iw_overview='Overview', name='Ann', count=2)
+        assert rendered == "CONTEXT:\nOverview\n\nHello 'Ann',   2 items {literal}\n"
+
+        with patch('builtins.open', side_effect=AssertionError("template re-read")):
+            assert second.get_template('greet') is first.get_template('greet')
+        version = first.template_versions()['greet']
+
+        self._write_template("Bye {name} ({iw_overview})", mtime_ns=os.stat(self.template_path).st_mtime_ns + 10**9)
+        assert second.load_prompt('greet', iw_overview='O', name='Ann') == "Bye Ann (O)"
+        assert first.template_versions()['greet'] != version
+
+    def test_bound_prompt_is_rebuilt_only_when_inputs_change(self):
+        """Test that static context is pre-rendered once per template version and value."""
+        manager = PromptManager(self.temp_dir)
+
+        with patch.object(PromptTemplate, 'bind', wraps=manager.get_template('greet').bind) as bind:
+            for count in range(3):
+                assert manager.load_bound_prompt('greet', {'iw_overview': 'Overview'}, name='Ann', count=count) == \
+                    manager.load_prompt('greet', iw_overview='Overview', name='Ann', count=count)
+            assert bind.call_count == 1
+
+            manager.load_bound_prompt('greet', {'iw_overview': 'Changed'}, name='Ann', count=1)
+            assert bind.call_count == 2
+
+        with pytest.raises(Exception, match="Prompt template not found"):
+            manager.load_bound_prompt('missing', {'iw_overview': ''})
@@ -0,0 +1,69 @@
+import asyncio
+import time
+import httpx
+import openai
+from src.rate_limiter import TokenBucketRateLimiter, backoff_delay, retry_after_seconds, estimate_tokens
+
+class TestTokenBucketRateLimiter:
+    """Test cases for the TokenBucketRateLimiter class."""
+
+    def test_unlimited_never_waits(self):
+        """Test that a limiter without budgets never delays requests."""
+        limiter = TokenBucketRateLimiter()
+        assert all(limiter.reserve(10_000) == 0 for _ in range(100))
+
+    def test_request_budget_queues_callers(self):
+        """Test that requests beyond the per-minute budget are spaced by the refill rate."""
+        limiter = TokenBucketRateLimiter(requests_per_minute=60)
+        waits = [limiter.reserve(1) for _ in range(62)]
+
+        assert waits[:60] == [0.0] * 60
+        assert 0.9 < waits[60] <= 1.0
+        assert 1.9 < waits[61] <= 2.0
+
+    def test_token_budget(self):
+        """Test that token reservations wait for the token bucket, capped at a full bucket."""
+        limiter = TokenBucketRateLimiter(tokens_per_minute=6000)
+
+        assert limiter.reserve(6000) == 0
+        assert 29 < limiter.reserve(3000) <= 30
+        # Larger than the budget: charged as a full bucket
+        assert 89 < limiter.reserve(1_000_000) <= 90
+
+    def test_block_for_delays_everyone(self):
+        """Test that a Retry-After block applies to all later reservations."""
+        limiter = TokenBucketRateLimiter()
+        limiter.block_for(0.05)
+
+        assert 0 < limiter.reserve(1) <= 0.05
+        start = time.monotonic()
+        asyncio.run(limiter.acquire_async(1))
+        assert time.monotonic() - start < 0.1
+
+
+class TestRetryHelpers:
+    """Test cases for the retry scheduling helpers."""
+
+    def _rate_limit_error(self, headers):
+        request = httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')
+        response = httpx.Response(429, headers=headers, request=request)
+        return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+    def test_retry_after_seconds(self):
+        """Test reading Retry-After in seconds, milliseconds and missing forms."""
+        assert retry_after_seconds(self._rate_limit_error({'retry-after': '2'})) == 2.0
+        assert retry_after_seconds(self._rate_limit_error({'retry-after-ms': '1500', 'retry-after': '2'})) == 1.5
+        assert retry_after_seconds(self._rate_limit_error({})) is None
+        assert retry_after_seconds(ValueError("no response")) is None
+
+    def test_backoff_delay_is_jittered_and_capped(self):
+        """Test that backoff grows exponentially but never exceeds the cap."""
+        delays = [backoff_delay(attempt, base=1.0, cap=5.0) for attempt in range(10) for _ in range(20)]
+        assert all(0 <= delay <= 5.0 for delay in delays)
+        assert len(set(delays)) > 1
+        assert all(backoff_delay(0, base=1.0) <= 1.0 for _ in range(20))
+
+    def test_estimate_tokens(self):
+        """Test the rough prompt token estimate."""
+        assert estimate_tokens('') == 1
+        assert estimate_tokens('x' * 400) == 101
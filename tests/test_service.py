@@ -0,0 +1,82 @@
+import time
+import threading
+import pytest
+from unittest.mock import MagicMock
+from click.testing import CliRunner
+from src.cli import cli
+from src.service import CopilotService, CopilotServiceClient
+
+class TestCopilotService:
+    """Test cases for the copilot daemon and its thin client."""
+
+    def setup_method(self):
+        """Start a service around a mocked copilot on a free port."""
+        self.copilot = MagicMock()
+        self.copilot.search_test_cases.return_value = [{'title': 'Login', '_relevance_score': 0.9}]
+        self.copilot.get_metrics.return_value = {'total_requests': 3}
+        self.release = threading.Event()
+
+        def process(path):
+            self.release.wait(5)
+            if path.endswith('bad.md'):
+                raise Exception("LLM failure")
+            return 'reports/change_request_report.md'
+
+        self.copilot.process_change_request.side_effect = process
+        self.service = CopilotService(self.copilot, port=0, workers=1).start()
+        self.client = CopilotServiceClient(self.service.url, poll_interval=0.01)
+
+    def teardown_method(self):
+        """Stop the service."""
+        self.release.set()
+        self.service.stop()
+
+    def test_thin_client_mirrors_copilot(self):
+        """Test that the client's synchronous calls reach the warm copilot."""
+        assert self.client.search_test_cases('login', 2)[0]['title'] == 'Login'
+        self.copilot.search_test_cases.assert_called_once_with('login', 2)
+        assert self.client.get_metrics() == {'total_requests': 3}
+
+    def test_jobs_are_queued_and_report_results(self):
+        """Test that process jobs queue behind the worker and surface errors."""
+        first = self.client.submit({'change_request': '/tmp/good.md'})
+        second = self.client.submit({'change_request': '/tmp/bad.md'})
+        time.sleep(0.05)
+        assert self.service.get_job(second)['status'] == 'queued'
+
+        self.release.set()
+        assert self.client.wait_for_job(first)['result'] == {'report_path': 'reports/change_request_report.md'}
+        failed = self.client.wait_for_job(second)
+        assert failed['status'] == 'error'
+        assert 'LLM failure' in failed['error']
+
+    def test_validation_runs_as_a_job(self):
+        """Test that validation is queued and polled instead of held open on one request."""
+        def validate(progress):
+            progress(1, 2)
+            self.release.wait(5)
+            progress(2, 2)
+            return {'valid': 2}
+
+        self.copilot.validate_all_test_cases.side_effect = validate
+        self.client.timeout = 0.5
+        reported = []
+        threading.Timer(1.0, self.release.set).start()
+
+        assert self.client.validate_all_test_cases(progress=lambda done, total: reported.append(done)) == {'valid': 2}
+        assert reported[0] == 1 and reported[-1] == 2
+
+    def test_bad_requests(self):
+        """Test that invalid input maps to client errors."""
+        with pytest.raises(Exception, match=r"\(400\)"):
+            self.client.submit({})
+        with pytest.raises(Exception, match=r"\(404\)"):
+            self.client.wait_for_job('missing')
+
+    def test_no_cache_is_rejected_with_daemon(self):
+        """Test that --no-cache is refused rather than silently ignored by the daemon."""
+        result = CliRunner().invoke(cli, ['--daemon-url', self.service.url, 'process', '-c', 'cr.md', '--no-cache'])
+
+        assert result.exit_code == 2
+        assert '--no-cache cannot be used with --daemon-url' in result.output
+        self.copilot.process_change_request.assert_not_called()
@@ -1,9 +1,11 @@
 import os
 import json
 import tempfile
+import threading
 import pytest
 from unittest.mock import patch, MagicMock
 from src.test_case_manager import TestCaseManager
+from src.schema_validator import get_schema_validator
 
 class TestTestCaseManager:
     """Test cases for the TestCaseManager class."""
@@ -90,6 +92,28 @@ class TestTestCaseManager:
         assert test_cases[0]['_file_name'] == 'tc_001.json'
         assert test_cases[0]['_file_path'] == self.test_case_path
     
+    @patch('src.test_case_manager.Config')
+    def test_corpus_fingerprint(self, mock_config):
+        """Test that the corpus fingerprint changes only when test case files change."""
+        mock_config.TEST_CASES_DIR = self.test_cases_dir
+        mock_config.SCHEMA_PATH = self.schema_path
+        
+        manager = TestCaseManager()
+        fingerprint = manager.corpus_fingerprint()
+        assert manager.corpus_fingerprint() == fingerprint
+        
+        # Backups live in a subdirectory and don't count
+        manager.backup_test_case('tc_001.json')
+        assert manager.corpus_fingerprint() == fingerprint
+        
+        with open(self.test_case_path, 'w') as f:
+            json.dump({**self.sample_test_case, 'title': 'Edited title'}, f)
+        edited = manager.corpus_fingerprint()
+        assert edited != fingerprint
+        
+        manager.create_new_test_case(self.sample_test_case, 'positive')
+        assert manager.corpus_fingerprint() not in (fingerprint, edited)
+    
     @patch('src.test_case_manager.Config')
     def test_load_test_case(self, mock_config):
         """Test loading a specific test case."""
@@ -271,3 +295,134 @@ class TestTestCaseManager:
         test_cases = manager.list_test_cases()
         assert len(test_cases) == 1
         assert 'tc_001.json' in test_cases
+    
+    @patch('src.test_case_manager.Config')
+    def test_repository_cache_and_invalidation(self, mock_config):
+        """Test that unchanged files are served from memory and edits are picked up."""
+        mock_config.TEST_CASES_DIR = self.test_cases_dir
+        mock_config.SCHEMA_PATH = self.schema_path
+        
+        manager = TestCaseManager()
+        manager.load_all_test_cases()[0]['title'] = 'Mutated by caller'
+        
+        with patch.object(manager.repository, '_read', wraps=manager.repository._read) as read:
+            assert manager.get_test_case_by_id('tc_001')['title'] == 'Test Case 1'
+            assert manager.list_test_cases() == ['tc_001.json']
+            assert read.call_count == 0
+            
+            # An external edit that changes the file size is noticed by the stat check
+            with open(self.test_case_path, 'w') as f:
+                json.dump({**self.sample_test_case, 'title': 'Edited outside the manager'}, f)
+            assert manager.load_all_test_cases()[0]['title'] == 'Edited outside the manager'
+            assert read.call_count == 1
+        
+        manager.create_new_test_case({**self.sample_test_case, 'priority': 'P1 - Critical'}, 'positive')
+        assert [tc['_file_name'] for tc in manager.find_test_cases(priority='P1 - Critical')] == ['tc_002.json']
+        assert len(manager.find_test_cases(test_case_type='functional')) == 2
+        assert manager.find_test_cases(test_case_type='functional', priority='P9') == []
+        
+        # Single-case lookups and updates stat one file instead of rescanning the directory
+        with patch('src.test_case_repository.os.scandir', side_effect=AssertionError("directory rescanned")):
+            manager.update_test_case('tc_002', {**self.sample_test_case, 'title': 'Updated in place'})
+            assert manager.get_test_case_by_id('tc_002')['title'] == 'Updated in place'
+        
+        os.remove(self.test_case_path)
+        assert manager.get_test_case_by_id('tc_001') is None
+    
+    @patch('src.test_case_manager.Config')
+    def test_validate_test_cases_collects_all_errors(self, mock_config):
+        """Test corpus validation with the shared compiled validator."""
+        mock_config.TEST_CASES_DIR = self.test_cases_dir
+        mock_config.SCHEMA_PATH = self.schema_path
+        
+        manager = TestCaseManager()
+        assert get_schema_validator(self.schema_path) is get_schema_validator(self.schema_path)
+        
+        broken = {'_file_name': 'tc_009.json', 'title': 7, 'type': 'functional', 'priority': 'P2 - High',
+                  'steps': [{'step_text': 'Only text'}]}
+        errors = manager.validate_test_cases(manager.load_all_test_cases() + [broken])
+        
+        assert list(errors) == ['tc_009.json']
+        assert sorted(errors['tc_009.json']) == ["steps/0: 'step_expected' is a required property",
+                                                 "title: 7 is not of type 'string'"]
+    
+    @patch('src.test_case_manager.Config')
+    def test_parallel_load_reports_progress(self, mock_config):
+        """Test that large loads run on the thread pool, keep order and report progress."""
+        mock_config.TEST_CASES_DIR = self.test_cases_dir
+        mock_config.SCHEMA_PATH = self.schema_path
+        mock_config.TEST_CASE_LOAD_WORKERS = 4
+        
+        for i in range(2, 21):
+            with open(os.path.join(self.test_cases_dir, f'tc_{i:03d}.json'), 'w') as f:
+                json.dump({**self.sample_test_case, 'title': f'Case {i}'}, f)
+        with open(os.path.join(self.test_cases_dir, 'tc_021.json'), 'w') as f:
+            f.write('{not json')
+        
+        manager = TestCaseManager()
+        progress = []
+        with patch.object(manager.repository, 'PARALLEL_THRESHOLD', 5):
+            test_cases = manager.load_all_test_cases(lambda done, total: progress.append((done, total)))
+        
+        assert [tc['_file_name'] for tc in test_cases] == [f'tc_{i:03d}.json' for i in range(1, 21)]
+        assert progress[-1] == (21, 21) and len(progress) == 21
+        assert manager.list_test_cases()[-1] == 'tc_021.json'
+        with pytest.raises(Exception):
+            manager.load_test_case('tc_021.json')
+    
+    @patch('src.test_case_manager.Config')
+    def test_rollback_restores_journaled_session(self, mock_config):
+        """Test that a session's updates are undone and its new test cases removed."""
+        mock_config.TEST_CASES_DIR = self.test_cases_dir
+        mock_config.SCHEMA_PATH = self.schema_path
+        mock_config.JOURNAL_DIR = os.path.join(self.temp_dir, 'journal')
+        
+        manager = TestCaseManager()
+        original = manager.repository.read_raw('tc_001.json')
+        
+        with manager.batch_writes():
+            manager.update_test_case('tc_001', {**self.sample_test_case, 'title': 'First'}, session_id='abc123')
+            manager.update_test_case('tc_001', {**self.sample_test_case, 'title': 'Second'}, session_id='abc123')
+            new_path = manager.create_new_test_case(self.sample_test_case, 'positive', session_id='abc123')
+        
+        assert manager.get_test_case_by_id('tc_001')['title'] == 'Second'
+        assert not [name for name in os.listdir(self.test_cases_dir) if name.endswith('.tmp')]
+        
+        assert sorted(manager.rollback('abc')) == ['tc_001.json', 'tc_002.json']
+        assert manager.repository.read_raw('tc_001.json') == original
+        assert not os.path.exists(new_path)
+        assert manager.list_test_cases() == ['tc_001.json']
+        
+        # The journal is retired, so the rollback cannot be applied again
+        with pytest.raises(Exception, match="No journal"):
+            manager.rollback('abc123')
+    
+    @patch('src.test_case_manager.Config')
+    def test_reserved_ids_are_unique_and_ordered_past_999(self, mock_config):
+        """Test ID reservation across managers, threads and files added by hand."""
+        mock_config.TEST_CASES_DIR = self.test_cases_dir
+        mock_config.SCHEMA_PATH = self.schema_path
+        
+        with open(os.path.join(self.test_cases_dir, 'tc_998.json'), 'w') as f:
+            json.dump(self.sample_test_case, f)
+        
+        first, second = TestCaseManager(), TestCaseManager()
+        assert first.reserve_test_case_ids(2) == ['tc_999', 'tc_1000']
+        
+        # Another manager (or process) continues from the persisted counter
+        reserved = []
+        threads = [threading.Thread(target=lambda: reserved.extend(second.reserve_test_case_ids(3)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(int(tc_id[3:]) for tc_id in reserved) == list(range(1001, 1013))
+        
+        # A file the counter does not know about is skipped, not overwritten
+        with open(os.path.join(self.test_cases_dir, 'tc_1020.json'), 'w') as f:
+            json.dump(self.sample_test_case, f)
+        path = first.create_new_test_case(self.sample_test_case, 'positive', test_case_id='tc_1020')
+        assert path.endswith('tc_1021.json')
+        
+        assert first.list_test_cases() == ['tc_001.json', 'tc_998.json', 'tc_1020.json', 'tc_1021.json']
@@ -0,0 +1,47 @@
+import json
+from unittest.mock import patch
+from src.token_budget import count_tokens, compact_json, pack_test_cases, prompt_test_case, prompt_test_case_id
+
+class TestTokenBudget:
+    """Test cases for token counting and budgeted test case packing."""
+
+    def _case(self, number, score=None, steps=1):
+        test_case = {
+            '_file_name': f'tc_{number:03d}.json',
+            '_file_path': f'test_cases/tc_{number:03d}.json',
+            'title': f'Case {number}',
+            'steps': [{'step_text': 'Do it', 'step_expected': 'Done'}] * steps
+        }
+        if score is not None:
+            test_case['_relevance_score'] = score
+        return test_case
+
+    def test_compact_prompt_json(self):
+        """Test that prompts get compact JSON of the schema fields only, with the ID kept outside."""
+        test_case = self._case(7, score=0.5)
+        shown = prompt_test_case(test_case)
+
+        assert list(shown) == ['title', 'steps']
+        assert compact_json(shown).startswith('{"title":"Case 7","steps":[{')
+        assert prompt_test_case_id(test_case, 0) == 'tc_007'
+        assert prompt_test_case_id({'title': 'Unsaved'}, 2) == '#3'
+
+    def test_packs_by_relevance_within_budget(self):
+        """Test greedy packing: most relevant first, oversized cases skipped."""
+        test_cases = [self._case(1, 0.2), self._case(2, 0.9, steps=50), self._case(3, 0.5), self._case(4)]
+        small = count_tokens('"tc_001":' + compact_json(prompt_test_case(test_cases[0])))
+
+        packed_json, packed = pack_test_cases(test_cases, budget_tokens=3 * small + 5)
+
+        assert [tc['_file_name'] for tc in packed] == ['tc_003.json', 'tc_001.json', 'tc_004.json']
+        assert count_tokens(packed_json) <= 3 * small + 5
+        assert packed_json.startswith('{"tc_003":{"title":"Case 3"')
+        assert list(json.loads(packed_json)) == ['tc_003', 'tc_001', 'tc_004']
+
+        _, unlimited = pack_test_cases(test_cases, budget_tokens=0)
+        assert [tc['_file_name'] for tc in unlimited] == ['tc_002.json', 'tc_003.json', 'tc_001.json', 'tc_004.json']
+
+    def test_heuristic_without_tiktoken(self):
+        """Test the character estimate used when tiktoken is not installed."""
+        with patch('src.token_budget.tiktoken', None):
+            assert count_tokens('x' * 400, 'gpt-4') == 101